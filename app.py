@@ -5,8 +5,12 @@ import os
 import secrets
 import uuid
 import base64
+import json
+import queue
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from flask import Flask, render_template, render_template_string, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context, send_file, abort
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 import smtplib
@@ -16,6 +20,19 @@ import random
 import string
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from db_metrics import DBMetrics, InstrumentedClient
+from discovery import DiscoveryQueue
+from like_graph import LikeGraph
+from interests import InterestIndex
+from ranking import CompatibilityRanker
+from recommender import load_embeddings
+from user_index import DenseIds
+from media_store import MediaStore, UnsupportedImage, is_media_hash
+from image_pool import ImagePool, ImagePoolBusy
+from repository import (
+    get_users_by_ids, get_prompts_by_user_ids, match_partner_id, PostgrestQueries,
+    USER_NAME_COLUMNS, USER_AVATAR_COLUMNS, USER_CARD_COLUMNS, USER_SELF_COLUMNS, USER_AUTH_COLUMNS
+)
 
 # Load environment variables
 load_dotenv()
@@ -35,19 +52,43 @@ app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 
+# Database backend: 'postgrest' (Supabase client), 'postgres' (Supabase client plus a
+# direct connection pool for hot queries) or 'local' (in-memory, for offline runs)
+DB_BACKEND = os.getenv('DB_BACKEND', 'postgrest').lower()
+DATABASE_URL = os.getenv('DATABASE_URL')
+
 # Initialize Supabase client
-if SUPABASE_URL and SUPABASE_KEY:
+if DB_BACKEND == 'local':
+    from local_backend import LocalClient, seed
+    supabase = LocalClient()
+    seed(supabase, users=int(os.getenv('LOCAL_SEED_USERS', 200)))
+elif SUPABASE_URL and SUPABASE_KEY:
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 else:
     supabase = None
 
+# Record every database round trip for /metrics
+db_metrics = DBMetrics()
+if supabase:
+    supabase = InstrumentedClient(supabase, db_metrics)
+
+# Hot-path query backend
+if DB_BACKEND == 'postgres' and DATABASE_URL:
+    from pg_backend import PostgresQueries
+    hot_queries = PostgresQueries(DATABASE_URL, max_connections=int(os.getenv('DB_POOL_SIZE', 10)), metrics=db_metrics)
+else:
+    hot_queries = PostgrestQueries(supabase)
+
 # Check if email is configured
 if app.config['MAIL_USERNAME'] and app.config['MAIL_PASSWORD']:
     EMAIL_ENABLED = True
 else:
     EMAIL_ENABLED = False
 
-# No longer need upload directory since we store images in database
+# Uploaded images are stored on disk by content hash; the database keeps only the hash
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(app.root_path, 'media'))
+MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+media_store = MediaStore(MEDIA_ROOT)
 
 # Database setup - Supabase is already configured via SQL schema
 def init_db():
@@ -153,25 +194,318 @@ def send_otp_email(email, otp):
     except Exception as e:
         return False
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif'}
+# Resized variants are built off the request thread (see image_pool.py)
+image_pool = ImagePool(
+    MEDIA_ROOT,
+    workers=int(os.getenv('IMAGE_WORKERS', 2)),
+    max_pending=int(os.getenv('IMAGE_QUEUE_SIZE', 16)),
+)
+# Before the background loaders below start any threads
+image_pool.start()
 
-def image_to_base64(image_file):
-    """Convert uploaded image file to base64 string"""
+def revert_unreadable_photo(user_id, digest, previous_photo):
+    """Put a user's previous photo back if the new one could not be decoded"""
+    if supabase:
+        (supabase.table('users').update({'profile_photo': previous_photo})
+         .eq('id', user_id).eq('profile_photo', digest).execute())
+
+def store_profile_photo(image_file, user_id, previous_photo):
+    """Save an uploaded image, queue its resized variants and return its hash.
+
+    If the variants later fail, the user's previous photo is restored. Call
+    settle_profile_photo() once the hash is saved on the profile.
+    """
     try:
-        # Read the image file
-        image_data = image_file.read()
-        # Convert to base64
-        base64_string = base64.b64encode(image_data).decode('utf-8')
-        # Get file extension
-        file_extension = image_file.filename.rsplit('.', 1)[1].lower() if '.' in image_file.filename else 'jpeg'
-        # Return data URL format
-        return f"data:image/{file_extension};base64,{base64_string}"
+        # Streamed to disk in chunks; the type comes from the file's header bytes
+        digest = media_store.put_stream(image_file.stream)
+        if image_pool.failed(digest):
+            # Known not to decode; the copy just written goes again
+            media_store.delete(digest)
+            print(f"Rejected upload {image_file.filename!r}: image could not be decoded")
+            return None
+        if image_pool.needs_variants(digest):
+            image_pool.submit(digest, on_failure=lambda digest: revert_unreadable_photo(user_id, digest, previous_photo))
+        return digest
+    except UnsupportedImage as e:
+        print(f"Rejected upload {image_file.filename!r}: {e}")
+        return None
+    except ImagePoolBusy as e:
+        print(f"Image pool busy: {e}")
+        return None
     except Exception as e:
-        print(f"Error converting image to base64: {e}")
+        print(f"Error storing image: {e}")
         return None
 
+def settle_profile_photo(user_id, digest, previous_photo):
+    """After saving a new photo hash: catch variants that failed before the save landed"""
+    if image_pool.failed(digest):
+        revert_unreadable_photo(user_id, digest, previous_photo)
+
+# Real-time chat events
+class ChatEventBroker:
+    """In-process fan-out of new chat messages to open /chat-stream connections.
+
+    Subscribers are keyed by (viewer_id, other_user_id). Only streams served by
+    this worker process see the events, so the chat page keeps polling as a
+    fallback when the stream is unavailable.
+    """
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, viewer_id, other_user_id):
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault((viewer_id, other_user_id), set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, viewer_id, other_user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get((viewer_id, other_user_id))
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[(viewer_id, other_user_id)]
+
+    def publish_message(self, message):
+        """Deliver a committed message to both participants' open streams"""
+        keys = [(message['receiver_id'], message['sender_id']), (message['sender_id'], message['receiver_id'])]
+        with self._lock:
+            targets = [subscriber for key in keys for subscriber in self._subscribers.get(key, ())]
+        for subscriber in targets:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow client - it will catch up through the polling fallback
+                pass
+
+chat_events = ChatEventBroker()
+CHAT_STREAM_KEEPALIVE_SECONDS = 15
+# Streams end after this long and EventSource reconnects, which rechecks
+# permission and frees the worker thread holding the connection
+CHAT_STREAM_MAX_SECONDS = 300
+
+# Chat history pagination
+CHAT_PAGE_SIZE = 50
+
+def encode_message_cursor(message):
+    """Opaque keyset cursor for a message's (sent_at, id) position"""
+    raw = json.dumps([message['sent_at'], message['id']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_message_cursor(cursor):
+    """Return (sent_at, id) from a cursor, or None if it is malformed"""
+    try:
+        sent_at, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        # Validate both parts before they are interpolated into a filter
+        datetime.fromisoformat(sent_at.replace('Z', '+00:00'))
+        uuid.UUID(message_id)
+        return sent_at, message_id
+    except Exception:
+        return None
+
+def serialize_message(message):
+    """Compact message payload; participants are identified by sender_id only"""
+    return {
+        'id': message['id'],
+        'content': message['content'],
+        'sent_at': message['sent_at'],
+        'is_read': message.get('is_read', False),
+        'sender_id': message['sender_id'],
+        'receiver_id': message['receiver_id'],
+        'cursor': encode_message_cursor(message)
+    }
+
+# Conversation summaries (see the conversations table in supabase_schema.sql)
+def conversation_key(user_a, user_b):
+    """Unordered pair key: (user_low, user_high)"""
+    return min(user_a, user_b), max(user_a, user_b)
+
+def open_conversation(user_a, user_b, is_match):
+    try:
+        supabase.rpc('open_conversation', {'p_user_a': user_a, 'p_user_b': user_b, 'p_is_match': is_match}).execute()
+    except Exception as e:
+        print(f"Error opening conversation summary: {e}")
+
+def record_conversation_message(message):
+    try:
+        supabase.rpc('record_conversation_message', {
+            'p_sender': message['sender_id'],
+            'p_receiver': message['receiver_id'],
+            'p_content': message['content'],
+            'p_sent_at': message['sent_at']
+        }).execute()
+    except Exception as e:
+        print(f"Error updating conversation summary: {e}")
+
+def mark_conversation_read(reader_id, other_user_id):
+    try:
+        supabase.rpc('mark_conversation_read', {'p_reader': reader_id, 'p_other': other_user_id}).execute()
+    except Exception as e:
+        print(f"Error updating conversation summary: {e}")
+
+def delete_conversation(user_a, user_b):
+    user_low, user_high = conversation_key(user_a, user_b)
+    supabase.table('conversations').delete().eq('user_low', user_low).eq('user_high', user_high).execute()
+
+# Chat permissions
+class ChatPermissionCache:
+    """Answers "can these two users chat?" from an in-process TTL cache.
+
+    Two users can chat when they are matched or have an accepted chat request.
+    Routes that change either relationship call invalidate(); the TTL bounds
+    how long another worker process can serve a stale answer. Denials expire
+    sooner so a freshly accepted request elsewhere is picked up quickly.
+    """
+
+    def __init__(self, allow_ttl_seconds=60, deny_ttl_seconds=5):
+        self.allow_ttl_seconds = allow_ttl_seconds
+        self.deny_ttl_seconds = deny_ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def can_chat(self, user_a, user_b):
+        key = conversation_key(user_a, user_b)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[1] > now:
+            return entry[0]
+        
+        allowed = hot_queries.can_chat(user_a, user_b)
+        ttl = self.allow_ttl_seconds if allowed else self.deny_ttl_seconds
+        with self._lock:
+            self._entries[key] = (allowed, now + ttl)
+        return allowed
+
+    def invalidate(self, user_a, user_b):
+        with self._lock:
+            self._entries.pop(conversation_key(user_a, user_b), None)
+
+chat_permissions = ChatPermissionCache()
+
+# Dashboard candidates
+DASHBOARD_CARDS = 10
+dense_user_ids = DenseIds()
+ranker = CompatibilityRanker(dense_user_ids)
+interests = InterestIndex(dense_user_ids)
+discovery = DiscoveryQueue(supabase, dense_user_ids, ranker=ranker, interests=interests)
+like_graph = LikeGraph(dense_user_ids)
+
+# The indexes load in the background; until they are ready, discovery scans
+# users and like lookups go to the database
+def load_in_background(index, name):
+    def load():
+        try:
+            index.load(supabase)
+        except Exception as e:
+            print(f"Error loading {name}: {e}")
+    threading.Thread(target=load, name=f'{name}-load', daemon=True).start()
+
+# Embeddings from the offline recommender job add predicted mutual interest
+# to the ranking; a replaced file is picked up on the next check
+RECOMMENDER_PATH = os.getenv('RECOMMENDER_PATH', os.path.join(app.root_path, 'recommender.npz'))
+RECOMMENDER_CHECK_SECONDS = 300
+
+def watch_recommender():
+    loaded_mtime = None
+    while True:
+        try:
+            mtime = os.path.getmtime(RECOMMENDER_PATH)
+            if mtime != loaded_mtime:
+                user_ids, viewer_vectors, candidate_vectors = load_embeddings(RECOMMENDER_PATH)
+                ranker.set_interest(user_ids, viewer_vectors, candidate_vectors)
+                loaded_mtime = mtime
+                print(f"🧮 Recommender embeddings loaded for {len(user_ids)} users")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading recommender embeddings: {e}")
+        time.sleep(RECOMMENDER_CHECK_SECONDS)
+
+if supabase:
+    load_in_background(ranker, 'ranking')
+    load_in_background(interests, 'interests')
+    load_in_background(like_graph, 'like-graph')
+    threading.Thread(target=watch_recommender, name='recommender-watch', daemon=True).start()
+
+def refresh_discovery_indexes(user_id, form):
+    """Update a user's ranking features and indexed text from the profile form they just saved"""
+    interests.update_user(user_id, [form.get(field) for field in ('bio', 'prompt1', 'prompt2', 'prompt3')])
+    try:
+        ranker.update_user({'id': user_id, **{column: form.get(column) for column in ('department', 'year', 'looking_for', 'age')}})
+    except ValueError as e:
+        print(f"Error refreshing ranking features for {user_id}: {e}")
+
+# Page templates
+@app.template_filter('photo_url')
+def photo_url(profile_photo, variant='full'):
+    """Image URL for a users.profile_photo value, at the given size (see thumbnails.PHOTO_VARIANTS)"""
+    if is_media_hash(profile_photo):
+        if media_store.exists(profile_photo, variant):
+            return url_for('media', digest=profile_photo, variant=variant)
+        return url_for('media', digest=profile_photo)
+    # Rows written before the media store hold a data URL or an uploads/ filename
+    if profile_photo.startswith('data:image'):
+        return profile_photo
+    return url_for('static', filename='uploads/' + profile_photo)
+
+# Pages live in templates/pages/ and are compiled once here, at startup, into
+# the Jinja environment's cache; render_template then only renders. Flask
+# still reloads edited files when running in debug mode.
+def warm_template_cache():
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+
+warm_template_cache()
+
+@app.before_request
+def record_activity():
+    user_id = session.get('user_id')
+    if not user_id or not supabase or request.endpoint in ('static', 'media', 'metrics'):
+        return
+    # Recency counts towards ranking; the column is only written every ACTIVITY_WRITE_INTERVAL
+    if ranker.touch(user_id):
+        try:
+            supabase.table('users').update({'last_active_at': datetime.now(timezone.utc).isoformat()}).eq('id', user_id).execute()
+        except Exception as e:
+            print(f"Error recording activity for {user_id}: {e}")
+
 # Debug and Test Routes
+@app.after_request
+def record_db_round_trips(response):
+    if request.endpoint != 'metrics':
+        db_metrics.finish_request()
+        if app.debug:
+            response.headers['X-DB-Round-Trips'] = str(db_metrics.request_round_trips())
+            response.headers['X-DB-Time-Ms'] = f'{db_metrics.request_seconds() * 1000:.1f}'
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint for database round-trip metrics"""
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(db_metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/media/<digest>', defaults={'variant': None})
+@app.route('/media/<digest>/<variant>')
+def media(digest, variant):
+    """Serve an uploaded image, or one of its resized variants, by content hash"""
+    if not media_store.exists(digest, variant):
+        abort(404)
+    if variant is None:
+        path, etag = media_store.path_for(digest), digest
+    else:
+        path, etag = media_store.variant_path_for(digest, variant), f'{digest}.{variant}'
+    # Conditional requests get a 304
+    response = send_file(path, mimetype=media_store.content_type(digest, variant),
+                         etag=etag, conditional=True, max_age=None)
+    response.headers['Cache-Control'] = MEDIA_CACHE_CONTROL
+    return response
 
 
 
@@ -187,32 +521,7 @@ def index():
     
     if 'user_id' in session:
         return redirect(url_for('dashboard'))
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="heart-bg min-h-screen flex flex-col">
-        <div class="flex-1 flex flex-col justify-center items-center px-4 text-center">
-            <div class="w-32 h-32 bg-gradient-to-br from-pink-300 to-red-400 rounded-3xl flex items-center justify-center mb-8 shadow-xl slide-up">
-                <i class="fas fa-heart text-6xl text-white heartbeat"></i>
-            </div>
-            
-            <h1 class="text-4xl font-bold text-gray-800 mb-4 slide-up">Fall In</h1>
-            <p class="text-xl text-gray-600 mb-2 slide-up">Where Hearts Meet</p>
-            <p class="text-gray-500 mb-12 max-w-sm slide-up">Connect with people around you. Find friends, study buddies, or something more special.</p>
-            
-            <div class="space-y-4 w-full max-w-xs slide-up">
-                <a href="{{ url_for('signup') }}" class="block w-full btn-primary text-white py-4 rounded-xl font-semibold text-lg shadow-lg">
-                    Get Started
-                </a>
-                <a href="{{ url_for('login') }}" class="block w-full border-2 border-red-500 text-red-500 py-4 rounded-xl font-semibold text-lg hover:bg-red-50 transition duration-300">
-                    Sign In
-                </a>
-                
-            </div>
-        </div>
-    </div>
-    {% endblock %}
-    ''')
+    return render_template('pages/index.html')
 
 @app.route('/signup', methods=['GET', 'POST'])
 def signup():
@@ -225,10 +534,10 @@ def signup():
         
         try:
             # Check if user already exists
-            existing_user_result = supabase.table('users').select('*').eq('email', email).execute()
+            existing_user_result = supabase.table('users').select('id').eq('email', email).execute()
         except Exception as e:
             flash(f'Database connection error: {str(e)}. Please check your configuration.', 'error')
-            return render_template('signup.html')
+            return render_template('pages/signup.html')
         
         if existing_user_result.data:
             # If user exists, redirect them to login instead of showing error
@@ -254,44 +563,7 @@ def signup():
             flash('Error creating account. Please try again.', 'error')
             return redirect(url_for('signup'))
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="heart-bg min-h-screen flex items-center justify-center px-4">
-        <div class="bg-white rounded-2xl p-8 w-full max-w-md shadow-xl slide-up">
-            <div class="text-center mb-8">
-                <div class="w-16 h-16 bg-gradient-to-br from-pink-200 to-red-200 rounded-2xl flex items-center justify-center mx-auto mb-4">
-                    <i class="fas fa-heart text-3xl text-red-500"></i>
-                </div>
-                <h1 class="text-2xl font-bold text-gray-800">Join Fall In</h1>
-                <p class="text-gray-600 mt-2">Enter your email to get started</p>
-            </div>
-            
-            <form method="POST" class="space-y-6">
-                <div>
-                    <label class="block text-sm font-medium text-gray-700 mb-2">Email Address</label>
-                    <input type="email" name="email" required 
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500 focus:border-transparent"
-                           placeholder="yourname@example.com">
-                    <p class="text-xs text-gray-500 mt-1">We'll send a verification code to this email</p>
-                </div>
-                
-                <button type="submit" 
-                        class="w-full btn-primary text-white py-3 rounded-xl font-semibold">
-                    Send Verification Code
-                </button>
-            </form>
-            
-            <div class="text-center mt-6">
-                <p class="text-gray-600">Already have an account? 
-                    <a href="{{ url_for('login') }}" class="text-red-500 font-semibold hover:underline">Sign In</a>
-                </p>
-                
-            </div>
-        </div>
-    </div>
-    {% endblock %}
-    ''')
+    return render_template('pages/signup.html')
 
 @app.route('/verify-otp', methods=['GET', 'POST'])
 def verify_otp():
@@ -303,7 +575,7 @@ def verify_otp():
         email = session['signup_email']
         
         # Find user with matching email, OTP, and non-expired OTP
-        user_result = supabase.table('users').select('*').eq('email', email).eq('otp_code', otp).gt('otp_expires', datetime.now().isoformat()).execute()
+        user_result = supabase.table('users').select(USER_AUTH_COLUMNS).eq('email', email).eq('otp_code', otp).gt('otp_expires', datetime.now().isoformat()).execute()
         
         if user_result.data:
             user = user_result.data[0]
@@ -317,43 +589,7 @@ def verify_otp():
         else:
             flash('Invalid or expired OTP', 'error')
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="heart-bg min-h-screen flex items-center justify-center px-4">
-        <div class="bg-white rounded-2xl p-8 w-full max-w-md shadow-xl slide-up">
-            <div class="text-center mb-8">
-                <div class="w-16 h-16 bg-pink-200 rounded-2xl flex items-center justify-center mx-auto mb-4">
-                    <i class="fas fa-envelope text-3xl text-red-500"></i>
-                </div>
-                <h1 class="text-2xl font-bold text-gray-800">Check Your Email</h1>
-                <p class="text-gray-600 mt-2">We sent a 6-digit code to {{ session.signup_email }}</p>
-               
-            </div>
-            
-            <form method="POST" class="space-y-6">
-                <div>
-                    <label class="block text-sm font-medium text-gray-700 mb-2">Verification Code</label>
-                    <input type="text" name="otp" required maxlength="6" 
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500 focus:border-transparent text-center text-2xl font-mono"
-                           placeholder="123456">
-                </div>
-                
-                <button type="submit" 
-                        class="w-full btn-primary text-white py-3 rounded-xl font-semibold">
-                    Verify Email
-                </button>
-            </form>
-            
-            <div class="text-center mt-6">
-                <p class="text-gray-600">Didn't receive the code? 
-                    <a href="{{ url_for('signup') }}" class="text-red-500 font-semibold hover:underline">Try Again</a>
-                </p>
-            </div>
-        </div>
-    </div>
-    {% endblock %}
-    ''')
+    return render_template('pages/verify_otp.html')
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -366,46 +602,10 @@ def login():
         
         try:
             # Find user by email
-            user_result = supabase.table('users').select('*').eq('email', email).execute()
+            user_result = supabase.table('users').select(USER_AUTH_COLUMNS).eq('email', email).execute()
         except Exception as e:
             flash(f'Database connection error: {str(e)}. Please check your configuration.', 'error')
-            return render_template_string('''
-            {% extends "base.html" %}
-            {% block content %}
-            <div class="heart-bg min-h-screen flex items-center justify-center px-4">
-                <div class="bg-white rounded-2xl p-8 w-full max-w-md shadow-xl slide-up">
-                    <div class="text-center mb-8">
-                        <div class="w-16 h-16 bg-gradient-to-br from-pink-200 to-red-200 rounded-2xl flex items-center justify-center mx-auto mb-4">
-                            <i class="fas fa-heart text-3xl text-red-500"></i>
-                        </div>
-                        <h1 class="text-2xl font-bold text-gray-800">Welcome Back</h1>
-                        <p class="text-gray-600 mt-2">Enter your email to sign in</p>
-                    </div>
-                    
-                    <form method="POST" class="space-y-6">
-                        <div>
-                            <label class="block text-sm font-medium text-gray-700 mb-2">Email Address</label>
-                            <input type="email" name="email" required 
-                                   class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500 focus:border-transparent"
-                                   placeholder="yourname@example.com">
-                            <p class="text-xs text-gray-500 mt-1">We'll send a verification code to this email</p>
-                        </div>
-                        
-                        <button type="submit" 
-                                class="w-full btn-primary text-white py-3 rounded-xl font-semibold">
-                            Send Login Code
-                        </button>
-                    </form>
-                    
-                    <div class="text-center mt-6">
-                        <p class="text-gray-600">Don't have an account? 
-                            <a href="{{ url_for('signup') }}" class="text-red-500 font-semibold hover:underline">Sign Up</a>
-                        </p>
-                    </div>
-                </div>
-            </div>
-            {% endblock %}
-            ''')
+            return render_template('pages/login.html')
         
         if user_result.data:
             user = user_result.data[0]
@@ -425,43 +625,7 @@ def login():
         else:
             flash('Email not found. Please sign up first.', 'error')
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="heart-bg min-h-screen flex items-center justify-center px-4">
-        <div class="bg-white rounded-2xl p-8 w-full max-w-md shadow-xl slide-up">
-            <div class="text-center mb-8">
-                <div class="w-16 h-16 bg-gradient-to-br from-pink-200 to-red-200 rounded-2xl flex items-center justify-center mx-auto mb-4">
-                    <i class="fas fa-heart text-3xl text-red-500"></i>
-                </div>
-                <h1 class="text-2xl font-bold text-gray-800">Welcome Back</h1>
-                <p class="text-gray-600 mt-2">Enter your email to sign in</p>
-            </div>
-            
-            <form method="POST" class="space-y-6">
-                <div>
-                    <label class="block text-sm font-medium text-gray-700 mb-2">Email Address</label>
-                    <input type="email" name="email" required 
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500 focus:border-transparent"
-                           placeholder="yourname@example.com">
-                    <p class="text-xs text-gray-500 mt-1">We'll send a verification code to this email</p>
-                </div>
-                
-                <button type="submit" 
-                        class="w-full btn-primary text-white py-3 rounded-xl font-semibold">
-                    Send Login Code
-                </button>
-            </form>
-            
-            <div class="text-center mt-6">
-                <p class="text-gray-600">Don't have an account? 
-                    <a href="{{ url_for('signup') }}" class="text-red-500 font-semibold hover:underline">Sign Up</a>
-                </p>
-            </div>
-        </div>
-    </div>
-    {% endblock %}
-    ''')
+    return render_template('pages/login.html')
 
 @app.route('/verify-login-otp', methods=['GET', 'POST'])
 def verify_login_otp():
@@ -478,7 +642,7 @@ def verify_login_otp():
         
         try:
             # Find user with matching email, OTP, and non-expired OTP
-            user_result = supabase.table('users').select('*').eq('email', email).eq('otp_code', otp).gt('otp_expires', datetime.now().isoformat()).execute()
+            user_result = supabase.table('users').select(USER_AUTH_COLUMNS).eq('email', email).eq('otp_code', otp).gt('otp_expires', datetime.now().isoformat()).execute()
         except Exception as e:
             flash(f'Database connection error: {str(e)}. Please check your configuration.', 'error')
             return redirect(url_for('login'))
@@ -497,37 +661,7 @@ def verify_login_otp():
         else:
             flash('Invalid or expired OTP', 'error')
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="heart-bg min-h-screen flex items-center justify-center px-4">
-        <div class="bg-white rounded-2xl p-8 w-full max-w-md shadow-xl slide-up">
-            <div class="text-center mb-8">
-                <div class="w-16 h-16 bg-pink-200 rounded-2xl flex items-center justify-center mx-auto mb-4">
-                    <i class="fas fa-envelope text-3xl text-red-500"></i>
-                </div>
-                <h1 class="text-2xl font-bold text-gray-800">Enter Login Code</h1>
-                <p class="text-gray-600 mt-2">We sent a code to {{ session.login_email }}</p>
-               
-            </div>
-            
-            <form method="POST" class="space-y-6">
-                <div>
-                    <label class="block text-sm font-medium text-gray-700 mb-2">Login Code</label>
-                    <input type="text" name="otp" required maxlength="6" 
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500 focus:border-transparent text-center text-2xl font-mono"
-                           placeholder="123456">
-                </div>
-                
-                <button type="submit" 
-                        class="w-full btn-primary text-white py-3 rounded-xl font-semibold">
-                    Sign In
-                </button>
-            </form>
-        </div>
-    </div>
-    {% endblock %}
-    ''')
+    return render_template('pages/verify_login_otp.html')
 
 @app.route('/create-profile', methods=['GET', 'POST'])
 def create_profile():
@@ -543,13 +677,12 @@ def create_profile():
         looking_for = request.form['looking_for']
         bio = request.form['bio']
         
-        # Handle file upload - convert to base64 and store in database
+        # Handle file upload - store the image and keep its hash on the profile
         profile_photo = None
         if 'profile_photo' in request.files:
             file = request.files['profile_photo']
-            if file and allowed_file(file.filename):
-                # Convert image to base64
-                profile_photo = image_to_base64(file)
+            if file and file.filename:
+                profile_photo = store_profile_photo(file, session['user_id'], None)
                 if not profile_photo:
                     flash('Error processing image. Please try again.', 'error')
                     return redirect(url_for('create_profile'))
@@ -565,6 +698,8 @@ def create_profile():
             'bio': bio,
             'profile_photo': profile_photo
         }).eq('id', session['user_id']).execute()
+        if profile_photo:
+            settle_profile_photo(session['user_id'], profile_photo, None)
         
         # Handle prompts
         prompts = [
@@ -581,98 +716,11 @@ def create_profile():
                     'prompt_answer': answer
                 }).execute()
         
+        refresh_discovery_indexes(session['user_id'], request.form)
         flash('Profile created successfully! Time to start discovering! 🎉', 'success')
         return redirect(url_for('dashboard'))
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="bg-gray-50 min-h-screen py-8">
-        <div class="max-w-md mx-auto px-4">
-            <div class="text-center mb-8 slide-up">
-                <h1 class="text-2xl font-bold text-gray-800">Create Your Profile</h1>
-                <p class="text-gray-600 mt-2">Let others get to know the real you</p>
-            </div>
-            
-            <form method="POST" enctype="multipart/form-data" class="space-y-6">
-                <div class="bg-white rounded-xl p-6 shadow-sm slide-up">
-                    <h3 class="font-semibold text-gray-800 mb-4">Profile Photo</h3>
-                    <input type="file" name="profile_photo" accept="image/*" 
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl">
-                </div>
-                
-                <div class="bg-white rounded-xl p-6 shadow-sm space-y-4 slide-up">
-                    <h3 class="font-semibold text-gray-800 mb-4">Basic Info</h3>
-                    
-                    <input type="text" name="name" required placeholder="Your Name"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                    
-                    <div class="grid grid-cols-2 gap-4">
-                        <input type="number" name="age" required min="18" max="100" placeholder="Age"
-                               class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                        
-                        <select name="pronouns" required 
-                                class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                            <option value="">Pronouns</option>
-                            <option value="she/her">she/her</option>
-                            <option value="he/him">he/him</option>
-                            <option value="they/them">they/them</option>
-                            <option value="other">other</option>
-                        </select>
-                    </div>
-                    
-                    <input type="text" name="department" required placeholder="Department (e.g., Computer Science)"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                    
-                    <select name="year" required 
-                            class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                        <option value="">Year</option>
-                        <option value="Freshman">Freshman</option>
-                        <option value="Sophomore">Sophomore</option>
-                        <option value="Junior">Junior</option>
-                        <option value="Senior">Senior</option>
-                        <option value="Graduate">Graduate</option>
-                        <option value="PhD">PhD</option>
-                    </select>
-                    
-                    <select name="looking_for" required 
-                            class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                        <option value="">Looking for</option>
-                        <option value="friendship">Friendship</option>
-                        <option value="dating">Dating</option>
-                        <option value="relationship">Relationship</option>
-                        <option value="networking">Networking</option>
-                    </select>
-                </div>
-                
-                <div class="bg-white rounded-xl p-6 shadow-sm slide-up">
-                    <h3 class="font-semibold text-gray-800 mb-4">About You</h3>
-                    <textarea name="bio" rows="4" placeholder="Tell people about yourself..."
-                              class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500"></textarea>
-                </div>
-                
-                <div class="bg-white rounded-xl p-6 shadow-sm space-y-4 slide-up">
-                    <h3 class="font-semibold text-gray-800 mb-4">Fun Prompts</h3>
-                    
-                    <input type="text" name="prompt1" placeholder="What makes you laugh?"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                    
-                    <input type="text" name="prompt2" placeholder="My ideal study buddy is..."
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                    
-                    <input type="text" name="prompt3" placeholder="Best campus spot?"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                </div>
-                
-                <button type="submit" 
-                        class="w-full btn-primary text-white py-4 rounded-xl font-semibold shadow-lg slide-up">
-                    Create Profile
-                </button>
-            </form>
-        </div>
-    </div>
-    {% endblock %}
-    ''')
+    return render_template('pages/create_profile.html')
 
 @app.route('/dashboard')
 def dashboard():
@@ -686,7 +734,7 @@ def dashboard():
     
     try:
         # Get user data
-        user_result = supabase.table('users').select('*').eq('id', session['user_id']).execute()
+        user_result = supabase.table('users').select(USER_SELF_COLUMNS).eq('id', session['user_id']).execute()
         if not user_result.data:
             return redirect(url_for('login'))
     except Exception as e:
@@ -699,40 +747,97 @@ def dashboard():
         return redirect(url_for('create_profile'))
     
     try:
-        # Get potential matches - users who haven't been liked by current user
-        # and aren't already matched
+        # Potential matches come precomputed from the user's discovery queue
         user_id = session['user_id']
-        
-        # Get users the current user has already liked
-        liked_users_result = supabase.table('likes').select('liked_id').eq('liker_id', user_id).execute()
-        liked_user_ids = [like['liked_id'] for like in liked_users_result.data]
-        
-        # Get users who have already matched with current user
-        matches_result = supabase.table('matches').select('user1_id, user2_id').or_(f'user1_id.eq.{user_id},user2_id.eq.{user_id}').execute()
-        matched_user_ids = []
-        for match in matches_result.data:
-            if match['user1_id'] == user_id:
-                matched_user_ids.append(match['user2_id'])
-            else:
-                matched_user_ids.append(match['user1_id'])
-        
-        # Get potential matches
-        excluded_ids = [user_id] + liked_user_ids + matched_user_ids
-        potential_matches_result = supabase.table('users').select('*').neq('id', user_id).not_.in_('id', excluded_ids).not_.is_('name', 'null').limit(10).execute()
-        
-        # Get prompts for each potential match
-        potential_matches = []
-        for match in potential_matches_result.data:
-            prompts_result = supabase.table('user_prompts').select('prompt_question, prompt_answer').eq('user_id', match['id']).execute()
-            prompts_text = ' | '.join([f"{p['prompt_question']}: {p['prompt_answer']}" for p in prompts_result.data])
-            match['prompts'] = prompts_text
-            potential_matches.append(match)
+        potential_matches = discovery_cards(user_id, discovery.peek(user_id, DASHBOARD_CARDS))
         
         return render_template('dashboard.html', user=user, potential_matches=potential_matches)
     except Exception as e:
         flash(f'Error loading dashboard: {str(e)}', 'error')
         return render_template('dashboard.html', user=user, potential_matches=[])
 
+def discovery_cards(user_id, candidate_ids):
+    """Card data (USER_CARD_COLUMNS plus prompts) for queued candidates, in queue order"""
+    users_by_id = get_users_by_ids(supabase, candidate_ids, USER_CARD_COLUMNS)
+    
+    # Get prompts for all the candidates in one query
+    prompts_by_user = get_prompts_by_user_ids(supabase, list(users_by_id))
+    cards = []
+    for candidate_id in candidate_ids:
+        card = users_by_id.get(candidate_id)
+        if not card:
+            # Deleted since it was queued
+            discovery.mark_seen(user_id, candidate_id)
+            continue
+        card['prompts'] = [{'question': p['prompt_question'], 'answer': p['prompt_answer']}
+                           for p in prompts_by_user[candidate_id] if p['prompt_answer']]
+        cards.append(card)
+    return cards
+
+# The dashboard deck fetches more cards here before it runs out
+DISCOVER_PAGE_LIMIT = 20
+
+@app.route('/api/discover')
+def api_discover():
+    """The next discovery cards as JSON: ?cursor=<id of the last card the client has>&limit=<count>"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    if not supabase:
+        return jsonify({'error': 'Database not configured'}), 503
+    
+    user_id = session['user_id']
+    limit = min(max(request.args.get('limit', DASHBOARD_CARDS, type=int), 1), DISCOVER_PAGE_LIMIT)
+    cursor = request.args.get('cursor') or None
+    candidate_ids = discovery.peek(user_id, limit, after=cursor)
+    cards = [{
+        'id': card['id'],
+        'name': card['name'],
+        'age': card['age'],
+        'department': card['department'],
+        'year': card['year'],
+        'bio': card['bio'],
+        'photo': photo_url(card['profile_photo'], 'card') if card['profile_photo'] else None,
+        'prompts': card['prompts'],
+    } for card in discovery_cards(user_id, candidate_ids)]
+    
+    # With nothing new, the same cursor asks again later
+    return jsonify({'cards': cards, 'next_cursor': candidate_ids[-1] if candidate_ids else cursor})
+
+def record_like(current_user_id, user_id):
+    """Like a profile, creating the match if the like is mutual.
+
+    One call to the record_like() database function does the like, match and
+    notifications in a single transaction.
+    Returns {'status': 'liked' | 'matched' | 'already_liked', 'name': the other user's name}.
+    """
+    # Always ask the database: this worker's like graph can miss an unmatch
+    # served by another worker, and a repeat like costs one cheap call anyway
+    outcome = supabase.rpc('record_like', {'p_liker': current_user_id, 'p_liked': user_id}).execute().data
+    # Only once the like is stored, so a failed call leaves the card in the deck
+    discovery.mark_seen(current_user_id, user_id)
+    like_graph.add(current_user_id, user_id)
+    if outcome['status'] == 'matched':
+        chat_permissions.invalidate(current_user_id, user_id)
+        discovery.mark_seen(user_id, current_user_id)
+    return outcome
+
+def record_passes(current_user_id, user_ids):
+    """Pass on profiles, in one insert unless some were already passed"""
+    if not user_ids:
+        return
+    rows = [{'passer_id': current_user_id, 'passed_id': user_id} for user_id in user_ids]
+    try:
+        supabase.table('passes').insert(rows).execute()
+    except Exception:
+        # One of them was already passed; insert the rest one at a time
+        for row in rows:
+            try:
+                supabase.table('passes').insert(row).execute()
+            except Exception:
+                pass
+    for user_id in user_ids:
+        discovery.mark_seen(current_user_id, user_id)
+
 @app.route('/like/<user_id>')
 def like_user(user_id):
     if 'user_id' not in session:
@@ -750,78 +855,13 @@ def like_user(user_id):
         return redirect(url_for('dashboard'))
     
     try:
-        # Check if already liked
-        existing_like = supabase.table('likes').select('*').eq('liker_id', current_user_id).eq('liked_id', user_id).execute()
-        
-        if existing_like.data:
+        outcome = record_like(current_user_id, user_id)
+        if outcome['status'] == 'already_liked':
             flash('You already liked this person!', 'info')
-            return redirect(url_for('dashboard'))
-        
-        # Add the like
-        supabase.table('likes').insert({
-            'liker_id': current_user_id,
-            'liked_id': user_id
-        }).execute()
-        
-        # Check if it's a mutual like (match)
-        mutual_like = supabase.table('likes').select('*').eq('liker_id', user_id).eq('liked_id', current_user_id).execute()
-        
-        if mutual_like.data:
-            # It's a match! Create match record
-            user1_id = min(current_user_id, user_id)
-            user2_id = max(current_user_id, user_id)
-            
-            supabase.table('matches').insert({
-                'user1_id': user1_id,
-                'user2_id': user2_id
-            }).execute()
-            
-            # Get user names
-            current_user_result = supabase.table('users').select('name').eq('id', current_user_id).execute()
-            other_user_result = supabase.table('users').select('name').eq('id', user_id).execute()
-            
-            current_user_name = current_user_result.data[0]['name'] if current_user_result.data else 'Someone'
-            other_user_name = other_user_result.data[0]['name'] if other_user_result.data else 'Someone'
-            
-            # Delete all existing notifications between these users
-            supabase.table('notifications').delete().or_(f'user_id.eq.{current_user_id},from_user_id.eq.{user_id}').execute()
-            supabase.table('notifications').delete().or_(f'user_id.eq.{user_id},from_user_id.eq.{current_user_id}').execute()
-            
-            # Create match notifications
-            supabase.table('notifications').insert([
-                {
-                    'user_id': current_user_id,
-                    'from_user_id': user_id,
-                    'type': 'match',
-                    'message': f'It\'s a match with {other_user_name}! 💕'
-                },
-                {
-                    'user_id': user_id,
-                    'from_user_id': current_user_id,
-                    'type': 'match',
-                    'message': f'It\'s a match with {current_user_name}! 💕'
-                }
-            ]).execute()
-            
-            flash(f'It\'s a match with {other_user_name}! 💕', 'success')
+        elif outcome['status'] == 'matched':
+            flash(f'It\'s a match with {outcome["name"]}! 💕', 'success')
         else:
-            # Just a like, create notification
-            current_user_result = supabase.table('users').select('name').eq('id', current_user_id).execute()
-            current_user_name = current_user_result.data[0]['name'] if current_user_result.data else 'Someone'
-            
-            # Delete any existing like notifications from this user to avoid duplicates
-            supabase.table('notifications').delete().eq('user_id', user_id).eq('from_user_id', current_user_id).eq('type', 'like').execute()
-            
-            # Create like notification
-            supabase.table('notifications').insert({
-                'user_id': user_id,
-                'from_user_id': current_user_id,
-                'type': 'like',
-                'message': f'{current_user_name} liked your profile! 💖'
-            }).execute()
-            
             flash('Profile liked! 💖', 'success')
-        
     except Exception as e:
         flash('Error processing like', 'error')
     
@@ -832,8 +872,59 @@ def pass_user(user_id):
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
+    current_user_id = session['user_id']
+    if supabase and current_user_id != user_id:
+        record_passes(current_user_id, [user_id])
+    
     return redirect(url_for('dashboard'))
 
+# The dashboard deck sends swipes here in batches instead of loading
+# /like/<id> and /pass/<id>, which redirect to (and re-render) the dashboard.
+SWIPE_ACTIONS = {'like': 'like', 'super_like': 'like', 'pass': 'pass'}
+SWIPE_BATCH_LIMIT = 50
+
+@app.route('/api/swipes', methods=['POST'])
+def api_swipes():
+    """Apply a batch of swipes: {"swipes": [{"user_id": ..., "action": "like" | "super_like" | "pass"}]}"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    if not supabase:
+        return jsonify({'error': 'Database not configured'}), 503
+    
+    payload = request.get_json(silent=True) or {}
+    swipes = payload.get('swipes')
+    if not isinstance(swipes, list) or len(swipes) > SWIPE_BATCH_LIMIT:
+        return jsonify({'error': f'Expected a list of at most {SWIPE_BATCH_LIMIT} swipes'}), 400
+    
+    current_user_id = session['user_id']
+    actions = {}
+    for swipe in swipes:
+        if not isinstance(swipe, dict) or not isinstance(swipe.get('user_id'), str) or swipe.get('action') not in SWIPE_ACTIONS:
+            return jsonify({'error': 'Each swipe needs a user_id and an action'}), 400
+        if swipe['user_id'] != current_user_id:
+            # The last swipe on a profile wins
+            actions[swipe['user_id']] = SWIPE_ACTIONS[swipe['action']]
+    
+    results = {}
+    matches = []
+    passed = [user_id for user_id, action in actions.items() if action == 'pass']
+    record_passes(current_user_id, passed)
+    for user_id in passed:
+        results[user_id] = 'passed'
+    for user_id, action in actions.items():
+        if action != 'like':
+            continue
+        try:
+            outcome = record_like(current_user_id, user_id)
+        except Exception as e:
+            print(f"Error recording like from {current_user_id} to {user_id}: {e}")
+            outcome = {'status': 'error'}
+        results[user_id] = outcome['status']
+        if outcome['status'] == 'matched':
+            matches.append({'id': user_id, 'name': outcome['name']})
+    
+    return jsonify({'results': results, 'matches': matches})
+
 @app.route('/matches')
 def matches():
     if 'user_id' not in session:
@@ -850,17 +941,19 @@ def matches():
         # Get matches for the current user
         matches_result = supabase.table('matches').select('*').or_(f'user1_id.eq.{user_id},user2_id.eq.{user_id}').execute()
         
+        # Get all matched users' details in one query
+        users_by_id = get_users_by_ids(supabase, [match_partner_id(match, user_id) for match in matches_result.data])
+        
         user_matches = []
         for match in matches_result.data:
             # Determine the other user's ID
-            other_user_id = match['user2_id'] if match['user1_id'] == user_id else match['user1_id']
+            partner_id = match_partner_id(match, user_id)
             
-            # Get the other user's details
-            user_result = supabase.table('users').select('*').eq('id', other_user_id).execute()
-            if user_result.data:
-                user_data = user_result.data[0]
+            user_data = users_by_id.get(partner_id)
+            if user_data:
+                user_data = dict(user_data)
                 user_data['matched_at'] = match['matched_at']
-                user_data['match_id'] = other_user_id
+                user_data['match_id'] = partner_id
                 user_matches.append(user_data)
         
         # Sort by matched_at descending
@@ -868,218 +961,7 @@ def matches():
     except Exception as e:
         flash(f'Error loading matches: {str(e)}', 'error')
         user_matches = []
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="bg-gray-50 min-h-screen py-4">
-        <div class="max-w-md mx-auto px-4">
-            <div class="text-center mb-6 slide-up">
-                <h1 class="text-2xl font-bold text-gray-800">Your Matches</h1>
-                <p class="text-gray-600">{{ matches|length }} connection{{ 's' if matches|length != 1 else '' }}</p>
-            </div>
-            
-            {% if matches %}
-                <div class="space-y-4">
-                    {% for match in matches %}
-                    <div class="bg-white rounded-xl p-4 shadow-sm hover:shadow-md transition-all duration-300 slide-up">
-                        <div class="flex items-center space-x-4">
-                            <div class="w-16 h-16 bg-gradient-to-br from-pink-200 to-red-200 rounded-full flex items-center justify-center flex-shrink-0">
-                                {% if match.profile_photo %}
-                                    {% if match.profile_photo.startswith('data:image') %}
-                                        <img src="{{ match.profile_photo }}" 
-                                             alt="{{ match.name }}" class="w-16 h-16 object-cover rounded-full">
-                                    {% else %}
-                                        <img src="{{ url_for('static', filename='uploads/' + match.profile_photo) }}" 
-                                             alt="{{ match.name }}" class="w-16 h-16 object-cover rounded-full">
-                                    {% endif %}
-                                {% else %}
-                                    <i class="fas fa-user text-xl text-gray-400"></i>
-                                {% endif %}
-                            </div>
-                            
-                            <div class="flex-1 min-w-0">
-                                <h3 class="font-semibold text-gray-800 truncate">{{ match.name }}</h3>
-                                <p class="text-sm text-gray-600">{{ match.department }}</p>
-                                <p class="text-xs text-gray-500">Matched {{ match.matched_at[:10] }}</p>
-                            </div>
-                            
-                            <div class="flex space-x-2">
-                                <a href="{{ url_for('chat', user_id=match.match_id) }}" class="btn-primary text-white px-4 py-2 rounded-lg text-sm">
-                                    Chat
-                                </a>
-                                <button onclick="removeConnection('{{ match.match_id }}', '{{ match.name }}')" 
-                                        class="bg-red-500 hover:bg-red-600 text-white px-3 py-2 rounded-lg text-sm transition-colors">
-                                    <i class="fas fa-times"></i>
-                                </button>
-                            </div>
-                        </div>
-                    </div>
-                    {% endfor %}
-                </div>
-            {% else %}
-                <div class="text-center py-16 slide-up">
-                    <div class="w-20 h-20 bg-pink-200 rounded-full flex items-center justify-center mx-auto mb-4">
-                        <i class="fas fa-heart text-3xl text-red-500 heartbeat"></i>
-                    </div>
-                    <h3 class="text-xl font-bold text-gray-800 mb-2">No matches yet</h3>
-                    <p class="text-gray-600 mb-6">Keep swiping to find your connections!</p>
-                    <a href="{{ url_for('dashboard') }}" 
-                       class="inline-block btn-primary text-white px-6 py-3 rounded-xl font-semibold">
-                        Start Discovering
-                    </a>
-                </div>
-            {% endif %}
-        </div>
-    </div>
-    
-    <script>
-    function removeConnection(userId, userName) {
-        // Create custom modal
-        const modal = document.createElement('div');
-        modal.className = 'fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50';
-        modal.innerHTML = `
-            <div class="bg-white rounded-2xl p-6 mx-4 max-w-sm w-full transform transition-all duration-300 scale-95 opacity-0">
-                <div class="text-center">
-                    <div class="w-16 h-16 bg-red-100 rounded-full flex items-center justify-center mx-auto mb-4">
-                        <i class="fas fa-exclamation-triangle text-2xl text-red-500"></i>
-                    </div>
-                    <h3 class="text-lg font-bold text-gray-800 mb-2">Remove Connection</h3>
-                    <p class="text-gray-600 mb-6">Are you sure you want to remove <span class="font-semibold text-pink-600">${userName}</span> from your connections? This action cannot be undone.</p>
-                    
-                    <div class="flex space-x-3">
-                        <button onclick="closeModal()" class="flex-1 bg-gray-200 hover:bg-gray-300 text-gray-800 px-4 py-3 rounded-xl font-semibold transition-colors">
-                            Cancel
-                        </button>
-                        <button onclick="confirmRemove('${userId}', '${userName}')" class="flex-1 bg-red-500 hover:bg-red-600 text-white px-4 py-3 rounded-xl font-semibold transition-colors">
-                            Remove
-                        </button>
-                    </div>
-                </div>
-            </div>
-        `;
-        
-        document.body.appendChild(modal);
-        
-        // Animate in
-        setTimeout(() => {
-            const dialog = modal.querySelector('.bg-white');
-            dialog.classList.remove('scale-95', 'opacity-0');
-            dialog.classList.add('scale-100', 'opacity-100');
-        }, 10);
-        
-        // Close on backdrop click
-        modal.addEventListener('click', (e) => {
-            if (e.target === modal) {
-                closeModal();
-            }
-        });
-        
-        // Close on escape key
-        document.addEventListener('keydown', function escapeHandler(e) {
-            if (e.key === 'Escape') {
-                closeModal();
-                document.removeEventListener('keydown', escapeHandler);
-            }
-        });
-    }
-    
-    function closeModal() {
-        const modal = document.querySelector('.fixed.inset-0.bg-black.bg-opacity-50');
-        if (modal) {
-            const dialog = modal.querySelector('.bg-white');
-            dialog.classList.add('scale-95', 'opacity-0');
-            setTimeout(() => {
-                modal.remove();
-            }, 300);
-        }
-    }
-    
-    function confirmRemove(userId, userName) {
-        closeModal();
-        
-        fetch(`/unmatch/${userId}`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            }
-        })
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                // Remove the match card from the UI
-                const matchCard = document.querySelector(`[onclick*="${userId}"]`).closest('.bg-white');
-                matchCard.style.transform = 'translateX(-100%)';
-                matchCard.style.opacity = '0';
-                setTimeout(() => {
-                    matchCard.remove();
-                    // Update the connection count
-                    const countElement = document.querySelector('.text-gray-600');
-                    const currentCount = parseInt(countElement.textContent.split(' ')[0]);
-                    const newCount = currentCount - 1;
-                    countElement.textContent = `${newCount} connection${newCount !== 1 ? 's' : ''}`;
-                    
-                    // Show empty state if no more matches
-                    if (newCount === 0) {
-                        location.reload();
-                    }
-                }, 300);
-                
-                // Show success message
-                showSuccessMessage('Connection removed successfully');
-            } else {
-                showErrorMessage(data.error || 'Failed to remove connection');
-            }
-        })
-        .catch(error => {
-            console.error('Error:', error);
-            showErrorMessage('Network error. Please try again.');
-        });
-    }
-    
-    function showSuccessMessage(message) {
-        const toast = document.createElement('div');
-        toast.className = 'fixed top-24 right-4 z-50 bg-green-500 text-white px-6 py-3 rounded-xl shadow-lg transform translate-x-full transition-transform duration-300';
-        toast.innerHTML = `
-            <div class="flex items-center space-x-2">
-                <i class="fas fa-check-circle"></i>
-                <span>${message}</span>
-            </div>
-        `;
-        document.body.appendChild(toast);
-        
-        setTimeout(() => {
-            toast.classList.remove('translate-x-full');
-        }, 100);
-        
-        setTimeout(() => {
-            toast.classList.add('translate-x-full');
-            setTimeout(() => toast.remove(), 300);
-        }, 3000);
-    }
-    
-    function showErrorMessage(message) {
-        const toast = document.createElement('div');
-        toast.className = 'fixed top-24 right-4 z-50 bg-red-500 text-white px-6 py-3 rounded-xl shadow-lg transform translate-x-full transition-transform duration-300';
-        toast.innerHTML = `
-            <div class="flex items-center space-x-2">
-                <i class="fas fa-exclamation-circle"></i>
-                <span>${message}</span>
-            </div>
-        `;
-        document.body.appendChild(toast);
-        
-        setTimeout(() => {
-            toast.classList.remove('translate-x-full');
-        }, 100);
-        
-        setTimeout(() => {
-            toast.classList.add('translate-x-full');
-            setTimeout(() => toast.remove(), 300);
-        }, 3000);
-    }
-    </script>
-    {% endblock %}
-    ''', matches=user_matches)
+    return render_template('pages/matches.html', matches=user_matches)
 
 @app.route('/unmatch/<user_id>', methods=['POST'])
 def unmatch_user(user_id):
@@ -1106,11 +988,14 @@ def unmatch_user(user_id):
         # Also delete any chat requests between these users
         supabase.table('chat_requests').delete().or_(f'requester_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').or_(f'requester_id.eq.{user_id},receiver_id.eq.{user_id}').execute()
         
-        # Delete all messages between these users
+        # Delete all messages between these users and their conversation summary
         supabase.table('messages').delete().or_(f'sender_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').or_(f'sender_id.eq.{user_id},receiver_id.eq.{user_id}').execute()
+        delete_conversation(current_user_id, user_id)
+        chat_permissions.invalidate(current_user_id, user_id)
         
         # Delete likes between these users
         supabase.table('likes').delete().or_(f'liker_id.eq.{current_user_id},liked_id.eq.{current_user_id}').or_(f'liker_id.eq.{user_id},liked_id.eq.{user_id}').execute()
+        like_graph.remove_pair(current_user_id, user_id)
         
         return jsonify({
             'success': True,
@@ -1126,7 +1011,7 @@ def profile():
         return redirect(url_for('login'))
     
     # Get user data
-    user_result = supabase.table('users').select('*').eq('id', session['user_id']).execute()
+    user_result = supabase.table('users').select(USER_SELF_COLUMNS).eq('id', session['user_id']).execute()
     if not user_result.data:
         return redirect(url_for('login'))
     
@@ -1136,75 +1021,7 @@ def profile():
     prompts_result = supabase.table('user_prompts').select('*').eq('user_id', session['user_id']).execute()
     prompts = prompts_result.data
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="bg-gray-50 min-h-screen py-4">
-        <div class="max-w-md mx-auto px-4">
-            <div class="flex justify-between items-center mb-6 slide-up">
-                <h1 class="text-2xl font-bold text-gray-800">Your Profile</h1>
-                <a href="{{ url_for('logout') }}" class="text-red-500 hover:text-red-600">
-                    <i class="fas fa-sign-out-alt text-xl"></i>
-                </a>
-            </div>
-            
-            <div class="bg-white rounded-2xl shadow-lg overflow-hidden mb-6 slide-up">
-                <div class="h-64 bg-gradient-to-br from-pink-200 to-red-200 flex items-center justify-center">
-                    {% if user.profile_photo %}
-                        {% if user.profile_photo.startswith('data:image') %}
-                            <img src="{{ user.profile_photo }}" 
-                                 alt="{{ user.name }}" class="w-full h-full object-cover">
-                        {% else %}
-                            <img src="{{ url_for('static', filename='uploads/' + user.profile_photo) }}" 
-                                 alt="{{ user.name }}" class="w-full h-full object-cover">
-                        {% endif %}
-                    {% else %}
-                        <i class="fas fa-user text-6xl text-gray-400"></i>
-                    {% endif %}
-                </div>
-                
-                <div class="p-6">
-                    <div class="mb-4">
-                        <h3 class="text-xl font-bold text-gray-800">{{ user.name }}, {{ user.age }}</h3>
-                        <p class="text-gray-600">{{ user.department }} • {{ user.year }}</p>
-                        <p class="text-sm text-red-500 font-medium">{{ user.looking_for|title }}</p>
-                    </div>
-                    
-                    {% if user.bio %}
-                    <div class="mb-4">
-                        <h4 class="font-semibold text-gray-800 mb-2">About Me</h4>
-                        <p class="text-gray-700">{{ user.bio }}</p>
-                    </div>
-                    {% endif %}
-                    
-                    {% if prompts %}
-                    <div class="mb-4">
-                        <h4 class="font-semibold text-gray-800 mb-3">My Prompts</h4>
-                        <div class="space-y-2">
-                            {% for prompt in prompts %}
-                            <div class="bg-gray-50 rounded-lg p-3">
-                                <p class="text-sm font-medium text-gray-600">{{ prompt.prompt_question }}</p>
-                                <p class="text-gray-800">{{ prompt.prompt_answer }}</p>
-                            </div>
-                            {% endfor %}
-                        </div>
-                    </div>
-                    {% endif %}
-                </div>
-            </div>
-            
-            <div class="space-y-3 slide-up">
-                <a href="/edit-profile" class="block w-full btn-primary text-white py-3 rounded-xl font-semibold text-center">
-                    Edit Profile
-                </a>
-                <a href="{{ url_for('dashboard') }}" class="block w-full bg-gray-200 text-gray-700 text-center py-3 rounded-xl font-semibold hover:bg-gray-300 transition-colors">
-                    Back to Discover
-                </a>
-            </div>
-        </div>
-    </div>
-    {% endblock %}
-    ''', user=user, prompts=prompts)
+    return render_template('pages/profile.html', user=user, prompts=prompts)
 
 @app.route('/edit-profile', methods=['GET', 'POST'])
 def edit_profile():
@@ -1212,7 +1029,7 @@ def edit_profile():
         return redirect(url_for('login'))
     
     # Get user data
-    user_result = supabase.table('users').select('*').eq('id', session['user_id']).execute()
+    user_result = supabase.table('users').select(USER_SELF_COLUMNS).eq('id', session['user_id']).execute()
     if not user_result.data:
         return redirect(url_for('login'))
     
@@ -1227,13 +1044,12 @@ def edit_profile():
         looking_for = request.form['looking_for']
         bio = request.form['bio']
         
-        # Handle file upload - convert to base64 and store in database
+        # Handle file upload - store the image and keep its hash on the profile
         profile_photo = user.get('profile_photo')  # Keep existing photo if no new one uploaded
         if 'profile_photo' in request.files:
             file = request.files['profile_photo']
-            if file and allowed_file(file.filename):
-                # Convert image to base64
-                profile_photo = image_to_base64(file)
+            if file and file.filename:
+                profile_photo = store_profile_photo(file, session['user_id'], user.get('profile_photo'))
                 if not profile_photo:
                     flash('Error processing image. Please try again.', 'error')
                     return redirect(url_for('edit_profile'))
@@ -1249,6 +1065,8 @@ def edit_profile():
             'bio': bio,
             'profile_photo': profile_photo
         }).eq('id', session['user_id']).execute()
+        if profile_photo:
+            settle_profile_photo(session['user_id'], profile_photo, user.get('profile_photo'))
         
         # Handle prompts
         prompts = [
@@ -1269,6 +1087,7 @@ def edit_profile():
                     'prompt_answer': answer
                 }).execute()
         
+        refresh_discovery_indexes(session['user_id'], request.form)
         flash('Profile updated successfully! 🎉', 'success')
         return redirect(url_for('profile'))
     
@@ -1276,103 +1095,7 @@ def edit_profile():
     prompts_result = supabase.table('user_prompts').select('*').eq('user_id', session['user_id']).execute()
     prompts = {p['prompt_question']: p['prompt_answer'] for p in prompts_result.data}
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="bg-gray-50 min-h-screen py-8">
-        <div class="max-w-md mx-auto px-4">
-            <div class="text-center mb-8 slide-up">
-                <h1 class="text-2xl font-bold text-gray-800">Edit Your Profile</h1>
-                <p class="text-gray-600 mt-2">Update your information</p>
-            </div>
-            
-            <form method="POST" enctype="multipart/form-data" class="space-y-6">
-                <div class="bg-white rounded-xl p-6 shadow-sm slide-up">
-                    <h3 class="font-semibold text-gray-800 mb-4">Profile Photo</h3>
-                    <input type="file" name="profile_photo" accept="image/*" 
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl">
-                    {% if user.profile_photo %}
-                    <p class="text-xs text-gray-500 mt-2">Current photo will be kept if no new photo is selected</p>
-                    {% endif %}
-                </div>
-                
-                <div class="bg-white rounded-xl p-6 shadow-sm space-y-4 slide-up">
-                    <h3 class="font-semibold text-gray-800 mb-4">Basic Info</h3>
-                    
-                    <input type="text" name="name" required placeholder="Your Name" value="{{ user.name or '' }}"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                    
-                    <div class="grid grid-cols-2 gap-4">
-                        <input type="number" name="age" required min="18" max="100" placeholder="Age" value="{{ user.age or '' }}"
-                               class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                        
-                        <select name="pronouns" required 
-                                class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                            <option value="">Pronouns</option>
-                            <option value="she/her" {% if user.pronouns == 'she/her' %}selected{% endif %}>she/her</option>
-                            <option value="he/him" {% if user.pronouns == 'he/him' %}selected{% endif %}>he/him</option>
-                            <option value="they/them" {% if user.pronouns == 'they/them' %}selected{% endif %}>they/them</option>
-                            <option value="other" {% if user.pronouns == 'other' %}selected{% endif %}>other</option>
-                        </select>
-                    </div>
-                    
-                    <input type="text" name="department" required placeholder="Department (e.g., Computer Science)" value="{{ user.department or '' }}"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                    
-                    <select name="year" required 
-                            class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                        <option value="">Year</option>
-                        <option value="Freshman" {% if user.year == 'Freshman' %}selected{% endif %}>Freshman</option>
-                        <option value="Sophomore" {% if user.year == 'Sophomore' %}selected{% endif %}>Sophomore</option>
-                        <option value="Junior" {% if user.year == 'Junior' %}selected{% endif %}>Junior</option>
-                        <option value="Senior" {% if user.year == 'Senior' %}selected{% endif %}>Senior</option>
-                        <option value="Graduate" {% if user.year == 'Graduate' %}selected{% endif %}>Graduate</option>
-                        <option value="PhD" {% if user.year == 'PhD' %}selected{% endif %}>PhD</option>
-                    </select>
-                    
-                    <select name="looking_for" required 
-                            class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                        <option value="">Looking for</option>
-                        <option value="friendship" {% if user.looking_for == 'friendship' %}selected{% endif %}>Friendship</option>
-                        <option value="dating" {% if user.looking_for == 'dating' %}selected{% endif %}>Dating</option>
-                        <option value="relationship" {% if user.looking_for == 'relationship' %}selected{% endif %}>Relationship</option>
-                        <option value="networking" {% if user.looking_for == 'networking' %}selected{% endif %}>Networking</option>
-                    </select>
-                </div>
-                
-                <div class="bg-white rounded-xl p-6 shadow-sm slide-up">
-                    <h3 class="font-semibold text-gray-800 mb-4">About You</h3>
-                    <textarea name="bio" rows="4" placeholder="Tell people about yourself..."
-                              class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500"></textarea>
-                </div>
-                
-                <div class="bg-white rounded-xl p-6 shadow-sm space-y-4 slide-up">
-                    <h3 class="font-semibold text-gray-800 mb-4">Fun Prompts</h3>
-                    
-                    <input type="text" name="prompt1" placeholder="What makes you laugh?" value="{{ prompts.get('What makes you laugh?', '') }}"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                    
-                    <input type="text" name="prompt2" placeholder="My ideal study buddy is..." value="{{ prompts.get('My ideal study buddy is...', '') }}"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                    
-                    <input type="text" name="prompt3" placeholder="Best campus spot?" value="{{ prompts.get('Best campus spot?', '') }}"
-                           class="w-full px-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-red-500">
-                </div>
-                
-                <div class="space-y-3 slide-up">
-                    <button type="submit" 
-                            class="w-full btn-primary text-white py-4 rounded-xl font-semibold shadow-lg">
-                        Update Profile
-                    </button>
-                    <a href="{{ url_for('profile') }}" class="block w-full bg-gray-200 text-gray-700 text-center py-3 rounded-xl font-semibold hover:bg-gray-300 transition-colors">
-                        Cancel
-                    </a>
-                </div>
-            </form>
-        </div>
-    </div>
-    {% endblock %}
-    ''', user=user, prompts=prompts)
+    return render_template('pages/edit_profile.html', user=user, prompts=prompts)
 
 @app.route('/notification-count')
 def notification_count():
@@ -1382,9 +1105,7 @@ def notification_count():
     user_id = session['user_id']
     
     # Get unread notification count
-    notifications_result = supabase.table('notifications').select('id').eq('user_id', user_id).eq('is_read', False).execute()
-    
-    count = len(notifications_result.data)
+    count = hot_queries.unread_notification_count(user_id)
     return jsonify({'count': count})
 
 @app.route('/logout')
@@ -1402,7 +1123,7 @@ def notifications():
     user_id = session['user_id']
     
     # Get pending chat requests
-    pending_requests_result = supabase.table('chat_requests').select('*, users!chat_requests_requester_id_fkey(*)').eq('receiver_id', user_id).eq('status', 'pending').order('created_at', desc=True).execute()
+    pending_requests_result = supabase.table('chat_requests').select(f'*, users!chat_requests_requester_id_fkey({USER_AVATAR_COLUMNS})').eq('receiver_id', user_id).eq('status', 'pending').order('created_at', desc=True).execute()
     
     # Process pending requests to get user data
     pending_requests = []
@@ -1419,7 +1140,7 @@ def notifications():
             pending_requests.append(request_data)
     
     # Get notifications
-    notifications_result = supabase.table('notifications').select('*, users!notifications_from_user_id_fkey(*)').eq('user_id', user_id).order('created_at', desc=True).limit(10).execute()
+    notifications_result = supabase.table('notifications').select(f'*, users!notifications_from_user_id_fkey({USER_AVATAR_COLUMNS})').eq('user_id', user_id).order('created_at', desc=True).limit(10).execute()
     
     # Mark notifications as read
     supabase.table('notifications').update({'is_read': True}).eq('user_id', user_id).eq('is_read', False).execute()
@@ -1444,15 +1165,16 @@ def notifications():
     # Get recent matches
     matches_result = supabase.table('matches').select('*').or_(f'user1_id.eq.{user_id},user2_id.eq.{user_id}').order('matched_at', desc=True).limit(5).execute()
     
+    users_by_id = get_users_by_ids(supabase, [match_partner_id(match, user_id) for match in matches_result.data])
+    
     recent_matches = []
     for match in matches_result.data:
-        other_user_id = match['user2_id'] if match['user1_id'] == user_id else match['user1_id']
-        user_result = supabase.table('users').select('*').eq('id', other_user_id).execute()
-        if user_result.data:
-            user_data = user_result.data[0]
+        partner_id = match_partner_id(match, user_id)
+        user_data = users_by_id.get(partner_id)
+        if user_data:
             match_data = {
                 'id': match['id'],
-                'other_user_id': other_user_id,
+                'other_user_id': partner_id,
                 'name': user_data['name'],
                 'profile_photo': user_data['profile_photo'],
                 'department': user_data['department'],
@@ -1460,343 +1182,10 @@ def notifications():
             }
             recent_matches.append(match_data)
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="bg-gray-50 min-h-screen py-4">
-        <div class="max-w-md mx-auto px-4">
-            <div class="text-center mb-6 slide-up">
-                <h1 class="text-2xl font-bold text-gray-800">Notifications</h1>
-                <p class="text-gray-600">{{ notifications|length }} new notifications</p>
-            </div>
-            
-            {% if notifications %}
-            <div class="space-y-4 mb-8">
-                <h2 class="font-semibold text-gray-800 mb-3">Recent Activity</h2>
-                {% for notification in notifications %}
-                <div class="bg-white rounded-xl p-4 shadow-sm hover:shadow-md transition-all duration-300 slide-up {% if not notification.is_read %}border-l-4 border-red-500{% endif %}" data-notification-id="{{ notification.id }}">
-                    <div class="flex items-center space-x-4">
-                        <div class="w-12 h-12 bg-gradient-to-br from-pink-200 to-red-200 rounded-full flex items-center justify-center flex-shrink-0">
-                            {% if notification.from_user_photo %}
-                                {% if notification.from_user_photo.startswith('data:image') %}
-                                    <img src="{{ notification.from_user_photo }}" 
-                                         alt="{{ notification.from_user_name }}" class="w-12 h-12 object-cover rounded-full">
-                                {% else %}
-                                    <img src="{{ url_for('static', filename='uploads/' + notification.from_user_photo) }}" 
-                                         alt="{{ notification.from_user_name }}" class="w-12 h-12 object-cover rounded-full">
-                                {% endif %}
-                            {% else %}
-                                <i class="fas fa-user text-xl text-gray-400"></i>
-                            {% endif %}
-                        </div>
-                        
-                        <div class="flex-1 min-w-0">
-                            <h3 class="font-semibold text-gray-800 truncate">{{ notification.from_user_name }}</h3>
-                            <p class="text-sm text-gray-600">{{ notification.message }}</p>
-                            <p class="text-xs text-gray-500">{{ notification.created_at[:10] }}</p>
-                        </div>
-                        
-                        {% if notification.type == 'match' %}
-                        <div class="flex space-x-2">
-                            <span class="bg-red-500 text-white px-2 py-1 rounded-full text-xs">
-                                Match! 💕
-                            </span>
-                            <button onclick="deleteNotification('{{ notification.id }}')" 
-                                    class="bg-gray-500 hover:bg-gray-600 text-white px-2 py-1 rounded text-xs transition-colors">
-                                <i class="fas fa-times"></i>
-                            </button>
-                        </div>
-                        {% elif notification.type == 'like' %}
-                        <div class="flex space-x-2">
-                            <span class="bg-pink-500 text-white px-2 py-1 rounded-full text-xs">
-                                Like 💖
-                            </span>
-                            <a href="{{ url_for('accept_like_and_chat', user_id=notification.from_user_id) }}" 
-                               class="bg-green-500 text-white px-3 py-1 rounded-lg text-xs hover:bg-green-600 transition-colors">
-                                Match
-                            </a>
-                            <button onclick="deleteNotification('{{ notification.id }}')" 
-                                    class="bg-red-500 hover:bg-red-600 text-white px-2 py-1 rounded text-xs transition-colors">
-                                <i class="fas fa-times"></i>
-                            </button>
-                        </div>
-                        {% elif notification.type == 'chat_request' %}
-                        <div class="flex space-x-2">
-                            <span class="bg-blue-500 text-white px-2 py-1 rounded-full text-xs">
-                                Chat Request 💬
-                            </span>
-                            <a href="{{ url_for('accept_chat_and_start_chat', user_id=notification.from_user_id) }}" 
-                               class="bg-green-500 text-white px-3 py-1 rounded-lg text-xs hover:bg-green-600 transition-colors">
-                                Accept
-                            </a>
-                            <button onclick="deleteNotification('{{ notification.id }}')" 
-                                    class="bg-red-500 hover:bg-red-600 text-white px-2 py-1 rounded text-xs transition-colors">
-                                <i class="fas fa-times"></i>
-                            </button>
-                        </div>
-                        {% elif notification.type == 'chat_accepted' %}
-                        <div class="flex space-x-2">
-                            <span class="bg-green-500 text-white px-2 py-1 rounded-full text-xs">
-                                Chat Accepted 💬
-                            </span>
-                            <a href="{{ url_for('chat', user_id=notification.from_user_id) }}" 
-                               class="bg-blue-500 text-white px-3 py-1 rounded-lg text-xs hover:bg-blue-600 transition-colors">
-                                Chat Now
-                            </a>
-                            <button onclick="deleteNotification('{{ notification.id }}')" 
-                                    class="bg-gray-500 hover:bg-gray-600 text-white px-2 py-1 rounded text-xs transition-colors">
-                                <i class="fas fa-times"></i>
-                            </button>
-                        </div>
-                        {% endif %}
-                    </div>
-                </div>
-                {% endfor %}
-            </div>
-            {% endif %}
-            
-            {% if pending_requests %}
-            <div class="space-y-4 mb-8">
-                <h2 class="font-semibold text-gray-800 mb-3">Chat Requests</h2>
-                {% for request in pending_requests %}
-                <div class="bg-white rounded-xl p-4 shadow-sm hover:shadow-md transition-all duration-300 slide-up">
-                    <div class="flex items-center space-x-4">
-                        <div class="w-12 h-12 bg-gradient-to-br from-pink-200 to-red-200 rounded-full flex items-center justify-center flex-shrink-0">
-                            {% if request.profile_photo %}
-                                {% if request.profile_photo.startswith('data:image') %}
-                                    <img src="{{ request.profile_photo }}" 
-                                         alt="{{ request.name }}" class="w-12 h-12 object-cover rounded-full">
-                                {% else %}
-                                    <img src="{{ url_for('static', filename='uploads/' + request.profile_photo) }}" 
-                                         alt="{{ request.name }}" class="w-12 h-12 object-cover rounded-full">
-                                {% endif %}
-                            {% else %}
-                                <i class="fas fa-user text-xl text-gray-400"></i>
-                            {% endif %}
-                        </div>
-                        
-                        <div class="flex-1 min-w-0">
-                            <h3 class="font-semibold text-gray-800 truncate">{{ request.name }}</h3>
-                            <p class="text-sm text-gray-600">{{ request.department }}</p>
-                            <p class="text-xs text-gray-500">{{ request.created_at[:10] }}</p>
-                        </div>
-                        
-                        <div class="flex space-x-2">
-                            <a href="{{ url_for('accept_chat_request', request_id=request.id) }}" 
-                               class="bg-green-500 text-white px-3 py-1 rounded-lg text-sm hover:bg-green-600 transition-colors">
-                                Accept
-                            </a>
-                            <a href="{{ url_for('reject_chat_request', request_id=request.id) }}" 
-                               class="bg-red-500 text-white px-3 py-1 rounded-lg text-sm hover:bg-red-600 transition-colors">
-                                Reject
-                            </a>
-                        </div>
-                    </div>
-                </div>
-                {% endfor %}
-            </div>
-            {% endif %}
-            
-            {% if recent_matches %}
-            <div class="space-y-4">
-                <h2 class="font-semibold text-gray-800 mb-3">Recent Matches</h2>
-                {% for match in recent_matches %}
-                <div class="bg-white rounded-xl p-4 shadow-sm hover:shadow-md transition-all duration-300 slide-up">
-                    <div class="flex items-center space-x-4">
-                        <div class="w-12 h-12 bg-gradient-to-br from-pink-200 to-red-200 rounded-full flex items-center justify-center flex-shrink-0">
-                            {% if match.profile_photo %}
-                                {% if match.profile_photo.startswith('data:image') %}
-                                    <img src="{{ match.profile_photo }}" 
-                                         alt="{{ match.name }}" class="w-12 h-12 object-cover rounded-full">
-                                {% else %}
-                                    <img src="{{ url_for('static', filename='uploads/' + match.profile_photo) }}" 
-                                         alt="{{ match.name }}" class="w-12 h-12 object-cover rounded-full">
-                                {% endif %}
-                            {% else %}
-                                <i class="fas fa-user text-xl text-gray-400"></i>
-                            {% endif %}
-                        </div>
-                        
-                        <div class="flex-1 min-w-0">
-                            <h3 class="font-semibold text-gray-800 truncate">{{ match.name }}</h3>
-                            <p class="text-sm text-gray-600">{{ match.department }}</p>
-                            <p class="text-xs text-gray-500">Matched {{ match.matched_at[:10] }}</p>
-                        </div>
-                        
-                        <a href="{{ url_for('chat', user_id=match.other_user_id) }}" 
-                           class="bg-blue-500 text-white px-3 py-1 rounded-lg text-sm hover:bg-blue-600 transition-colors">
-                            Chat
-                        </a>
-                    </div>
-                </div>
-                {% endfor %}
-            </div>
-            {% endif %}
-            
-            {% if not notifications and not pending_requests and not recent_matches %}
-            <div class="text-center py-16 slide-up">
-                <div class="w-20 h-20 bg-pink-200 rounded-full flex items-center justify-center mx-auto mb-4">
-                    <i class="fas fa-bell text-3xl text-red-500"></i>
-                </div>
-                <h3 class="text-xl font-bold text-gray-800 mb-2">No notifications yet</h3>
-                <p class="text-gray-600 mb-6">Start swiping to get matches and chat requests!</p>
-                <a href="{{ url_for('dashboard') }}" 
-                   class="inline-block btn-primary text-white px-6 py-3 rounded-xl font-semibold">
-                    Start Discovering
-                </a>
-            </div>
-            {% endif %}
-        </div>
-    </div>
-    
-    <script>
-    function deleteNotification(notificationId) {
-        // Create custom modal
-        const modal = document.createElement('div');
-        modal.className = 'fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50';
-        modal.innerHTML = `
-            <div class="bg-white rounded-2xl p-6 mx-4 max-w-sm w-full transform transition-all duration-300 scale-95 opacity-0">
-                <div class="text-center">
-                    <div class="w-16 h-16 bg-red-100 rounded-full flex items-center justify-center mx-auto mb-4">
-                        <i class="fas fa-trash-alt text-2xl text-red-500"></i>
-                    </div>
-                    <h3 class="text-lg font-bold text-gray-800 mb-2">Remove Notification</h3>
-                    <p class="text-gray-600 mb-6">Are you sure you want to remove this notification? This action cannot be undone.</p>
-                    
-                    <div class="flex space-x-3">
-                        <button onclick="closeDeleteModal()" class="flex-1 bg-gray-200 hover:bg-gray-300 text-gray-800 px-4 py-3 rounded-xl font-semibold transition-colors">
-                            Cancel
-                        </button>
-                        <button onclick="confirmDeleteNotification('${notificationId}')" class="flex-1 bg-red-500 hover:bg-red-600 text-white px-4 py-3 rounded-xl font-semibold transition-colors">
-                            Remove
-                        </button>
-                    </div>
-                </div>
-            </div>
-        `;
-        
-        document.body.appendChild(modal);
-        
-        // Animate in
-        setTimeout(() => {
-            const dialog = modal.querySelector('.bg-white');
-            dialog.classList.remove('scale-95', 'opacity-0');
-            dialog.classList.add('scale-100', 'opacity-100');
-        }, 10);
-        
-        // Close on backdrop click
-        modal.addEventListener('click', (e) => {
-            if (e.target === modal) {
-                closeDeleteModal();
-            }
-        });
-        
-        // Close on escape key
-        document.addEventListener('keydown', function escapeHandler(e) {
-            if (e.key === 'Escape') {
-                closeDeleteModal();
-                document.removeEventListener('keydown', escapeHandler);
-            }
-        });
-    }
-    
-    function closeDeleteModal() {
-        const modal = document.querySelector('.fixed.inset-0.bg-black.bg-opacity-50');
-        if (modal) {
-            const dialog = modal.querySelector('.bg-white');
-            dialog.classList.add('scale-95', 'opacity-0');
-            setTimeout(() => {
-                modal.remove();
-            }, 300);
-        }
-    }
-    
-    function confirmDeleteNotification(notificationId) {
-        closeDeleteModal();
-        
-        fetch(`/delete-notification/${notificationId}`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            }
-        })
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                // Remove the notification card from the UI
-                const notificationCard = document.querySelector(`[data-notification-id="${notificationId}"]`);
-                notificationCard.style.transform = 'translateX(-100%)';
-                notificationCard.style.opacity = '0';
-                setTimeout(() => {
-                    notificationCard.remove();
-                    // Update the notification count
-                    const countElement = document.querySelector('.text-gray-600');
-                    const currentCount = parseInt(countElement.textContent.split(' ')[0]);
-                    const newCount = currentCount - 1;
-                    countElement.textContent = `${newCount} new notifications`;
-                    
-                    // Show empty state if no more notifications
-                    if (newCount === 0 && document.querySelectorAll('.bg-white.rounded-xl').length === 0) {
-                        location.reload();
-                    }
-                }, 300);
-                
-                // Show success message
-                showSuccessMessage('Notification removed successfully');
-            } else {
-                showErrorMessage(data.error || 'Failed to remove notification');
-            }
-        })
-        .catch(error => {
-            console.error('Error:', error);
-            showErrorMessage('Network error. Please try again.');
-        });
-    }
-    
-    function showSuccessMessage(message) {
-        const toast = document.createElement('div');
-        toast.className = 'fixed top-24 right-4 z-50 bg-green-500 text-white px-6 py-3 rounded-xl shadow-lg transform translate-x-full transition-transform duration-300';
-        toast.innerHTML = `
-            <div class="flex items-center space-x-2">
-                <i class="fas fa-check-circle"></i>
-                <span>${message}</span>
-            </div>
-        `;
-        document.body.appendChild(toast);
-        
-        setTimeout(() => {
-            toast.classList.remove('translate-x-full');
-        }, 100);
-        
-        setTimeout(() => {
-            toast.classList.add('translate-x-full');
-            setTimeout(() => toast.remove(), 300);
-        }, 3000);
-    }
+    # People waiting on a like back, counted from the like graph once it has loaded
+    pending_likes = like_graph.pending_count(user_id) if like_graph.ready else None
     
-    function showErrorMessage(message) {
-        const toast = document.createElement('div');
-        toast.className = 'fixed top-24 right-4 z-50 bg-red-500 text-white px-6 py-3 rounded-xl shadow-lg transform translate-x-full transition-transform duration-300';
-        toast.innerHTML = `
-            <div class="flex items-center space-x-2">
-                <i class="fas fa-exclamation-circle"></i>
-                <span>${message}</span>
-            </div>
-        `;
-        document.body.appendChild(toast);
-        
-        setTimeout(() => {
-            toast.classList.remove('translate-x-full');
-        }, 100);
-        
-        setTimeout(() => {
-            toast.classList.add('translate-x-full');
-            setTimeout(() => toast.remove(), 300);
-        }, 3000);
-    }
-    </script>
-    {% endblock %}
-    ''', pending_requests=pending_requests, recent_matches=recent_matches, notifications=notifications)
+    return render_template('pages/notifications.html', pending_requests=pending_requests, recent_matches=recent_matches, notifications=notifications, pending_likes=pending_likes)
 
 @app.route('/accept-chat-request/<request_id>')
 def accept_chat_request(request_id):
@@ -1826,10 +1215,12 @@ def accept_chat_request(request_id):
             except Exception as e:
                 # Match might already exist, that's okay
                 pass
+            open_conversation(request_info['requester_id'], request_info['receiver_id'], True)
+            chat_permissions.invalidate(request_info['requester_id'], request_info['receiver_id'])
             
             # Get user names for notification
-            requester_result = supabase.table('users').select('name').eq('id', request_info['requester_id']).execute()
-            receiver_result = supabase.table('users').select('name').eq('id', request_info['receiver_id']).execute()
+            requester_result = supabase.table('users').select(USER_NAME_COLUMNS).eq('id', request_info['requester_id']).execute()
+            receiver_result = supabase.table('users').select(USER_NAME_COLUMNS).eq('id', request_info['receiver_id']).execute()
             
             requester_name = requester_result.data[0]['name'] if requester_result.data else 'Someone'
             receiver_name = receiver_result.data[0]['name'] if receiver_result.data else 'Someone'
@@ -1877,6 +1268,7 @@ def reject_chat_request(request_id):
         
         # Delete the chat request
         supabase.table('chat_requests').delete().eq('id', request_id).execute()
+        chat_permissions.invalidate(current_user_id, chat_request['requester_id'])
         
         # Delete all notifications between these users related to this chat request
         supabase.table('notifications').delete().eq('user_id', current_user_id).eq('from_user_id', chat_request['requester_id']).eq('type', 'chat_request').execute()
@@ -1897,577 +1289,33 @@ def chat(user_id):
     current_user_id = session['user_id']
     
     # Check if users can chat (either matched or chat request accepted)
-    matches_result = supabase.table('matches').select('*').or_(f'user1_id.eq.{current_user_id},user2_id.eq.{current_user_id}').or_(f'user1_id.eq.{user_id},user2_id.eq.{user_id}').execute()
-    
-    can_chat = False
-    for match in matches_result.data:
-        if (match['user1_id'] == current_user_id and match['user2_id'] == user_id) or \
-           (match['user1_id'] == user_id and match['user2_id'] == current_user_id):
-            can_chat = True
-            break
-    
-    if not can_chat:
-        # Check if there's an accepted chat request
-        chat_requests_result = supabase.table('chat_requests').select('*').or_(f'requester_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').or_(f'requester_id.eq.{user_id},receiver_id.eq.{user_id}').eq('status', 'accepted').execute()
-        
-        for request in chat_requests_result.data:
-            if (request['requester_id'] == current_user_id and request['receiver_id'] == user_id) or \
-               (request['requester_id'] == user_id and request['receiver_id'] == current_user_id):
-                can_chat = True
-                break
-    
-    if not can_chat:
+    if not chat_permissions.can_chat(current_user_id, user_id):
         flash('You can only chat with matched users or accepted chat requests', 'error')
         return redirect(url_for('dashboard'))
     
     # Get user info
-    other_user_result = supabase.table('users').select('*').eq('id', user_id).execute()
+    other_user_result = supabase.table('users').select(USER_CARD_COLUMNS).eq('id', user_id).execute()
     if not other_user_result.data:
         flash('User not found', 'error')
         return redirect(url_for('dashboard'))
     
     other_user = other_user_result.data[0]
     
-    # Get messages
-    messages_result = supabase.table('messages').select('*, users!messages_sender_id_fkey(*)').or_(f'sender_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').or_(f'sender_id.eq.{user_id},receiver_id.eq.{user_id}').order('sent_at', desc=False).execute()
-    
-    messages = []
-    for message in messages_result.data:
-        if 'users' in message:
-            user_data = message['users']
-            message_data = {
-                'id': message['id'],
-                'content': message['content'],
-                'sent_at': message['sent_at'],
-                'is_read': message['is_read'],
-                'sender_id': message['sender_id'],
-                'receiver_id': message['receiver_id'],
-                'name': user_data['name'],
-                'profile_photo': user_data['profile_photo']
-            }
-            messages.append(message_data)
+    # Get the most recent page of messages, newest first, then show them oldest first
+    recent_messages = hot_queries.latest_messages(current_user_id, user_id, CHAT_PAGE_SIZE + 1)
+    
+    has_older = len(recent_messages) > CHAT_PAGE_SIZE
+    
+    messages = [serialize_message(message) for message in reversed(recent_messages[:CHAT_PAGE_SIZE])]
     
     # Mark messages as read
     try:
         supabase.table('messages').update({'is_read': True}).eq('sender_id', user_id).eq('receiver_id', current_user_id).eq('is_read', False).execute()
     except Exception as e:
         pass
+    mark_conversation_read(current_user_id, user_id)
     
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <style>
-        /* Hide the main navbar in chat view */
-        .navbar {
-            display: none !important;
-        }
-        
-        /* Chat-specific styles */
-        .chat-container {
-            height: 100vh;
-            display: flex;
-            flex-direction: column;
-        }
-        
-        .chat-header {
-            background: linear-gradient(135deg, #fdf2f8, #fce7f3);
-            border-bottom: 1px solid rgba(244, 114, 182, 0.2);
-            padding: 1rem;
-            position: sticky;
-            top: 0;
-            z-index: 10;
-        }
-        
-        .chat-header-content {
-            display: flex;
-            align-items: center;
-            gap: 0.75rem;
-            max-width: 600px;
-            margin: 0 auto;
-        }
-        
-        .back-button {
-            background: rgba(255, 255, 255, 0.8);
-            border-radius: 50%;
-            width: 40px;
-            height: 40px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            transition: all 0.2s ease;
-            backdrop-filter: blur(10px);
-        }
-        
-        .back-button:hover {
-            background: rgba(255, 255, 255, 0.9);
-            transform: scale(1.05);
-        }
-        
-        .user-info {
-            flex: 1;
-            text-align: center;
-        }
-        
-        .user-name {
-            font-size: 1.25rem;
-            font-weight: 700;
-            color: #1f2937;
-            margin-bottom: 0.25rem;
-        }
-        
-        .user-details {
-            font-size: 0.875rem;
-            color: #6b7280;
-        }
-        
-        .profile-image {
-            width: 48px;
-            height: 48px;
-            border-radius: 50%;
-            object-fit: cover;
-            border: 3px solid rgba(255, 255, 255, 0.8);
-            box-shadow: 0 4px 12px rgba(244, 114, 182, 0.2);
-        }
-        
-        .messages-container {
-            flex: 1;
-            overflow-y: auto;
-            padding: 1rem;
-            background: linear-gradient(135deg, #fdf2f8, #fef3f2);
-        }
-        
-        .message-input-container {
-            background: white;
-            border-top: 1px solid rgba(244, 114, 182, 0.1);
-            padding: 1rem;
-            position: sticky;
-            bottom: 0;
-        }
-        
-        .message-input-wrapper {
-            max-width: 600px;
-            margin: 0 auto;
-            display: flex;
-            gap: 0.75rem;
-            align-items: center;
-        }
-        
-        .message-input {
-            flex: 1;
-            padding: 0.75rem 1rem;
-            border: 2px solid rgba(244, 114, 182, 0.2);
-            border-radius: 25px;
-            font-size: 0.875rem;
-            transition: all 0.2s ease;
-            background: white;
-        }
-        
-        .message-input:focus {
-            outline: none;
-            border-color: #ec4899;
-            box-shadow: 0 0 0 3px rgba(236, 72, 153, 0.1);
-        }
-        
-        .send-button {
-            background: linear-gradient(135deg, #ec4899, #be185d);
-            color: white;
-            border: none;
-            border-radius: 50%;
-            width: 44px;
-            height: 44px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            transition: all 0.2s ease;
-            box-shadow: 0 4px 12px rgba(236, 72, 153, 0.3);
-        }
-        
-        .send-button:hover {
-            transform: scale(1.05);
-            box-shadow: 0 6px 16px rgba(236, 72, 153, 0.4);
-        }
-        
-        .send-button:active {
-            transform: scale(0.95);
-        }
-        
-        /* Message bubbles */
-        .message-bubble {
-            max-width: 280px;
-            padding: 0.75rem 1rem;
-            border-radius: 18px;
-            margin-bottom: 0.5rem;
-            position: relative;
-        }
-        
-        .message-bubble.sent {
-            background: linear-gradient(135deg, #ec4899, #be185d);
-            color: white;
-            margin-left: auto;
-            border-bottom-right-radius: 6px;
-        }
-        
-        .message-bubble.received {
-            background: white;
-            color: #1f2937;
-            margin-right: auto;
-            border-bottom-left-radius: 6px;
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
-        }
-        
-        .message-time {
-            font-size: 0.75rem;
-            opacity: 0.7;
-            margin-top: 0.25rem;
-        }
-        
-        /* Responsive design for all devices */
-        @media (max-width: 640px) {
-            .chat-header {
-                padding: 0.75rem;
-            }
-            
-            .user-name {
-                font-size: 1.125rem;
-            }
-            
-            .messages-container {
-                padding: 0.75rem;
-            }
-            
-            .message-input-container {
-                padding: 0.75rem;
-            }
-            
-            .message-bubble {
-                max-width: 240px;
-            }
-        }
-        
-        /* Desktop optimizations - More compact */
-        @media (min-width: 768px) {
-            .chat-container {
-                max-width: 700px;
-                margin: 0 auto;
-                height: 85vh;
-                border-radius: 16px;
-                box-shadow: 0 15px 30px rgba(0, 0, 0, 0.1);
-                margin-top: 7.5vh;
-                margin-bottom: 7.5vh;
-            }
-            
-            .chat-header {
-                border-radius: 16px 16px 0 0;
-                padding: 1.25rem;
-            }
-            
-            .chat-header-content {
-                max-width: 600px;
-            }
-            
-            .user-name {
-                font-size: 1.25rem;
-            }
-            
-            .user-details {
-                font-size: 0.9rem;
-            }
-            
-            .profile-image {
-                width: 48px;
-                height: 48px;
-            }
-            
-            .messages-container {
-                padding: 1.25rem;
-                max-height: 65vh;
-            }
-            
-            .message-bubble {
-                max-width: 350px;
-                font-size: 0.9rem;
-                padding: 0.875rem 1.125rem;
-            }
-            
-            .message-input-container {
-                padding: 1.25rem;
-                border-radius: 0 0 16px 16px;
-            }
-            
-            .message-input-wrapper {
-                max-width: 600px;
-            }
-            
-            .message-input {
-                padding: 0.875rem 1.25rem;
-                font-size: 0.9rem;
-                border-radius: 25px;
-            }
-            
-            .send-button {
-                width: 48px;
-                height: 48px;
-                font-size: 1rem;
-            }
-        }
-        
-        /* Large desktop screens - Moderate scaling */
-        @media (min-width: 1024px) {
-            .chat-container {
-                max-width: 800px;
-            }
-            
-            .chat-header-content {
-                max-width: 700px;
-            }
-            
-            .message-input-wrapper {
-                max-width: 700px;
-            }
-            
-            .message-bubble {
-                max-width: 400px;
-            }
-        }
-        
-        /* Extra large screens - Reasonable scaling */
-        @media (min-width: 1280px) {
-            .chat-container {
-                max-width: 900px;
-            }
-            
-            .chat-header-content {
-                max-width: 800px;
-            }
-            
-            .message-input-wrapper {
-                max-width: 800px;
-            }
-            
-            .message-bubble {
-                max-width: 450px;
-            }
-        }
-    </style>
-    
-    <div class="chat-container">
-        <!-- Enhanced Chat Header -->
-        <div class="chat-header">
-            <div class="chat-header-content">
-                <a href="{{ url_for('chats') }}" class="back-button">
-                    <i class="fas fa-arrow-left text-gray-600"></i>
-                </a>
-                
-                <div class="user-info">
-                    <div class="user-name">{{ other_user.name }}</div>
-                    <div class="user-details">{{ other_user.department }} • {{ other_user.year }}</div>
-                </div>
-                
-                <div class="w-12 h-12 bg-gradient-to-br from-pink-200 to-red-200 rounded-full flex items-center justify-center flex-shrink-0">
-                    {% if other_user.profile_photo %}
-                        {% if other_user.profile_photo.startswith('data:image') %}
-                            <img src="{{ other_user.profile_photo }}" 
-                                 alt="{{ other_user.name }}" class="profile-image">
-                        {% else %}
-                            <img src="{{ url_for('static', filename='uploads/' + other_user.profile_photo) }}" 
-                                 alt="{{ other_user.name }}" class="profile-image">
-                        {% endif %}
-                    {% else %}
-                        <i class="fas fa-user text-lg text-gray-400"></i>
-                    {% endif %}
-                </div>
-            </div>
-        </div>
-        
-        <!-- Messages -->
-        <div class="messages-container" id="messages">
-            {% for message in messages %}
-            <div class="flex {% if message.sender_id == session.user_id %}justify-end{% else %}justify-start{% endif %}">
-                <div class="message-bubble {% if message.sender_id == session.user_id %}sent{% else %}received{% endif %}">
-                    <p class="text-sm">{{ message.content }}</p>
-                    <p class="message-time">
-                        {{ message.sent_at[11:16] }}
-                    </p>
-                </div>
-            </div>
-            {% endfor %}
-        </div>
-        
-        <!-- Message Input -->
-        <div class="message-input-container">
-            <form id="messageForm" class="message-input-wrapper">
-                <input type="text" id="messageInput" name="message" placeholder="Type a message..." required
-                       class="message-input">
-                <button type="submit" class="send-button">
-                    <i class="fas fa-paper-plane"></i>
-                </button>
-            </form>
-        </div>
-    </div>
-    
-    <script>
-        // Auto-scroll to bottom
-        const messagesDiv = document.getElementById('messages');
-        messagesDiv.scrollTop = messagesDiv.scrollHeight;
-        
-        // Real-time message updates
-        let lastMessageTime = '{{ messages[-1].sent_at if messages else "" }}';
-        let isPolling = true;
-        let loadedMessageIds = new Set();
-        
-        // Initialize loaded message IDs from existing messages
-        {% for message in messages %}
-        loadedMessageIds.add('{{ message.id }}');
-        {% endfor %}
-        
-        function loadNewMessages() {
-            if (!isPolling) return;
-            
-            fetch(`{{ url_for('get_messages', user_id=other_user.id) }}?last_time=${encodeURIComponent(lastMessageTime)}`)
-                .then(response => {
-                    if (!response.ok) {
-                        throw new Error('Network response was not ok');
-                    }
-                    return response.json();
-                })
-                .then(data => {
-                    if (data.messages && data.messages.length > 0) {
-                        const messagesContainer = document.getElementById('messages');
-                        let newMessagesAdded = false;
-                        
-                        data.messages.forEach(message => {
-                            // Check if message is already loaded
-                            if (loadedMessageIds.has(message.id)) {
-                                return; // Skip already loaded messages
-                            }
-                            
-                            // Add message ID to loaded set
-                            loadedMessageIds.add(message.id);
-                            
-                            const messageDiv = document.createElement('div');
-                            messageDiv.className = `flex ${message.sender_id === '{{ session.user_id }}' ? 'justify-end' : 'justify-start'}`;
-                            
-                            messageDiv.innerHTML = `
-                                <div class="message-bubble ${message.sender_id === '{{ session.user_id }}' ? 'sent' : 'received'}">
-                                    <p class="text-sm">${message.content}</p>
-                                    <p class="message-time">
-                                        ${message.sent_at.substring(11, 16)}
-                                    </p>
-                                </div>
-                            `;
-                            
-                            messagesContainer.appendChild(messageDiv);
-                            newMessagesAdded = true;
-                        });
-                        
-                        if (newMessagesAdded) {
-                            // Update last message time only if new messages were added
-                            lastMessageTime = data.messages[data.messages.length - 1].sent_at;
-                            
-                            // Auto-scroll to bottom
-                            messagesContainer.scrollTop = messagesContainer.scrollHeight;
-                        }
-                    }
-                })
-                .catch(error => {
-                    console.error('Error loading messages:', error);
-                    // Stop polling on error to prevent spam
-                    isPolling = false;
-                    setTimeout(() => { isPolling = true; }, 5000); // Resume after 5 seconds
-                });
-        }
-        
-        // Load new messages every 1 second for faster updates
-        setInterval(loadNewMessages, 1000);
-        
-        // Also load new messages when the page becomes visible
-        document.addEventListener('visibilitychange', function() {
-            if (!document.hidden) {
-                loadNewMessages();
-            }
-        });
-        
-        // Handle message form submission
-        document.getElementById('messageForm').addEventListener('submit', function(e) {
-            e.preventDefault();
-            
-            const messageInput = document.getElementById('messageInput');
-            const message = messageInput.value.trim();
-            
-            if (!message) return;
-            
-            // Store the message for immediate display
-            const tempMessage = message;
-            
-            // Clear input immediately
-            messageInput.value = '';
-            
-            // Add message to chat immediately (optimistic update)
-            const messagesContainer = document.getElementById('messages');
-            const messageDiv = document.createElement('div');
-            messageDiv.className = 'flex justify-end';
-            messageDiv.id = 'temp-message';
-            
-            messageDiv.innerHTML = `
-                <div class="message-bubble sent" style="opacity: 0.75;">
-                    <p class="text-sm">${tempMessage}</p>
-                    <p class="message-time">
-                        Sending...
-                    </p>
-                </div>
-            `;
-            
-            messagesContainer.appendChild(messageDiv);
-            messagesContainer.scrollTop = messagesContainer.scrollHeight;
-            
-            // Send message via AJAX
-            fetch('{{ url_for("send_message", receiver_id=other_user.id) }}', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: `message=${encodeURIComponent(tempMessage)}`
-            })
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error('Network response was not ok');
-                }
-                return response.json();
-            })
-            .then(data => {
-                if (data.success) {
-                    // Add the message ID to loaded set to prevent duplicates
-                    loadedMessageIds.add(data.message.id);
-                    
-                    // Update the temporary message with real data
-                    messageDiv.innerHTML = `
-                        <div class="message-bubble sent">
-                            <p class="text-sm">${data.message.content}</p>
-                            <p class="message-time">
-                                ${data.message.sent_at.substring(11, 16)}
-                            </p>
-                        </div>
-                    `;
-                    
-                    // Update last message time
-                    lastMessageTime = data.message.sent_at;
-                } else {
-                    // Show error and restore message to input
-                    console.error('Error sending message:', data.error);
-                    messageInput.value = tempMessage;
-                    messageDiv.remove();
-                }
-            })
-            .catch(error => {
-                console.error('Error sending message:', error);
-                // Show error and restore message to input
-                messageInput.value = tempMessage;
-                messageDiv.remove();
-            });
-        });
-    </script>
-    {% endblock %}
-    ''', other_user=other_user, messages=messages)
+    return render_template('pages/chat.html', other_user=other_user, messages=messages, has_older=has_older)
 
 @app.route('/send-message/<receiver_id>', methods=['POST'])
 def send_message(receiver_id):
@@ -2481,27 +1329,8 @@ def send_message(receiver_id):
     
     current_user_id = session['user_id']
     
-    # Check if users can chat
-    matches_result = supabase.table('matches').select('*').or_(f'user1_id.eq.{current_user_id},user2_id.eq.{current_user_id}').or_(f'user1_id.eq.{receiver_id},user2_id.eq.{receiver_id}').execute()
-    
-    can_chat = False
-    for match in matches_result.data:
-        if (match['user1_id'] == current_user_id and match['user2_id'] == receiver_id) or \
-           (match['user1_id'] == receiver_id and match['user2_id'] == current_user_id):
-            can_chat = True
-            break
-    
-    if not can_chat:
-        # Check if there's an accepted chat request
-        chat_requests_result = supabase.table('chat_requests').select('*').or_(f'requester_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').or_(f'requester_id.eq.{receiver_id},receiver_id.eq.{receiver_id}').eq('status', 'accepted').execute()
-        
-        for chat_request in chat_requests_result.data:
-            if (chat_request['requester_id'] == current_user_id and chat_request['receiver_id'] == receiver_id) or \
-               (chat_request['requester_id'] == receiver_id and chat_request['receiver_id'] == current_user_id):
-                can_chat = True
-                break
-    
-    if not can_chat:
+    # Check if users can chat (either matched or chat request accepted)
+    if not chat_permissions.can_chat(current_user_id, receiver_id):
         flash('You can only send messages to matched users or accepted chat requests', 'error')
         return redirect(url_for('dashboard'))
     
@@ -2516,15 +1345,15 @@ def send_message(receiver_id):
         if result.data:
             # Return the new message data
             new_message = result.data[0]
+            message_data = serialize_message(new_message)
+            record_conversation_message(message_data)
+            
+            # Push to any open chat streams
+            chat_events.publish_message(message_data)
+            
             return jsonify({
                 'success': True,
-                'message': {
-                    'id': new_message['id'],
-                    'content': new_message['content'],
-                    'sent_at': new_message['sent_at'],
-                    'sender_id': new_message['sender_id'],
-                    'receiver_id': new_message['receiver_id']
-                }
+                'message': message_data
             })
         else:
             return jsonify({'error': 'Failed to send message'}), 500
@@ -2538,73 +1367,106 @@ def get_messages(user_id):
         return jsonify({'error': 'Not logged in'}), 401
     
     current_user_id = session['user_id']
-    last_time = request.args.get('last_time', '')
+    after = request.args.get('after', '')
     
-    # Check if users can chat
-    matches_result = supabase.table('matches').select('*').or_(f'user1_id.eq.{current_user_id},user2_id.eq.{current_user_id}').or_(f'user1_id.eq.{user_id},user2_id.eq.{user_id}').execute()
-    
-    can_chat = False
-    for match in matches_result.data:
-        if (match['user1_id'] == current_user_id and match['user2_id'] == user_id) or \
-           (match['user1_id'] == user_id and match['user2_id'] == current_user_id):
-            can_chat = True
-            break
-    
-    if not can_chat:
-        # Check if there's an accepted chat request
-        chat_requests_result = supabase.table('chat_requests').select('*').or_(f'requester_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').or_(f'requester_id.eq.{user_id},receiver_id.eq.{user_id}').eq('status', 'accepted').execute()
-        
-        for chat_request in chat_requests_result.data:
-            if (chat_request['requester_id'] == current_user_id and chat_request['receiver_id'] == user_id) or \
-               (chat_request['requester_id'] == user_id and chat_request['receiver_id'] == current_user_id):
-                can_chat = True
-                break
-    
-    if not can_chat:
+    # Check if users can chat (either matched or chat request accepted)
+    if not chat_permissions.can_chat(current_user_id, user_id):
         return jsonify({'error': 'Cannot access messages'}), 403
     
-    # Get messages after the last_time
-    query = supabase.table('messages').select('*, users!messages_sender_id_fkey(*)').or_(f'sender_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').or_(f'sender_id.eq.{user_id},receiver_id.eq.{user_id}').order('sent_at', desc=False)
-    
-    if last_time and last_time.strip():
-        # Clean the timestamp format for Supabase
-        try:
-            # Remove timezone info and format properly
-            clean_time = last_time.split('+')[0].split('.')[0] + 'Z'
-            query = query.gt('sent_at', clean_time)
-        except:
-            # If timestamp parsing fails, don't get any messages to avoid duplicates
+    if after:
+        # If the cursor is malformed, don't get any messages to avoid duplicates
+        cursor_position = decode_message_cursor(after)
+        if not cursor_position:
             return jsonify({'messages': []})
+        
+        # Get messages strictly after the cursor's (sent_at, id) position
+        new_messages = hot_queries.messages_after(current_user_id, user_id, cursor_position, CHAT_PAGE_SIZE)
     else:
-        # If no last_time, don't get any messages to avoid loading all messages
-        return jsonify({'messages': []})
-    
-    messages_result = query.execute()
-    
-    messages = []
-    for message in messages_result.data:
-        if 'users' in message:
-            user_data = message['users']
-            message_data = {
-                'id': message['id'],
-                'content': message['content'],
-                'sent_at': message['sent_at'],
-                'is_read': message['is_read'],
-                'sender_id': message['sender_id'],
-                'receiver_id': message['receiver_id'],
-                'name': user_data['name'],
-                'profile_photo': user_data['profile_photo']
-            }
-            messages.append(message_data)
+        # No cursor yet (empty conversation) - return the most recent page
+        new_messages = list(reversed(hot_queries.latest_messages(current_user_id, user_id, CHAT_PAGE_SIZE)))
     
-    # Mark messages as read
+    messages = [serialize_message(message) for message in new_messages]
+    
+    # Mark messages as read, touching the summary only when something was unread
     try:
-        supabase.table('messages').update({'is_read': True}).eq('sender_id', user_id).eq('receiver_id', current_user_id).eq('is_read', False).execute()
+        read_result = supabase.table('messages').update({'is_read': True}).eq('sender_id', user_id).eq('receiver_id', current_user_id).eq('is_read', False).execute()
+        if read_result.data:
+            mark_conversation_read(current_user_id, user_id)
     except Exception as e:
         pass
     
     return jsonify({'messages': messages})
 
+@app.route('/older-messages/<user_id>')
+def older_messages(user_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    current_user_id = session['user_id']
+    
+    cursor_position = decode_message_cursor(request.args.get('before', ''))
+    if not cursor_position:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    # Check if users can chat (either matched or chat request accepted)
+    if not chat_permissions.can_chat(current_user_id, user_id):
+        return jsonify({'error': 'Cannot access messages'}), 403
+    
+    # Get the page of messages just before the cursor, newest first
+    older = hot_queries.messages_before(current_user_id, user_id, cursor_position, CHAT_PAGE_SIZE + 1)
+    
+    has_more = len(older) > CHAT_PAGE_SIZE
+    
+    messages = [serialize_message(message) for message in reversed(older[:CHAT_PAGE_SIZE])]
+    
+    return jsonify({'messages': messages, 'has_more': has_more})
+
+@app.route('/chat-stream/<user_id>')
+def chat_stream(user_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    current_user_id = session['user_id']
+    
+    # Check if users can chat (either matched or chat request accepted)
+    if not chat_permissions.can_chat(current_user_id, user_id):
+        return jsonify({'error': 'Cannot access messages'}), 403
+    
+    subscriber = chat_events.subscribe(current_user_id, user_id)
+    
+    def event_stream():
+        deadline = time.monotonic() + CHAT_STREAM_MAX_SECONDS
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield 'retry: 3000\n\n'
+            while time.monotonic() < deadline:
+                try:
+                    message = subscriber.get(timeout=CHAT_STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # Stop as soon as they can no longer chat (e.g. after an unmatch)
+                    if not chat_permissions.can_chat(current_user_id, user_id):
+                        return
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                
+                # The viewer has the message on screen, so mark it read
+                if message['receiver_id'] == current_user_id:
+                    try:
+                        supabase.table('messages').update({'is_read': True}).eq('id', message['id']).execute()
+                    except Exception as e:
+                        pass
+                    mark_conversation_read(current_user_id, user_id)
+                
+                yield f"id: {message['id']}\nevent: message\ndata: {json.dumps(message)}\n\n"
+        finally:
+            chat_events.unsubscribe(current_user_id, user_id, subscriber)
+    
+    return Response(stream_with_context(event_stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/request-chat/<user_id>')
 def request_chat(user_id):
     if 'user_id' not in session:
@@ -2630,8 +1492,8 @@ def request_chat(user_id):
             }).execute()
             
             # Get user names for notification
-            requester_result = supabase.table('users').select('name').eq('id', current_user_id).execute()
-            receiver_result = supabase.table('users').select('name').eq('id', user_id).execute()
+            requester_result = supabase.table('users').select(USER_NAME_COLUMNS).eq('id', current_user_id).execute()
+            receiver_result = supabase.table('users').select(USER_NAME_COLUMNS).eq('id', user_id).execute()
             
             requester_name = requester_result.data[0]['name'] if requester_result.data else 'Someone'
             receiver_name = receiver_result.data[0]['name'] if receiver_result.data else 'Someone'
@@ -2657,34 +1519,22 @@ def accept_like_and_chat(user_id):
     
     current_user_id = session['user_id']
     
+    # Only a like they actually sent can be accepted
+    if not hot_queries.has_like(user_id, current_user_id):
+        flash('That like is no longer available.', 'error')
+        return redirect(url_for('notifications'))
+    
     try:
-        # Create match
-        supabase.table('matches').insert({
-            'user1_id': current_user_id,
-            'user2_id': user_id
-        }).execute()
+        # Liking them back makes the match, conversation and notifications
+        outcome = record_like(current_user_id, user_id)
         
         # Delete any existing chat requests
         supabase.table('chat_requests').delete().eq('requester_id', user_id).eq('receiver_id', current_user_id).execute()
         supabase.table('chat_requests').delete().eq('requester_id', current_user_id).eq('receiver_id', user_id).execute()
+        chat_permissions.invalidate(current_user_id, user_id)
         
-        # Delete all notifications between these users (like notifications, chat request notifications, etc.)
-        supabase.table('notifications').delete().or_(f'user_id.eq.{current_user_id},from_user_id.eq.{user_id}').execute()
-        supabase.table('notifications').delete().or_(f'user_id.eq.{user_id},from_user_id.eq.{current_user_id}').execute()
-        
-        # Get user names for notification
-        user_result = supabase.table('users').select('name').eq('id', user_id).execute()
-        user_name = user_result.data[0]['name'] if user_result.data else 'Someone'
-        
-        # Create new notification for the other person about the match
-        supabase.table('notifications').insert({
-            'user_id': user_id,
-            'from_user_id': current_user_id,
-            'type': 'match',
-            'message': f'You matched with {user_name}! 💕'
-        }).execute()
-        
-        flash('It\'s a match! You can now chat! 💕', 'success')
+        if outcome['status'] == 'matched':
+            flash('It\'s a match! You can now chat! 💕', 'success')
         
     except Exception as e:
         # Match might already exist, that's okay
@@ -2703,13 +1553,15 @@ def accept_chat_and_start_chat(user_id):
     try:
         # Update chat request status to accepted
         supabase.table('chat_requests').update({'status': 'accepted'}).eq('requester_id', user_id).eq('receiver_id', current_user_id).execute()
+        open_conversation(current_user_id, user_id, False)
+        chat_permissions.invalidate(current_user_id, user_id)
         
         # Delete all notifications between these users (chat request notifications, etc.)
         supabase.table('notifications').delete().or_(f'user_id.eq.{current_user_id},from_user_id.eq.{user_id}').execute()
         supabase.table('notifications').delete().or_(f'user_id.eq.{user_id},from_user_id.eq.{current_user_id}').execute()
         
         # Get user names for notification
-        requester_result = supabase.table('users').select('name').eq('id', user_id).execute()
+        requester_result = supabase.table('users').select(USER_NAME_COLUMNS).eq('id', user_id).execute()
         requester_name = requester_result.data[0]['name'] if requester_result.data else 'Someone'
         
         # Create notification for the other person
@@ -2736,63 +1588,28 @@ def chats():
     
     current_user_id = session['user_id']
     
-    # Get all users the current user can chat with (matches + accepted chat requests)
-    # First get matches
-    matches_result = supabase.table('matches').select('*').or_(f'user1_id.eq.{current_user_id},user2_id.eq.{current_user_id}').execute()
-    
-    # Get accepted chat requests
-    chat_requests_result = supabase.table('chat_requests').select('*').or_(f'requester_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').eq('status', 'accepted').execute()
+    # One read of the conversation summaries, with the partner's profile embedded
+    conversations_result = supabase.table('conversations').select(
+        f'*, low_user:users!conversations_user_low_fkey({USER_AVATAR_COLUMNS}), '
+        f'high_user:users!conversations_user_high_fkey({USER_AVATAR_COLUMNS})'
+    ).or_(f'user_low.eq.{current_user_id},user_high.eq.{current_user_id}').execute()
     
-    # Collect all user IDs that can be chatted with
-    chat_user_ids = set()
-    for match in matches_result.data:
-        other_id = match['user2_id'] if match['user1_id'] == current_user_id else match['user1_id']
-        chat_user_ids.add(other_id)
-    
-    for request in chat_requests_result.data:
-        other_id = request['receiver_id'] if request['requester_id'] == current_user_id else request['requester_id']
-        chat_user_ids.add(other_id)
-    
-    # Get user details and message info
     chat_users = []
-    for user_id in chat_user_ids:
-        if user_id == current_user_id:
+    for conversation in conversations_result.data:
+        is_low = conversation['user_low'] == current_user_id
+        user_data = conversation['high_user'] if is_low else conversation['low_user']
+        if not user_data:
             continue
-            
-        # Get user details
-        user_result = supabase.table('users').select('*').eq('id', user_id).execute()
-        if not user_result.data:
-            continue
-            
-        user_data = user_result.data[0]
-        
-        # Get unread count
-        unread_result = supabase.table('messages').select('*', count='exact').eq('sender_id', user_id).eq('receiver_id', current_user_id).eq('is_read', False).execute()
-        unread_count = len(unread_result.data) if unread_result.data else 0
-        
-        # Get last message
-        last_message_result = supabase.table('messages').select('*').or_(f'sender_id.eq.{user_id},receiver_id.eq.{user_id}').or_(f'sender_id.eq.{current_user_id},receiver_id.eq.{current_user_id}').order('sent_at', desc=True).limit(1).execute()
-        
-        last_message = None
-        last_message_time = None
-        if last_message_result.data:
-            last_message = last_message_result.data[0]['content']
-            last_message_time = last_message_result.data[0]['sent_at']
-        
-        # Check if it's a match
-        is_match = any((match['user1_id'] == current_user_id and match['user2_id'] == user_id) or 
-                      (match['user1_id'] == user_id and match['user2_id'] == current_user_id) 
-                      for match in matches_result.data)
         
         chat_user = {
-            'user_id': user_id,
+            'user_id': user_data['id'],
             'name': user_data['name'],
             'profile_photo': user_data['profile_photo'],
             'department': user_data['department'],
-            'unread_count': unread_count,
-            'last_message': last_message,
-            'last_message_time': last_message_time,
-            'is_match': is_match
+            'unread_count': conversation['unread_low'] if is_low else conversation['unread_high'],
+            'last_message': conversation['last_message'],
+            'last_message_time': conversation['last_message_at'],
+            'is_match': conversation['is_match']
         }
         chat_users.append(chat_user)
     
@@ -2826,20 +1643,11 @@ def confessions():
     current_user_id = session['user_id']
     category_filter = request.args.get('category', 'all')
     
-    # Build query for confessions
-    query = supabase.table('confessions').select('*').eq('is_approved', True).order('created_at', desc=True)
-    
-    # Apply category filter if specified
-    if category_filter != 'all':
-        query = query.eq('category', category_filter)
-    
-    # Get confessions
-    result = query.execute()
-    confessions = result.data if result.data else []
+    # Get confessions, applying the category filter if specified
+    confessions = hot_queries.confessions_feed(None if category_filter == 'all' else category_filter)
     
     # Get user's liked confessions for UI state
-    user_likes_result = supabase.table('confession_likes').select('confession_id').eq('user_id', current_user_id).execute()
-    user_liked_confession_ids = {like['confession_id'] for like in user_likes_result.data} if user_likes_result.data else set()
+    user_liked_confession_ids = hot_queries.liked_confession_ids(current_user_id)
     
     # Add user like status and time_ago to confessions
     for confession in confessions:
@@ -3099,18 +1907,10 @@ def get_confessions():
     limit = 10
     offset = (page - 1) * limit
     
-    # Build query
-    query = supabase.table('confessions').select('*').eq('is_approved', True).order('created_at', desc=True).range(offset, offset + limit - 1)
-    
-    if category_filter != 'all':
-        query = query.eq('category', category_filter)
-    
-    result = query.execute()
-    confessions = result.data if result.data else []
+    confessions = hot_queries.confessions_feed(None if category_filter == 'all' else category_filter, limit, offset)
     
     # Get user's liked confessions
-    user_likes_result = supabase.table('confession_likes').select('confession_id').eq('user_id', current_user_id).execute()
-    user_liked_confession_ids = {like['confession_id'] for like in user_likes_result.data} if user_likes_result.data else set()
+    user_liked_confession_ids = hot_queries.liked_confession_ids(current_user_id)
     
     # Add user like status and anonymous letter
     for confession in confessions:
@@ -3147,55 +1947,7 @@ def delete_notification(notification_id):
 @app.route('/setup')
 def setup():
     """Setup page to help users configure the application"""
-    return render_template_string('''
-    {% extends "base.html" %}
-    {% block content %}
-    <div class="bg-gray-50 min-h-screen py-8">
-        <div class="max-w-2xl mx-auto px-4">
-            <div class="bg-white rounded-2xl shadow-lg p-8">
-                <div class="text-center mb-8">
-                    <h1 class="text-3xl font-bold text-gray-800 mb-4">Setup Required</h1>
-                    <p class="text-gray-600">Your Fall In app needs to be configured before you can use it.</p>
-                </div>
-                
-                <div class="space-y-6">
-                    <div class="border-l-4 border-blue-500 pl-4">
-                        <h3 class="text-lg font-semibold text-gray-800 mb-2">1. Create a .env file</h3>
-                        <p class="text-gray-600 mb-2">Copy the env_template.txt file to .env in your project root:</p>
-                        <code class="bg-gray-100 p-2 rounded text-sm block">cp env_template.txt .env</code>
-                    </div>
-                    
-                    <div class="border-l-4 border-green-500 pl-4">
-                        <h3 class="text-lg font-semibold text-gray-800 mb-2">2. Set up Supabase</h3>
-                        <ol class="text-gray-600 space-y-1 ml-4">
-                            <li>• Go to <a href="https://supabase.com" target="_blank" class="text-blue-500 hover:underline">supabase.com</a> and create a new project</li>
-                            <li>• Get your project URL and anon key from Settings > API</li>
-                            <li>• Update the .env file with your credentials</li>
-                        </ol>
-                    </div>
-                    
-                    <div class="border-l-4 border-purple-500 pl-4">
-                        <h3 class="text-lg font-semibold text-gray-800 mb-2">3. Set up the database</h3>
-                        <p class="text-gray-600 mb-2">Run the SQL schema in your Supabase SQL editor:</p>
-                        <code class="bg-gray-100 p-2 rounded text-sm block">Copy and paste the contents of supabase_schema.sql</code>
-                    </div>
-                    
-                    <div class="border-l-4 border-yellow-500 pl-4">
-                        <h3 class="text-lg font-semibold text-gray-800 mb-2">4. Restart the application</h3>
-                        <p class="text-gray-600">After configuring everything, restart your Flask application.</p>
-                    </div>
-                </div>
-                
-                <div class="mt-8 text-center">
-                    <a href="{{ url_for('index') }}" class="btn-primary text-white px-6 py-3 rounded-xl font-semibold">
-                        Go to Home
-                    </a>
-                </div>
-            </div>
-        </div>
-    </div>
-    {% endblock %}
-    ''')
+    return render_template('pages/setup.html')
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8000)
\ No newline at end of file
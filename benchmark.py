@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Fall In Offline Benchmark
+Runs the app against the in-memory local backend (DB_BACKEND=local) with a
+synthetic campus-sized dataset and reports per-route latency, then the CPU
+time page templates cost when compiled per request versus served from the
+template cache, then how long ranking a user's discovery candidates takes.
+
+Usage: python benchmark.py [--users 2000] [--requests 50]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from flask import template_rendered
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def busiest_user(client):
+    """The user with the most matches, so list pages have realistic length"""
+    counts = {}
+    for row in client.tables['matches'].rows.values():
+        for user_id in (row['user1_id'], row['user2_id']):
+            counts[user_id] = counts.get(user_id, 0) + 1
+    return max(counts, key=counts.get)
+
+def benchmark_routes(app_module, requests):
+    client = app_module.supabase
+    user_id = busiest_user(client)
+    partner_match = client.table('matches').select('*').or_(f'user1_id.eq.{user_id},user2_id.eq.{user_id}').limit(1).execute().data[0]
+    partner_id = partner_match['user2_id'] if partner_match['user1_id'] == user_id else partner_match['user1_id']
+
+    routes = [
+        ('dashboard', '/dashboard'),
+        ('matches', '/matches'),
+        ('chats', '/chats'),
+        ('notifications', '/notifications'),
+        ('chat', f'/chat/{partner_id}'),
+        ('get_messages', f'/get-messages/{partner_id}'),
+        ('notification_count', '/notification-count'),
+        ('confessions', '/confessions'),
+    ]
+
+    # Debug mode adds the X-DB-Round-Trips header to every response
+    app_module.app.debug = True
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as flask_session:
+        flask_session['user_id'] = user_id
+
+    print(f"{'route':<20} {'p50 ms':>8} {'p95 ms':>8} {'db calls':>9}")
+    print('-' * 48)
+    for name, path in routes:
+        samples = []
+        response = None
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = test_client.get(path)
+            samples.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                print(f'{name}: HTTP {response.status_code}')
+                break
+        round_trips = response.headers.get('X-DB-Round-Trips', '?')
+        print(f'{name:<20} {statistics.median(samples):>8.2f} {percentile(samples, 0.95):>8.2f} {round_trips:>9}')
+
+TEMPLATE_PAGES = [
+    ('chat', 'chat'),
+    ('notifications', 'notifications'),
+    ('matches', 'matches'),
+    ('edit_profile', 'edit-profile'),
+]
+
+def capture_template_context(test_client, path):
+    """Request a page and return the (template, context) it rendered"""
+    captured = []
+
+    def record(sender, template, context, **extra):
+        captured.append((template, dict(context)))
+
+    with template_rendered.connected_to(record):
+        test_client.get(path)
+    return captured[0]
+
+def benchmark_templates(app_module, requests):
+    app = app_module.app
+    client = app_module.supabase
+    user_id = busiest_user(client)
+    partner_match = client.table('matches').select('*').or_(f'user1_id.eq.{user_id},user2_id.eq.{user_id}').limit(1).execute().data[0]
+    partner_id = partner_match['user2_id'] if partner_match['user1_id'] == user_id else partner_match['user1_id']
+
+    test_client = app.test_client()
+    with test_client.session_transaction() as flask_session:
+        flask_session['user_id'] = user_id
+
+    print(f"\n{'template':<20} {'compile ms':>11} {'cached ms':>10} {'saved':>7}")
+    print('-' * 51)
+    for name, path in TEMPLATE_PAGES:
+        path = f'/{path}/{partner_id}' if name == 'chat' else f'/{path}'
+        template, context = capture_template_context(test_client, path)
+        source = app.jinja_env.loader.get_source(app.jinja_env, template.name)[0]
+
+        with app.test_request_context(path):
+            # What render_template_string did on every request
+            started = time.process_time()
+            for _ in range(requests):
+                app.jinja_env.from_string(source).render(context)
+            compiled = (time.process_time() - started) * 1000 / requests
+
+            started = time.process_time()
+            for _ in range(requests):
+                app.jinja_env.get_template(template.name).render(context)
+            cached = (time.process_time() - started) * 1000 / requests
+
+        print(f'{name:<20} {compiled:>11.2f} {cached:>10.2f} {compiled / cached:>6.1f}x')
+
+def benchmark_ranking(app_module, requests):
+    client = app_module.supabase
+    discovery = app_module.discovery
+    ranker = app_module.ranker
+    interests = app_module.interests
+    while not (ranker.ready and interests.ready):
+        time.sleep(0.05)
+
+    user_ids = [row['id'] for row in client.tables['users'].rows.values()]
+    viewers = user_ids[:requests]
+    for user_id in viewers:
+        discovery._seen_set(user_id)
+
+    # A full queue's worth of candidates: scored over every user, by profile
+    # text similarity, and from the unranked keyset scan
+    ranked, similar, scanned = [], [], []
+    for user_id in viewers:
+        seen = discovery._seen_set(user_id)
+        started = time.perf_counter()
+        ranker.top_k(user_id, discovery.target_size, seen)
+        ranked.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        interests.similar(user_id, discovery.target_size, seen)
+        similar.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        discovery._scan(user_id, None, discovery.target_size, set(), seen)
+        scanned.append((time.perf_counter() - started) * 1000)
+
+    print(f"\n{'candidates':<20} {'p50 ms':>8} {'p95 ms':>8}   ({len(user_ids)} users)")
+    print('-' * 38)
+    for name, samples in (('ranked top_k', ranked), ('similar text', similar), ('keyset scan', scanned)):
+        print(f'{name:<20} {statistics.median(samples):>8.2f} {percentile(samples, 0.95):>8.2f}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Fall In routes offline')
+    parser.add_argument('--users', type=int, default=2000, help='synthetic users to seed')
+    parser.add_argument('--requests', type=int, default=50, help='requests per route')
+    args = parser.parse_args()
+
+    # The backend is chosen when app.py is imported
+    os.environ['DB_BACKEND'] = 'local'
+    os.environ['LOCAL_SEED_USERS'] = str(args.users)
+
+    print(f'🚀 Seeding {args.users} users into the local backend...')
+    started = time.perf_counter()
+    import app as app_module
+    print(f'✅ Seeded in {time.perf_counter() - started:.1f}s\n')
+
+    benchmark_routes(app_module, args.requests)
+    benchmark_templates(app_module, args.requests)
+    benchmark_ranking(app_module, args.requests)
+
+if __name__ == '__main__':
+    sys.exit(main())
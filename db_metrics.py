@@ -0,0 +1,144 @@
+# Fall In - Database round-trip instrumentation
+# Wraps the Supabase client (or the local backend) so every execute() records
+# table, operation, latency and row count against the current Flask request.
+# Totals are exposed as Prometheus histograms by the /metrics route in app.py.
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+ROUND_TRIP_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+QUERY_ACTIONS = ('select', 'insert', 'update', 'upsert', 'delete')
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.samples = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.samples += 1
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+class DBMetrics:
+    """Per-request round-trip counters plus process-wide histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._query_latency = {}
+        self._query_rows = {}
+        self._round_trips = {}
+
+    @staticmethod
+    def _endpoint():
+        return (request.endpoint or 'unknown') if has_request_context() else 'background'
+
+    def record(self, table, operation, seconds, rows):
+        endpoint = self._endpoint()
+        if has_request_context():
+            g.db_round_trips = g.get('db_round_trips', 0) + 1
+            g.db_seconds = g.get('db_seconds', 0.0) + seconds
+        key = (endpoint, table, operation)
+        with self._lock:
+            self._query_latency.setdefault(key, _Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self._query_rows[key] = self._query_rows.get(key, 0) + rows
+
+    def request_round_trips(self):
+        return g.get('db_round_trips', 0)
+
+    def request_seconds(self):
+        return g.get('db_seconds', 0.0)
+
+    def finish_request(self):
+        """Record how many round trips the current request made"""
+        with self._lock:
+            self._round_trips.setdefault(self._endpoint(), _Histogram(ROUND_TRIP_BUCKETS)).observe(self.request_round_trips())
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            lines.append('# HELP fallin_db_query_duration_seconds Latency of database round trips.')
+            lines.append('# TYPE fallin_db_query_duration_seconds histogram')
+            for (endpoint, table, operation), histogram in sorted(self._query_latency.items()):
+                lines.extend(self._histogram_lines('fallin_db_query_duration_seconds', histogram,
+                                                   endpoint=endpoint, table=table, operation=operation))
+
+            lines.append('# HELP fallin_db_rows_total Rows returned by database round trips.')
+            lines.append('# TYPE fallin_db_rows_total counter')
+            for (endpoint, table, operation), rows in sorted(self._query_rows.items()):
+                lines.append(f'fallin_db_rows_total{{{_labels(endpoint=endpoint, table=table, operation=operation)}}} {rows}')
+
+            lines.append('# HELP fallin_db_round_trips_per_request Database round trips made by one request.')
+            lines.append('# TYPE fallin_db_round_trips_per_request histogram')
+            for endpoint, histogram in sorted(self._round_trips.items()):
+                lines.extend(self._histogram_lines('fallin_db_round_trips_per_request', histogram, endpoint=endpoint))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _histogram_lines(name, histogram, **labels):
+        label_text = _labels(**labels)
+        cumulative = 0
+        lines = []
+        for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label_text}}} {histogram.total}')
+        lines.append(f'{name}_count{{{label_text}}} {histogram.samples}')
+        return lines
+
+class _InstrumentedQuery:
+    """Proxy for a query builder that times execute()"""
+
+    def __init__(self, builder, metrics, table, operation):
+        self._builder = builder
+        self._metrics = metrics
+        self._table = table
+        self._operation = operation
+
+    def _wrap(self, value, operation):
+        if hasattr(value, 'execute'):
+            return _InstrumentedQuery(value, self._metrics, self._table, operation)
+        return value
+
+    def __getattr__(self, name):
+        attribute = getattr(self._builder, name)
+        operation = name if name in QUERY_ACTIONS else self._operation
+        if not callable(attribute):
+            # e.g. the `not_` property, which returns the builder itself
+            return self._wrap(attribute, operation)
+
+        def call(*args, **kwargs):
+            return self._wrap(attribute(*args, **kwargs), operation)
+        return call
+
+    def execute(self):
+        started = time.perf_counter()
+        response = self._builder.execute()
+        data = getattr(response, 'data', None)
+        rows = len(data) if isinstance(data, list) else int(data is not None)
+        self._metrics.record(self._table, self._operation, time.perf_counter() - started, rows)
+        return response
+
+class InstrumentedClient:
+    """Drop-in wrapper around a Supabase-compatible client"""
+
+    def __init__(self, client, metrics):
+        self._client = client
+        self._metrics = metrics
+
+    def table(self, name):
+        return _InstrumentedQuery(self._client.table(name), self._metrics, name, 'select')
+
+    def rpc(self, name, params=None):
+        return _InstrumentedQuery(self._client.rpc(name, params or {}), self._metrics, name, 'rpc')
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
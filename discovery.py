@@ -0,0 +1,286 @@
+# Fall In - Discovery queue
+# Each user gets a short queue of profiles to show on the dashboard, built
+# ahead of time by a background thread. Candidates are the best unseen
+# matches from the compatibility ranker (ranking.py) once it has loaded;
+# until then, they come from a per-user keyset scan over users (in id order,
+# starting at a random point). Every third candidate is instead someone who
+# wrote about similar things (interests.py), when that index has loaded.
+# Either way candidates are checked against the user's seen set, a bitmap
+# over dense user indexes (user_index.DenseIds) of everyone they have liked,
+# passed or matched with. The bitmap is loaded from the database, kept
+# current by this process's mark_seen() calls and reloaded every
+# seen_ttl_seconds to pick up swipes other worker processes served. A check
+# is one bit test however long the history is, and no exclusion list ever
+# goes into a URL.
+#
+# The dashboard only reads the head of the queue, and /api/discover reads on
+# from the last card the client holds (the queue keeps its order, so a
+# candidate id works as a cursor). Likes and passes mark candidates seen,
+# and a top-up is scheduled once fewer than low_watermark remain. Queues and
+# seen sets live in process memory, like the chat permission cache: each
+# worker process keeps its own, and they are rebuilt on demand after a
+# restart.
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# PostgREST returns at most this many rows per request by default
+PAGE_SIZE = 1000
+
+class SeenSet:
+    """Bitmap of dense user indexes, one bit per user"""
+    __slots__ = ('bits',)
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def add(self, index):
+        byte = index >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte - len(self.bits) + 1))
+        self.bits[byte] |= 1 << (index & 7)
+
+    def update(self, other):
+        """Add every index in another SeenSet"""
+        if len(other.bits) > len(self.bits):
+            self.bits.extend(bytes(len(other.bits) - len(self.bits)))
+        for byte, value in enumerate(other.bits):
+            self.bits[byte] |= value
+
+    def __contains__(self, index):
+        byte = index >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (index & 7)))
+
+class DiscoveryQueue:
+    def __init__(self, db, dense_ids, target_size=50, low_watermark=15, scan_batch=500,
+                 max_users=10000, workers=2, exhausted_retry_seconds=300, ranker=None,
+                 interests=None, similar_every=3, seen_ttl_seconds=60):
+        self.db = db
+        self.dense_ids = dense_ids
+        self.ranker = ranker
+        self.interests = interests
+        self.similar_every = similar_every
+        self.target_size = target_size
+        self.low_watermark = low_watermark
+        self.scan_batch = scan_batch
+        self.max_users = max_users
+        # After a scan finds nobody new, wait this long before scanning again
+        self.exhausted_retry_seconds = exhausted_retry_seconds
+        # Seen sets are reloaded from the database after this long, to pick up
+        # likes and passes that other worker processes served
+        self.seen_ttl_seconds = seen_ttl_seconds
+        self._lock = threading.Lock()
+        # user_id: candidate ids in display order (dict as an ordered set)
+        self._queues = OrderedDict()
+        # user_id: id the next scan starts after
+        self._cursors = {}
+        # user_id: (SeenSet, monotonic time it expires)
+        self._seen = {}
+        # user_id: monotonic time a scan last came up empty
+        self._exhausted = {}
+        self._refill_locks = {}
+        self._scheduled = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='discovery')
+
+    def peek(self, user_id, count, after=None):
+        """The next `count` candidate ids for a user, without consuming them.
+
+        With `after` (a candidate the caller already has), the ones queued
+        behind it; if it has left the queue, the ones from the head.
+        """
+        # Reloads an expired seen set, dropping queued candidates the user
+        # has since swiped through another worker
+        self._seen_set(user_id)
+        with self._lock:
+            queue = self._queues.get(user_id)
+            if queue:
+                self._queues.move_to_end(user_id)
+        if not queue:
+            # First visit (or an exhausted queue): fill it before answering
+            self.refill(user_id)
+        head = self._following(user_id, after)
+        if after is not None and len(head) < count:
+            # The caller already holds cards it hasn't swiped yet; queue enough
+            # past them now rather than leave a gap
+            with self._lock:
+                queued = len(self._queues.get(user_id, {}))
+            self.refill(user_id, target=max(self.target_size, queued - len(head) + count))
+            head = self._following(user_id, after)
+        with self._lock:
+            low = len(self._queues.get(user_id, {})) < self.low_watermark
+        if low:
+            self.schedule_refill(user_id)
+        return head[:count]
+
+    def _following(self, user_id, after):
+        with self._lock:
+            queued = list(self._queues.get(user_id, {}))
+        if after in queued:
+            return queued[queued.index(after) + 1:]
+        return queued
+
+    def mark_seen(self, user_id, candidate_id):
+        """Record that the user liked, passed or matched with a candidate"""
+        with self._lock:
+            entry = self._seen.get(user_id)
+            if entry is not None:
+                entry[0].add(self.dense_ids.index(candidate_id))
+            queue = self._queues.get(user_id)
+            if queue is None:
+                return
+            queue.pop(candidate_id, None)
+            low = len(queue) < self.low_watermark
+        if low:
+            self.schedule_refill(user_id)
+
+    def schedule_refill(self, user_id):
+        with self._lock:
+            if user_id in self._scheduled:
+                return
+            self._scheduled.add(user_id)
+        self._executor.submit(self._refill_in_background, user_id)
+
+    def _refill_in_background(self, user_id):
+        try:
+            self.refill(user_id)
+        except Exception as e:
+            print(f"Error refilling discovery queue for {user_id}: {e}")
+        finally:
+            with self._lock:
+                self._scheduled.discard(user_id)
+
+    def refill(self, user_id, target=None):
+        """Top the user's queue up to `target` (target_size by default)"""
+        with self._lock:
+            refill_lock = self._refill_locks.setdefault(user_id, threading.Lock())
+        with refill_lock:
+            with self._lock:
+                queued = set(self._queues.get(user_id, ()))
+                cursor = self._cursors.get(user_id)
+                exhausted_at = self._exhausted.get(user_id)
+            needed = (target or self.target_size) - len(queued)
+            if needed <= 0:
+                return
+            if exhausted_at is not None and time.monotonic() - exhausted_at < self.exhausted_retry_seconds:
+                return
+            seen = self._seen_set(user_id)
+            candidates, cursor = self._candidates(user_id, cursor, needed, queued, seen)
+            with self._lock:
+                queue = self._queues.setdefault(user_id, {})
+                for candidate_id in candidates:
+                    queue[candidate_id] = True
+                self._cursors[user_id] = cursor
+                if candidates:
+                    self._exhausted.pop(user_id, None)
+                else:
+                    self._exhausted[user_id] = time.monotonic()
+                self._queues.move_to_end(user_id)
+                self._evict()
+
+    def _candidates(self, user_id, cursor, needed, queued, seen):
+        """Up to `needed` new candidate ids, and the cursor for the next scan"""
+        if self.ranker is not None and self.ranker.ready:
+            candidates = self.ranker.top_k(user_id, needed, seen, queued)
+        else:
+            candidates, cursor = self._scan(user_id, cursor, needed, queued, seen)
+        if self.interests is not None and self.interests.ready:
+            similar = self.interests.similar(user_id, needed // self.similar_every + 1, seen, queued)
+            candidates = _interleave(candidates, similar, self.similar_every, needed)
+        return candidates, cursor
+
+    def _evict(self):
+        # Caller holds self._lock
+        while len(self._queues) > self.max_users:
+            user_id, _ = self._queues.popitem(last=False)
+            self._cursors.pop(user_id, None)
+            self._seen.pop(user_id, None)
+            self._exhausted.pop(user_id, None)
+            self._refill_locks.pop(user_id, None)
+
+    def _seen_set(self, user_id):
+        with self._lock:
+            entry = self._seen.get(user_id)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+
+        expires_at = time.monotonic() + self.seen_ttl_seconds
+        seen = SeenSet()
+        seen.add(self.dense_ids.index(user_id))
+        acted_on = (self._column_values('likes', 'liked_id', 'liker_id', user_id)
+                    + self._column_values('passes', 'passed_id', 'passer_id', user_id)
+                    + self._column_values('matches', 'user2_id', 'user1_id', user_id)
+                    + self._column_values('matches', 'user1_id', 'user2_id', user_id))
+        for candidate_id in acted_on:
+            seen.add(self.dense_ids.index(candidate_id))
+        with self._lock:
+            previous = self._seen.get(user_id)
+            if previous is not None:
+                # Keep what mark_seen() recorded while this was loading
+                seen.update(previous[0])
+            self._seen[user_id] = (seen, expires_at)
+            queue = self._queues.get(user_id)
+            if queue:
+                for candidate_id in [candidate_id for candidate_id in queue if self.dense_ids.index(candidate_id) in seen]:
+                    del queue[candidate_id]
+        return seen
+
+    def _column_values(self, table, column, owner_column, user_id):
+        values = []
+        start = 0
+        while True:
+            rows = (self.db.table(table).select(column).eq(owner_column, user_id)
+                    .order(column).range(start, start + PAGE_SIZE - 1).execute().data)
+            values.extend(row[column] for row in rows)
+            if len(rows) < PAGE_SIZE:
+                return values
+            start += PAGE_SIZE
+
+    def _scan(self, user_id, cursor, needed, queued, seen):
+        """Walk users from `cursor`, wrapping once, until `needed` candidates are found"""
+        if cursor is None:
+            # Start each user somewhere different so everyone isn't shown the same profiles
+            cursor = str(uuid.uuid4())
+        start = cursor
+        wrapped = False
+        candidates = []
+        while len(candidates) < needed:
+            query = self.db.table('users').select('id').not_.is_('name', 'null')
+            if cursor:
+                query = query.gt('id', cursor)
+            page = [row['id'] for row in query.order('id').limit(self.scan_batch).execute().data]
+            if not page:
+                if wrapped:
+                    break
+                wrapped, cursor = True, None
+                continue
+            if wrapped:
+                # Stop once the scan comes back round to where it started
+                page = [candidate_id for candidate_id in page if candidate_id <= start]
+                if not page:
+                    break
+
+            for candidate_id in page:
+                cursor = candidate_id
+                if candidate_id not in queued and self.dense_ids.index(candidate_id) not in seen:
+                    candidates.append(candidate_id)
+                    if len(candidates) == needed:
+                        break
+        return candidates, cursor
+
+def _interleave(primary, secondary, every, limit):
+    """Merge two candidate lists, every `every`-th from `secondary`, without repeats"""
+    merged = {}
+    primary, secondary = iter(primary), iter(secondary)
+    while len(merged) < limit:
+        source, other = (secondary, primary) if (len(merged) + 1) % every == 0 else (primary, secondary)
+        candidate = next(source, None)
+        if candidate is None:
+            # One list ran out; fill from the other
+            candidate = next(other, None)
+            if candidate is None:
+                break
+        merged[candidate] = True
+    return list(merged)
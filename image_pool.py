@@ -0,0 +1,149 @@
+# Fall In - Background image processing
+# Decoding and resizing photos is CPU-bound, so it runs in a small process
+# pool instead of on request threads. Uploads store the original and queue a
+# job; the variants appear in the media store once the job finishes, and
+# until then photo_url falls back to the original.
+#
+# At most max_pending jobs are queued or running. When the pool is full,
+# submit() waits briefly for a slot and then raises ImagePoolBusy, so a
+# signup burst slows uploads down instead of piling up unbounded work.
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from media_store import MediaStore
+from thumbnails import PHOTO_VARIANTS, render_variants
+
+class ImagePoolBusy(Exception):
+    """Raised when every slot in the image pool stays taken past the timeout"""
+
+def build_variants(media_root, digest):
+    """Pool task: decode a stored original and write its variants beside it"""
+    store = MediaStore(media_root)
+    # Pillow reads the file as it decodes instead of loading it whole
+    variants = render_variants(store.path_for(digest))
+    for variant, data in variants.items():
+        store.put_variant(digest, variant, data)
+    return sorted(variants)
+
+class ImagePool:
+    def __init__(self, media_root, workers=2, max_pending=16, submit_timeout=5.0):
+        self.media_root = media_root
+        self.workers = workers
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        # Digests whose image could not be decoded, so the same bytes aren't queued again
+        self._failed = set()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        # Process that created self._executor; a process forked from it
+        # (e.g. a server preloading the app) must start its own
+        self._owner_pid = None
+
+    def start(self):
+        """Start the workers now. Call it before the app starts any threads.
+
+        The workers are forked from the app process, which is cheap and does
+        not re-import app.py, but forking is only safe while no other thread
+        can be holding a lock. Workers replaced later (after one dies) come
+        from a fork server instead.
+        """
+        if multiprocessing.parent_process() is not None:
+            # app.py imported inside a worker has no use for a pool of its own
+            return
+        with self._lock:
+            if self._executor is None and 'fork' in multiprocessing.get_all_start_methods():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('fork'))
+                self._owner_pid = os.getpid()
+                # ProcessPoolExecutor forks all of its workers on the first submit
+                self._executor.submit(int)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._owner_pid != os.getpid():
+                self._executor = None
+            if self._executor is None:
+                # A fork server is started fresh with just this module
+                # preloaded, so workers are never forked from a process whose
+                # other threads may hold locks
+                context = None
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload(['image_pool'])
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._owner_pid = os.getpid()
+            return self._executor
+
+    def _reset_executor(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+
+    def needs_variants(self, digest):
+        store = MediaStore(self.media_root)
+        return not all(store.exists(digest, variant) for variant in PHOTO_VARIANTS)
+
+    def failed(self, digest):
+        """Whether building this digest's variants has already failed"""
+        with self._lock:
+            return digest in self._failed
+
+    def submit(self, digest, on_failure=None):
+        """Queue variant generation for a stored original.
+
+        `on_failure` is called with the digest if the image cannot be decoded.
+        """
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            raise ImagePoolBusy(f'{self.max_pending} images already waiting to be processed')
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(build_variants, self.media_root, digest)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool
+                self._reset_executor(executor)
+                future = self._get_executor().submit(build_variants, self.media_root, digest)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._pending += 1
+        future.add_done_callback(lambda done: self._finished(digest, done, on_failure))
+        return future
+
+    def _finished(self, digest, future, on_failure):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+        error = future.exception()
+        if error is None:
+            return
+        print(f"Error building variants for {digest}: {error}")
+        if isinstance(error, BrokenProcessPool):
+            self._reset_executor(self._executor)
+            return
+        # Recorded before on_failure runs, so an upload path that checks
+        # failed() after writing the digest cannot miss it
+        with self._lock:
+            self._failed.add(digest)
+        # Don't leave /media/<digest> serving bytes that are not a usable image
+        MediaStore(self.media_root).delete(digest, PHOTO_VARIANTS)
+        if on_failure:
+            on_failure(digest)
+
+    def pending(self):
+        """Jobs queued or running"""
+        with self._lock:
+            return self._pending
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,147 @@
+# Fall In - Interest index
+# A TF-IDF index over what people wrote on their profile: their bio and their
+# prompt answers. similar() finds the profiles whose words are closest
+# (cosine similarity) to the viewer's, as a "people like you" source of
+# discovery candidates.
+#
+# Each term keeps a postings dict of {dense user index: term frequency}, so
+# saving one profile only touches that profile's terms, and a query only
+# touches the viewer's (through NumPy copies of its postings, rebuilt after a
+# term changes). IDF weights are read at query time; each profile's
+# vector length is cached when it is written, so it lags slightly behind
+# IDF changes until the profile is written again or the index is reloaded.
+
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from ranking import top_candidates
+
+LOAD_PAGE_SIZE = 1000
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOP_WORDS = frozenset("""
+    a about all also am an and any are as at be because been but by can do for from get got has have
+    i i'm if in into is it it's its just like me more my not of on or our out so some than that the
+    their them then there they this to too up us very was we were what when who whoever will with
+    you your
+""".split())
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall((text or '').lower())
+            if len(token) > 1 and token not in STOP_WORDS]
+
+class InterestIndex:
+    def __init__(self, dense_ids, capacity=1024):
+        self.dense_ids = dense_ids
+        self.ready = False
+        self._lock = threading.Lock()
+        # term: column, and per column {dense index: 1 + log(count)}
+        self._terms = {}
+        self._postings = []
+        # column: (dense indexes, weights) arrays of the postings, built on first query
+        self._posting_arrays = {}
+        # dense index: {column: weight} for the profile's current text
+        self._documents = {}
+        self._norms = np.zeros(capacity, dtype=np.float32)
+
+    def load(self, db):
+        """Bulk load every completed profile's bio and prompt answers"""
+        started = time.perf_counter()
+        texts = {}
+        for row in self._pages(lambda: db.table('users').select('id, bio').not_.is_('name', 'null')):
+            texts.setdefault(row['id'], []).append(row['bio'])
+        for row in self._pages(lambda: db.table('user_prompts').select('id, user_id, prompt_answer')):
+            if row['user_id'] in texts:
+                texts[row['user_id']].append(row['prompt_answer'])
+        for user_id, user_texts in texts.items():
+            self.update_user(user_id, user_texts, refresh_norm=False)
+        with self._lock:
+            # Now that every document frequency is known
+            for index, document in self._documents.items():
+                self._norms[index] = self._norm(document)
+        self.ready = True
+        print(f"🔤 Interest index loaded for {len(texts)} users ({len(self._terms)} terms) in {time.perf_counter() - started:.2f}s")
+
+    @staticmethod
+    def _pages(query):
+        # `query` builds a fresh request each time; builders are not reusable
+        start = 0
+        while True:
+            rows = query().order('id').range(start, start + LOAD_PAGE_SIZE - 1).execute().data
+            yield from rows
+            if len(rows) < LOAD_PAGE_SIZE:
+                return
+            start += LOAD_PAGE_SIZE
+
+    def update_user(self, user_id, texts, refresh_norm=True):
+        """Replace a user's indexed text (bio and prompt answers)"""
+        index = self.dense_ids.index(user_id)
+        counts = Counter(token for text in texts for token in tokenize(text))
+        with self._lock:
+            for column in self._documents.pop(index, {}):
+                del self._postings[column][index]
+                self._posting_arrays.pop(column, None)
+            document = {}
+            for term, count in counts.items():
+                column = self._terms.get(term)
+                if column is None:
+                    column = self._terms[term] = len(self._postings)
+                    self._postings.append({})
+                document[column] = 1.0 + math.log(count)
+                self._postings[column][index] = document[column]
+                self._posting_arrays.pop(column, None)
+            if document:
+                self._documents[index] = document
+            if index >= len(self._norms):
+                norms = np.zeros(max(index + 1, len(self._norms) * 2), dtype=np.float32)
+                norms[:len(self._norms)] = self._norms
+                self._norms = norms
+            self._norms[index] = self._norm(document) if refresh_norm else 0.0
+
+    def _idf(self, column):
+        # Caller holds self._lock
+        return math.log((len(self._documents) + 1) / (len(self._postings[column]) + 1)) + 1.0
+
+    def _norm(self, document):
+        # Caller holds self._lock
+        return math.sqrt(sum((weight * self._idf(column)) ** 2 for column, weight in document.items()))
+
+    def _posting_array(self, column):
+        # Caller holds self._lock
+        arrays = self._posting_arrays.get(column)
+        if arrays is None:
+            postings = self._postings[column]
+            arrays = self._posting_arrays[column] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+            )
+        return arrays
+
+    def scores(self, viewer_id):
+        """Cosine similarity of every dense index's text with the viewer's (0 where there is none)"""
+        viewer = self.dense_ids.get(viewer_id)
+        with self._lock:
+            # Every index in the postings was assigned before this
+            size = len(self.dense_ids)
+            scores = np.zeros(size, dtype=np.float32)
+            document = self._documents.get(viewer)
+            if not document:
+                return scores
+            for column, weight in document.items():
+                indexes, weights = self._posting_array(column)
+                scores[indexes] += weight * self._idf(column) ** 2 * weights
+            norms = np.zeros(size, dtype=np.float32)
+            stored = min(size, len(self._norms))
+            norms[:stored] = self._norms[:stored]
+            viewer_norm = self._norm(document)
+        np.divide(scores, norms * viewer_norm, out=scores, where=norms > 0)
+        return scores
+
+    def similar(self, viewer_id, k, seen=None, exclude=()):
+        """Ids of up to k profiles whose text is most like the viewer's, most similar first"""
+        scores = self.scores(viewer_id)
+        return top_candidates(self.dense_ids, scores, scores > 0, viewer_id, k, seen, exclude)
@@ -0,0 +1,70 @@
+# Fall In - Like graph
+# Who has liked whom, held in process memory as adjacency sets of dense user
+# indexes (user_index.DenseIds) in both directions. "How many people are
+# waiting on A to like them back?" becomes a set lookup instead of a query
+# on likes.
+#
+# The graph is bulk loaded from likes once at startup, then kept current by
+# this process's like and unmatch writes. Like the discovery queue, each
+# worker process keeps its own copy, so it can be stale either way: a like
+# or an unmatch another worker recorded is not reflected. It is fine for
+# counts; anything that acts on whether a like exists asks the database.
+
+import threading
+import time
+
+PAGE_SIZE = 1000
+
+class LikeGraph:
+    def __init__(self, dense_ids):
+        self.dense_ids = dense_ids
+        self.ready = False
+        self._lock = threading.Lock()
+        # dense index: dense indexes they liked / who liked them
+        self._likes = {}
+        self._liked_by = {}
+
+    def load(self, db):
+        """Bulk load every like, a page at a time"""
+        started = time.perf_counter()
+        loaded = 0
+        start = 0
+        while True:
+            rows = (db.table('likes').select('liker_id, liked_id')
+                    .order('id').range(start, start + PAGE_SIZE - 1).execute().data)
+            for row in rows:
+                self.add(row['liker_id'], row['liked_id'])
+            loaded += len(rows)
+            if len(rows) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        self.ready = True
+        print(f"💞 Like graph loaded with {loaded} likes in {time.perf_counter() - started:.2f}s")
+
+    def add(self, liker_id, liked_id):
+        liker = self.dense_ids.index(liker_id)
+        liked = self.dense_ids.index(liked_id)
+        with self._lock:
+            self._likes.setdefault(liker, set()).add(liked)
+            self._liked_by.setdefault(liked, set()).add(liker)
+
+    def remove_pair(self, user_a, user_b):
+        """Forget the likes between two users in both directions (after an unmatch)"""
+        a = self.dense_ids.index(user_a)
+        b = self.dense_ids.index(user_b)
+        with self._lock:
+            for liker, liked in ((a, b), (b, a)):
+                self._likes.get(liker, set()).discard(liked)
+                self._liked_by.get(liked, set()).discard(liker)
+
+    def liked_by_count(self, user_id):
+        """How many people have liked the user"""
+        index = self.dense_ids.get(user_id)
+        with self._lock:
+            return len(self._liked_by.get(index, ()))
+
+    def pending_count(self, user_id):
+        """How many people liked the user without being liked back yet"""
+        index = self.dense_ids.get(user_id)
+        with self._lock:
+            return len(self._liked_by.get(index, set()) - self._likes.get(index, set()))
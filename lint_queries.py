@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Fall In Query Lint
+Fails if a route loads every column of `users`: a select('*') on the users
+table, a `users(*)` embed in another table's select, or get_users_by_ids with
+columns='*'. Routes should use the column sets in repository.py
+(USER_NAME_COLUMNS, USER_AVATAR_COLUMNS, USER_CARD_COLUMNS, USER_SELF_COLUMNS,
+USER_AUTH_COLUMNS) so hot pages never pull OTP codes or unused profile fields.
+
+Usage: python lint_queries.py [files...]   (default: app.py repository.py)
+"""
+
+import ast
+import re
+import sys
+
+DEFAULT_FILES = ['app.py', 'repository.py']
+USERS_EMBED_STAR = re.compile(r'users(![\w]+)?\(\s*\*\s*\)')
+
+def _string_value(node):
+    """The text of a string literal or the literal parts of an f-string"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        return ''.join(part.value for part in node.values if isinstance(part, ast.Constant))
+    return None
+
+def _selects_star(columns):
+    return any(column.strip() == '*' for column in columns.split(','))
+
+def _is_users_table(node):
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'table'
+            and node.args and _string_value(node.args[0]) == 'users')
+
+def _check_call(node):
+    func = node.func
+    name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+    first_arg = _string_value(node.args[0]) if node.args else None
+
+    if name == 'select' and _is_users_table(func.value):
+        if not node.args or (first_arg is not None and _selects_star(first_arg)):
+            return "select('*') on users"
+    if name == 'get_users_by_ids':
+        columns = node.args[2] if len(node.args) > 2 else next((k.value for k in node.keywords if k.arg == 'columns'), None)
+        if columns is not None and _string_value(columns) is not None and _selects_star(_string_value(columns)):
+            return "get_users_by_ids(columns='*')"
+    return None
+
+def lint_file(path):
+    with open(path) as source_file:
+        tree = ast.parse(source_file.read(), path)
+
+    problems = []
+    for function in ast.walk(tree):
+        if not isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for node in ast.walk(function):
+            problem = None
+            if isinstance(node, ast.Call):
+                problem = _check_call(node)
+            elif isinstance(node, (ast.Constant, ast.JoinedStr)):
+                text = _string_value(node)
+                if text and USERS_EMBED_STAR.search(text):
+                    problem = 'users(*) embed'
+            if problem:
+                problems.append(f'{path}:{node.lineno}: {function.name}: {problem}')
+    # A function nested in another is walked twice
+    return sorted(set(problems), key=lambda line: (line.split(':')[0], int(line.split(':')[1])))
+
+def main():
+    files = sys.argv[1:] or DEFAULT_FILES
+    problems = [problem for path in files for problem in lint_file(path)]
+    for problem in problems:
+        print(f'❌ {problem}')
+    if problems:
+        print(f'\n{len(problems)} full-row users queries; use a column set from repository.py')
+        return 1
+    print('✅ No full-row users queries')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
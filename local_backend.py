@@ -0,0 +1,678 @@
+# Fall In - In-memory local backend
+# A drop-in stand-in for the Supabase client that implements exactly the query
+# surface app.py uses: table().select/insert/update/delete, eq, neq, gt, lt,
+# in_, or_, ilike, is_, not_, order, limit, range, count='exact', embedded
+# `alias:users!fk(...)` selects and the rpc() functions from supabase_schema.sql.
+# Foreign-key columns are indexed so filters like `sender_id.eq.X` stay cheap
+# at realistic data sizes. Enable with DB_BACKEND=local.
+
+import random
+import re
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+def _new_id():
+    return str(uuid.uuid4())
+
+# table: {column: default}, callables are evaluated per row
+TABLES = {
+    'users': {
+        'id': _new_id, 'email': None, 'name': None, 'age': None, 'pronouns': None,
+        'department': None, 'year': None, 'looking_for': None, 'bio': None,
+        'profile_photo': None, 'is_verified': False, 'otp_code': None,
+        'otp_expires': None, 'last_active_at': None, 'created_at': _now,
+    },
+    'user_prompts': {'id': _new_id, 'user_id': None, 'prompt_question': None, 'prompt_answer': None, 'created_at': _now},
+    'matches': {'id': _new_id, 'user1_id': None, 'user2_id': None, 'matched_at': _now},
+    'likes': {'id': _new_id, 'liker_id': None, 'liked_id': None, 'liked_at': _now},
+    'passes': {'id': _new_id, 'passer_id': None, 'passed_id': None, 'passed_at': _now},
+    'chat_requests': {
+        'id': _new_id, 'requester_id': None, 'receiver_id': None, 'status': 'pending',
+        'created_at': _now, 'updated_at': _now,
+    },
+    'messages': {
+        'id': _new_id, 'sender_id': None, 'receiver_id': None, 'content': None,
+        'sent_at': _now, 'is_read': False,
+    },
+    'notifications': {
+        'id': _new_id, 'user_id': None, 'from_user_id': None, 'type': None,
+        'message': None, 'is_read': False, 'created_at': _now,
+    },
+    'confessions': {
+        'id': _new_id, 'user_id': None, 'content': None, 'category': None,
+        'likes_count': 0, 'views_count': 0, 'is_approved': True, 'created_at': _now,
+    },
+    'confession_likes': {'id': _new_id, 'confession_id': None, 'user_id': None, 'created_at': _now},
+    'confession_comments': {
+        'id': _new_id, 'confession_id': None, 'user_id': None, 'parent_comment_id': None,
+        'content': None, 'likes_count': 0, 'is_approved': True, 'created_at': _now,
+    },
+    'comment_likes': {'id': _new_id, 'comment_id': None, 'user_id': None, 'created_at': _now},
+    'conversations': {
+        'user_low': None, 'user_high': None, 'is_match': False, 'last_message': None,
+        'last_message_at': None, 'last_sender_id': None, 'unread_low': 0,
+        'unread_high': 0, 'updated_at': _now,
+    },
+}
+
+# (table, column): referenced table
+FOREIGN_KEYS = {
+    ('user_prompts', 'user_id'): 'users',
+    ('matches', 'user1_id'): 'users',
+    ('matches', 'user2_id'): 'users',
+    ('likes', 'liker_id'): 'users',
+    ('likes', 'liked_id'): 'users',
+    ('passes', 'passer_id'): 'users',
+    ('passes', 'passed_id'): 'users',
+    ('chat_requests', 'requester_id'): 'users',
+    ('chat_requests', 'receiver_id'): 'users',
+    ('messages', 'sender_id'): 'users',
+    ('messages', 'receiver_id'): 'users',
+    ('notifications', 'user_id'): 'users',
+    ('notifications', 'from_user_id'): 'users',
+    ('confessions', 'user_id'): 'users',
+    ('confession_likes', 'confession_id'): 'confessions',
+    ('confession_likes', 'user_id'): 'users',
+    ('confession_comments', 'confession_id'): 'confessions',
+    ('confession_comments', 'user_id'): 'users',
+    ('confession_comments', 'parent_comment_id'): 'confession_comments',
+    ('comment_likes', 'comment_id'): 'confession_comments',
+    ('comment_likes', 'user_id'): 'users',
+    ('conversations', 'user_low'): 'users',
+    ('conversations', 'user_high'): 'users',
+    ('conversations', 'last_sender_id'): 'users',
+}
+
+UNIQUE_CONSTRAINTS = {
+    'users': [('id',), ('email',)],
+    'user_prompts': [('id',)],
+    'matches': [('id',), ('user1_id', 'user2_id')],
+    'likes': [('id',), ('liker_id', 'liked_id')],
+    'passes': [('id',), ('passer_id', 'passed_id')],
+    'chat_requests': [('id',), ('requester_id', 'receiver_id')],
+    'messages': [('id',)],
+    'notifications': [('id',)],
+    'confessions': [('id',)],
+    'confession_likes': [('id',), ('confession_id', 'user_id')],
+    'confession_comments': [('id',)],
+    'comment_likes': [('id',), ('comment_id', 'user_id')],
+    'conversations': [('user_low', 'user_high')],
+}
+
+TIMESTAMP_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}')
+
+class LocalAPIError(Exception):
+    """Raised where PostgREST would return an error response"""
+
+class LocalResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+def _parse_timestamp(value):
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def _coerce(row_value, value):
+    """Bring a filter value to the type of the stored column value"""
+    if row_value is None or value is None:
+        return row_value, value
+    if isinstance(row_value, bool):
+        return row_value, value if isinstance(value, bool) else str(value).lower() == 'true'
+    if isinstance(row_value, (int, float)):
+        return row_value, float(value)
+    value = str(value)
+    if TIMESTAMP_PATTERN.match(row_value) and TIMESTAMP_PATTERN.match(value):
+        return _parse_timestamp(row_value), _parse_timestamp(value)
+    return row_value, value
+
+def _sort_key(value):
+    if value is None:
+        return (True, 0)
+    if isinstance(value, str) and TIMESTAMP_PATTERN.match(value):
+        return (False, _parse_timestamp(value))
+    return (False, value)
+
+def _like_to_regex(pattern):
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile('^' + ''.join(parts) + '$', re.IGNORECASE | re.DOTALL)
+
+def _split_top_level(text):
+    """Split on commas that are not inside parentheses or double quotes"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        if char == ',' and depth == 0 and not quoted:
+            parts.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if current:
+        parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+def _parse_logic(text):
+    """Parse a PostgREST logic tree like `a.eq.1,and(b.gt.2,c.is.null)`"""
+    conditions = []
+    for part in _split_top_level(text):
+        for group in ('and', 'or'):
+            if part.startswith(group + '(') and part.endswith(')'):
+                conditions.append((group, _parse_logic(part[len(group) + 1:-1])))
+                break
+        else:
+            column, rest = part.split('.', 1)
+            negate = rest.startswith('not.')
+            if negate:
+                rest = rest[4:]
+            operator, value = rest.split('.', 1)
+            if operator == 'in':
+                value = [_unquote(item) for item in _split_top_level(value.strip('()'))]
+            elif operator == 'is':
+                value = None if value == 'null' else value
+            else:
+                value = _unquote(value)
+            conditions.append(('cond', column, operator, value, negate))
+    return conditions
+
+def _matches(row, condition):
+    kind = condition[0]
+    if kind == 'and':
+        return all(_matches(row, child) for child in condition[1])
+    if kind == 'or':
+        return any(_matches(row, child) for child in condition[1])
+
+    _, column, operator, value, negate = condition
+    row_value = row.get(column)
+    if operator == 'is':
+        if value is None:
+            result = row_value is None
+        else:
+            result = row_value is (str(value).lower() == 'true')
+    elif row_value is None:
+        result = False
+    elif operator == 'in':
+        result = any(left == right for left, right in (_coerce(row_value, item) for item in value))
+    elif operator == 'ilike':
+        result = bool(_like_to_regex(str(value)).match(str(row_value)))
+    else:
+        left, right = _coerce(row_value, value)
+        result = {
+            'eq': lambda: left == right,
+            'neq': lambda: left != right,
+            'gt': lambda: left > right,
+            'gte': lambda: left >= right,
+            'lt': lambda: left < right,
+            'lte': lambda: left <= right,
+        }[operator]()
+    return not result if negate else result
+
+def _parse_select(columns):
+    """Parse a select string into [(alias, column)] and [(alias, table, fk, sub_columns)]"""
+    fields, embeds = [], []
+    for item in _split_top_level(columns):
+        alias = None
+        if ':' in item.split('(', 1)[0]:
+            alias, item = item.split(':', 1)
+        if '(' in item:
+            resource, sub_columns = item.split('(', 1)
+            table, _, fk = resource.partition('!')
+            embeds.append((alias or table, table, fk or None, sub_columns[:-1]))
+        else:
+            fields.append((alias or item, item))
+    return fields, embeds
+
+class _Table:
+    def __init__(self, name):
+        self.name = name
+        self.rows = {}
+        self.indexes = {column: {} for (table, column) in FOREIGN_KEYS if table == name}
+        for constraint in UNIQUE_CONSTRAINTS.get(name, []):
+            if len(constraint) == 1:
+                self.indexes[constraint[0]] = {}
+        self.unique = {constraint: {} for constraint in UNIQUE_CONSTRAINTS.get(name, [])}
+        self._next_rowid = 0
+
+    def insert(self, values):
+        row = {}
+        for column, default in TABLES[self.name].items():
+            row[column] = default() if callable(default) else default
+        for column, value in values.items():
+            if column not in TABLES[self.name]:
+                raise LocalAPIError(f"Could not find the '{column}' column of '{self.name}'")
+            row[column] = value
+
+        for constraint, seen in self.unique.items():
+            key = tuple(row[column] for column in constraint)
+            if None not in key and key in seen:
+                raise LocalAPIError(f'duplicate key value violates unique constraint on {self.name}{constraint}')
+
+        rowid = self._next_rowid
+        self._next_rowid += 1
+        self.rows[rowid] = row
+        self._index(rowid, row)
+        return row
+
+    def update(self, rowid, values):
+        row = self.rows[rowid]
+        updated = dict(row, **values)
+        for constraint, seen in self.unique.items():
+            key = tuple(updated[column] for column in constraint)
+            if None not in key and seen.get(key, rowid) != rowid:
+                raise LocalAPIError(f'duplicate key value violates unique constraint on {self.name}{constraint}')
+        self._unindex(rowid, row)
+        row.update(values)
+        self._index(rowid, row)
+        return row
+
+    def delete(self, rowid):
+        row = self.rows.pop(rowid)
+        self._unindex(rowid, row)
+        return row
+
+    def _index(self, rowid, row):
+        for column, index in self.indexes.items():
+            index.setdefault(row.get(column), set()).add(rowid)
+        for constraint, seen in self.unique.items():
+            seen[tuple(row[column] for column in constraint)] = rowid
+
+    def _unindex(self, rowid, row):
+        for column, index in self.indexes.items():
+            bucket = index.get(row.get(column))
+            if bucket:
+                bucket.discard(rowid)
+                if not bucket:
+                    del index[row.get(column)]
+        for constraint, seen in self.unique.items():
+            seen.pop(tuple(row[column] for column in constraint), None)
+
+    def candidates(self, condition):
+        """Row ids that may satisfy a condition, from the indexes, or None for a full scan"""
+        kind = condition[0]
+        if kind == 'and':
+            narrowed = [rowids for rowids in (self.candidates(child) for child in condition[1]) if rowids is not None]
+            return min(narrowed, key=len) if narrowed else None
+        if kind == 'or':
+            union = set()
+            for child in condition[1]:
+                rowids = self.candidates(child)
+                if rowids is None:
+                    return None
+                union |= rowids
+            return union
+
+        _, column, operator, value, negate = condition
+        index = self.indexes.get(column)
+        if index is None or negate:
+            return None
+        if operator == 'eq':
+            return index.get(str(value), set())
+        if operator == 'in':
+            return set().union(*(index.get(str(item), set()) for item in value))
+        return None
+
+class _Negator:
+    def __init__(self, query):
+        self._query = query
+
+    def __getattr__(self, name):
+        method = getattr(self._query, name)
+        def negated(*args, **kwargs):
+            self._query._negate_next = True
+            return method(*args, **kwargs)
+        return negated
+
+class LocalQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.action = 'select'
+        self.columns = '*'
+        self.count = None
+        self.payload = None
+        self.conditions = []
+        self.ordering = []
+        self.limit_count = None
+        self.offset = 0
+        self._negate_next = False
+
+    # Actions
+    def select(self, columns='*', count=None):
+        self.action, self.columns, self.count = 'select', columns, count
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = 'insert', rows
+        return self
+
+    def update(self, values):
+        self.action, self.payload = 'update', values
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    # Filters
+    def _filter(self, column, operator, value):
+        self.conditions.append(('cond', column, operator, value, self._negate_next))
+        self._negate_next = False
+        return self
+
+    @property
+    def not_(self):
+        return _Negator(self)
+
+    def eq(self, column, value):
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column, value):
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column, value):
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._filter(column, 'lte', value)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, 'ilike', pattern)
+
+    def is_(self, column, value):
+        return self._filter(column, 'is', None if value in (None, 'null') else value)
+
+    def in_(self, column, values):
+        return self._filter(column, 'in', [str(value) for value in values])
+
+    def or_(self, filters):
+        self.conditions.append(('or', _parse_logic(filters)))
+        return self
+
+    # Modifiers
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def range(self, start, end):
+        self.offset, self.limit_count = start, end - start + 1
+        return self
+
+    def execute(self):
+        with self.client.lock:
+            return getattr(self, f'_execute_{self.action}')()
+
+    def _matching_rowids(self, table):
+        condition = ('and', self.conditions)
+        candidates = table.candidates(condition)
+        rowids = table.rows.keys() if candidates is None else sorted(candidates)
+        return [rowid for rowid in rowids if _matches(table.rows[rowid], condition)]
+
+    def _execute_select(self):
+        table = self.client.tables[self.table]
+        rows = [table.rows[rowid] for rowid in self._matching_rowids(table)]
+        total = len(rows)
+        for column, desc in reversed(self.ordering):
+            rows.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+        end = None if self.limit_count is None else self.offset + self.limit_count
+        rows = rows[self.offset:end]
+        return LocalResponse([self.client.project(self.table, row, self.columns) for row in rows],
+                             total if self.count else None)
+
+    def _execute_insert(self):
+        table = self.client.tables[self.table]
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        return LocalResponse([dict(table.insert(values)) for values in rows])
+
+    def _execute_update(self):
+        table = self.client.tables[self.table]
+        return LocalResponse([dict(table.update(rowid, self.payload)) for rowid in self._matching_rowids(table)])
+
+    def _execute_delete(self):
+        table = self.client.tables[self.table]
+        return LocalResponse([table.delete(rowid) for rowid in self._matching_rowids(table)])
+
+class _RpcCall:
+    def __init__(self, client, function, params):
+        self.client = client
+        self.function = function
+        self.params = params
+
+    def execute(self):
+        with self.client.lock:
+            return LocalResponse(self.function(self.client, **self.params))
+
+class LocalClient:
+    """In-memory replacement for supabase.Client"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.tables = {name: _Table(name) for name in TABLES}
+        self.functions = dict(RPC_FUNCTIONS)
+
+    def table(self, name):
+        if name not in self.tables:
+            raise LocalAPIError(f"relation '{name}' does not exist")
+        return LocalQuery(self, name)
+
+    def rpc(self, name, params=None):
+        if name not in self.functions:
+            raise LocalAPIError(f'function {name} does not exist')
+        return _RpcCall(self, self.functions[name], params or {})
+
+    def project(self, table_name, row, columns):
+        fields, embeds = _parse_select(columns)
+        projected = {}
+        for alias, column in fields:
+            if column == '*':
+                projected.update(row)
+            else:
+                projected[alias] = row.get(column)
+        for alias, target, fk, sub_columns in embeds:
+            column = self._embed_column(table_name, target, fk)
+            target_table = self.tables[target]
+            rowids = target_table.indexes['id'].get(row.get(column), ())
+            projected[alias] = self.project(target, target_table.rows[next(iter(rowids))], sub_columns) if rowids else None
+        return projected
+
+    def _embed_column(self, table_name, target, fk):
+        if fk:
+            column = fk[len(table_name) + 1:-len('_fkey')] if fk.startswith(table_name + '_') and fk.endswith('_fkey') else fk
+            if FOREIGN_KEYS.get((table_name, column)) == target:
+                return column
+            raise LocalAPIError(f"Could not find a relationship between '{table_name}' and '{target}' using '{fk}'")
+        candidates = [column for (table, column), referenced in FOREIGN_KEYS.items() if table == table_name and referenced == target]
+        if len(candidates) != 1:
+            raise LocalAPIError(f"Could not embed '{target}' on '{table_name}' without a foreign key hint")
+        return candidates[0]
+
+    def _rows(self, table_name, **equals):
+        """(rowid, row) pairs whose columns equal `equals`, looked up through the table's indexes"""
+        table = self.tables[table_name]
+        for constraint, seen in table.unique.items():
+            if set(constraint) == set(equals):
+                rowid = seen.get(tuple(equals[column] for column in constraint))
+                return [] if rowid is None else [(rowid, table.rows[rowid])]
+        buckets = [table.indexes[column].get(value, set()) for column, value in equals.items() if column in table.indexes]
+        rowids = sorted(min(buckets, key=len)) if buckets else list(table.rows)
+        return [(rowid, table.rows[rowid]) for rowid in rowids
+                if all(table.rows[rowid].get(column) == value for column, value in equals.items())]
+
+# Python versions of the functions in supabase_schema.sql
+def _rpc_open_conversation(client, p_user_a, p_user_b, p_is_match):
+    user_low, user_high = min(p_user_a, p_user_b), max(p_user_a, p_user_b)
+    existing = client._rows('conversations', user_low=user_low, user_high=user_high)
+    if existing:
+        rowid, row = existing[0]
+        client.tables['conversations'].update(rowid, {'is_match': row['is_match'] or p_is_match, 'updated_at': _now()})
+    else:
+        client.tables['conversations'].insert({'user_low': user_low, 'user_high': user_high, 'is_match': p_is_match})
+    return None
+
+def _rpc_record_conversation_message(client, p_sender, p_receiver, p_content, p_sent_at):
+    user_low, user_high = min(p_sender, p_receiver), max(p_sender, p_receiver)
+    unread_column = 'unread_low' if p_receiver == user_low else 'unread_high'
+    values = {'last_message': p_content, 'last_message_at': p_sent_at, 'last_sender_id': p_sender, 'updated_at': _now()}
+    existing = client._rows('conversations', user_low=user_low, user_high=user_high)
+    if existing:
+        rowid, row = existing[0]
+        values[unread_column] = row[unread_column] + 1
+        client.tables['conversations'].update(rowid, values)
+    else:
+        values[unread_column] = 1
+        client.tables['conversations'].insert(dict(values, user_low=user_low, user_high=user_high))
+    return None
+
+def _rpc_mark_conversation_read(client, p_reader, p_other):
+    user_low, user_high = min(p_reader, p_other), max(p_reader, p_other)
+    unread_column = 'unread_low' if p_reader == user_low else 'unread_high'
+    for rowid, row in client._rows('conversations', user_low=user_low, user_high=user_high):
+        client.tables['conversations'].update(rowid, {unread_column: 0, 'updated_at': _now()})
+    return None
+
+def _rpc_set_profile_photos(client, p_updates):
+    users = client.tables['users']
+    updated = 0
+    for update in p_updates:
+        for rowid in list(users.indexes['id'].get(update['id'], ())):
+            if (users.rows[rowid].get('profile_photo') or '').startswith('data:image'):
+                users.update(rowid, {'profile_photo': update['profile_photo']})
+                updated += 1
+    return updated
+
+def _rpc_record_like(client, p_liker, p_liked):
+    # The client lock is held, so this runs as one step like the SQL transaction
+    if client._rows('likes', liker_id=p_liker, liked_id=p_liked):
+        return {'status': 'already_liked'}
+    client.tables['likes'].insert({'liker_id': p_liker, 'liked_id': p_liked})
+
+    def name_of(user_id):
+        rows = client._rows('users', id=user_id)
+        return (rows[0][1]['name'] if rows else None) or 'Someone'
+    liker_name, liked_name = name_of(p_liker), name_of(p_liked)
+
+    notifications = client.tables['notifications']
+    if client._rows('likes', liker_id=p_liked, liked_id=p_liker):
+        user_low, user_high = min(p_liker, p_liked), max(p_liker, p_liked)
+        if not client._rows('matches', user1_id=user_low, user2_id=user_high):
+            client.tables['matches'].insert({'user1_id': user_low, 'user2_id': user_high})
+        _rpc_open_conversation(client, p_liker, p_liked, True)
+        between = (client._rows('notifications', user_id=p_liker, from_user_id=p_liked)
+                   + client._rows('notifications', user_id=p_liked, from_user_id=p_liker))
+        for rowid, row in between:
+            notifications.delete(rowid)
+        notifications.insert({'user_id': p_liker, 'from_user_id': p_liked, 'type': 'match', 'message': f"It's a match with {liked_name}! 💕"})
+        notifications.insert({'user_id': p_liked, 'from_user_id': p_liker, 'type': 'match', 'message': f"It's a match with {liker_name}! 💕"})
+        return {'status': 'matched', 'name': liked_name}
+
+    for rowid, row in client._rows('notifications', user_id=p_liked, from_user_id=p_liker, type='like'):
+        notifications.delete(rowid)
+    notifications.insert({'user_id': p_liked, 'from_user_id': p_liker, 'type': 'like', 'message': f'{liker_name} liked your profile! 💖'})
+    return {'status': 'liked', 'name': liked_name}
+
+RPC_FUNCTIONS = {
+    'open_conversation': _rpc_open_conversation,
+    'record_conversation_message': _rpc_record_conversation_message,
+    'mark_conversation_read': _rpc_mark_conversation_read,
+    'set_profile_photos': _rpc_set_profile_photos,
+    'record_like': _rpc_record_like,
+}
+
+# Synthetic data for offline runs and benchmarks
+FIRST_NAMES = ['Aarav', 'Aditi', 'Alex', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Maya', 'Nikhil',
+               'Priya', 'Rahul', 'Riya', 'Rohan', 'Sam', 'Sara', 'Tara', 'Varun', 'Vikram', 'Zoya']
+LAST_NAMES = ['Iyer', 'Kapoor', 'Khan', 'Menon', 'Nair', 'Patel', 'Rao', 'Reddy', 'Shah', 'Singh']
+DEPARTMENTS = ['Computer Science', 'Engineering', 'Psychology', 'Business', 'Biology', 'Design', 'Economics', 'Physics']
+YEARS = ['1st Year', '2nd Year', '3rd Year', '4th Year', 'Graduate']
+LOOKING_FOR = ['dating', 'relationship', 'friendship', 'study buddy']
+PROMPT_QUESTIONS = ['What makes you laugh?', 'My ideal study buddy is...', 'Best campus spot?']
+PROMPT_ANSWERS = ['Bad puns and good memes', 'Someone who brings snacks and good vibes', 'The library rooftop at sunset',
+                  'Late night chai runs', 'Whoever explains recursion with drawings', 'The quiet corner of the lab']
+CONFESSION_CATEGORIES = ['crush', 'missed', 'confession', 'rant', 'appreciation', 'advice']
+
+def seed(client, users=500, likes_per_user=20, messages_per_match=30, confessions=200, random_seed=42):
+    """Fill a LocalClient with a campus-sized synthetic dataset; returns the user ids"""
+    rng = random.Random(random_seed)
+    start = datetime.now(timezone.utc) - timedelta(days=60)
+
+    def timestamp(offset_seconds):
+        return (start + timedelta(seconds=offset_seconds)).isoformat(timespec='microseconds')
+
+    with client.lock:
+        user_ids = []
+        for index in range(users):
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            user = client.tables['users'].insert({
+                'email': f'user{index}@example.com', 'name': name, 'age': rng.randint(18, 26),
+                'pronouns': rng.choice(['she/her', 'he/him', 'they/them']),
+                'department': rng.choice(DEPARTMENTS), 'year': rng.choice(YEARS),
+                'looking_for': rng.choice(LOOKING_FOR), 'bio': f'Hi, I am {name.split()[0]}!',
+                'is_verified': True, 'created_at': timestamp(index * 60),
+                'last_active_at': timestamp(rng.randint(index * 60, 60 * 86400)),
+            })
+            user_ids.append(user['id'])
+            for question in PROMPT_QUESTIONS:
+                client.tables['user_prompts'].insert({'user_id': user['id'], 'prompt_question': question, 'prompt_answer': rng.choice(PROMPT_ANSWERS)})
+
+        liked = set()
+        for liker in user_ids:
+            for liked_id in rng.sample(user_ids, min(likes_per_user, users - 1)):
+                if liked_id != liker and (liker, liked_id) not in liked:
+                    liked.add((liker, liked_id))
+                    client.tables['likes'].insert({'liker_id': liker, 'liked_id': liked_id})
+
+        clock = users * 60
+        for liker, liked_id in liked:
+            if liker < liked_id and (liked_id, liker) in liked:
+                client.tables['matches'].insert({'user1_id': liker, 'user2_id': liked_id, 'matched_at': timestamp(clock)})
+                _rpc_open_conversation(client, liker, liked_id, True)
+                for message_index in range(messages_per_match):
+                    clock += rng.randint(1, 600)
+                    sender, receiver = (liker, liked_id) if rng.random() < 0.5 else (liked_id, liker)
+                    message = client.tables['messages'].insert({
+                        'sender_id': sender, 'receiver_id': receiver, 'content': f'Message {message_index}',
+                        'sent_at': timestamp(clock), 'is_read': message_index < messages_per_match - 3,
+                    })
+                    _rpc_record_conversation_message(client, sender, receiver, message['content'], message['sent_at'])
+                    if message['is_read']:
+                        _rpc_mark_conversation_read(client, receiver, sender)
+            elif (liked_id, liker) not in liked:
+                client.tables['notifications'].insert({'user_id': liked_id, 'from_user_id': liker, 'type': 'like', 'message': 'Someone liked your profile! 💖'})
+
+        for index in range(confessions):
+            client.tables['confessions'].insert({
+                'user_id': rng.choice(user_ids), 'content': f'Confession number {index}',
+                'category': rng.choice(CONFESSION_CATEGORIES), 'created_at': timestamp(index * 300),
+            })
+    return user_ids
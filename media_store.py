@@ -0,0 +1,136 @@
+# Fall In - Content-addressed media store
+# Uploaded images are written once to local disk under the SHA-256 of their
+# bytes. users.profile_photo keeps only that hash and browsers load the image
+# from /media/<hash>; the bytes behind a hash never change, so responses can
+# be cached forever. Resized variants of an image are stored beside it as
+# <hash>.<variant> and served from /media/<hash>/<variant>.
+#
+# Uploads are copied in with put_stream(), which spools the request body to
+# disk in fixed-size chunks while hashing it, so memory per upload stays at
+# one chunk whatever the file size.
+
+import hashlib
+import os
+import re
+import tempfile
+
+MEDIA_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+VARIANT_NAME_PATTERN = re.compile(r'^[a-z]+$')
+
+# Leading bytes of the image formats accepted for profile photos
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+SNIFF_BYTES = 16
+CHUNK_SIZE = 64 * 1024
+
+class UnsupportedImage(ValueError):
+    """Raised for uploads whose leading bytes are not a supported image format"""
+
+def is_media_hash(value):
+    return isinstance(value, str) and bool(MEDIA_HASH_PATTERN.match(value))
+
+def sniff_image_type(header):
+    """MIME type for the leading bytes of an image, or None if not a known format"""
+    for signature, mimetype in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return mimetype
+    return None
+
+class MediaStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, digest):
+        # Fan out by hash prefix to keep directories small
+        return os.path.join(self.root, digest[:2], digest)
+
+    def variant_path_for(self, digest, variant):
+        return f'{self.path_for(digest)}.{variant}'
+
+    def exists(self, digest, variant=None):
+        if not is_media_hash(digest):
+            return False
+        if variant is None:
+            return os.path.exists(self.path_for(digest))
+        return bool(VARIANT_NAME_PATTERN.match(variant)) and os.path.exists(self.variant_path_for(digest, variant))
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(data)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+    def put(self, data):
+        """Store bytes and return their hash. Storing the same bytes twice is a no-op."""
+        digest = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self.path_for(digest)):
+            self._write(self.path_for(digest), data)
+        return digest
+
+    def put_stream(self, stream, chunk_size=CHUNK_SIZE):
+        """Copy an uploaded image into the store chunk by chunk and return its hash.
+
+        Raises UnsupportedImage before anything is written if the first bytes
+        are not a PNG, JPEG or GIF header.
+        """
+        chunk = stream.read(chunk_size)
+        if not sniff_image_type(chunk[:SNIFF_BYTES]):
+            raise UnsupportedImage('not a PNG, JPEG or GIF image')
+
+        hasher = hashlib.sha256()
+        # Spool into the store root so the final rename stays on one filesystem
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                while chunk:
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+                    chunk = stream.read(chunk_size)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+
+            digest = hasher.hexdigest()
+            path = self.path_for(digest)
+            if os.path.exists(path):
+                os.unlink(temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return digest
+
+    def put_variant(self, digest, variant, data):
+        """Store a resized copy of the image `digest`"""
+        self._write(self.variant_path_for(digest, variant), data)
+
+    def delete(self, digest, variants=()):
+        """Remove an image and the named variants of it, if they are stored"""
+        if not is_media_hash(digest):
+            return
+        paths = [self.path_for(digest)] + [self.variant_path_for(digest, variant) for variant in variants]
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def content_type(self, digest, variant=None):
+        path = self.path_for(digest) if variant is None else self.variant_path_for(digest, variant)
+        with open(path, 'rb') as blob:
+            return sniff_image_type(blob.read(SNIFF_BYTES)) or 'application/octet-stream'
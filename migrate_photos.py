@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Fall In Profile Photo Migration
+Moves profile photos stored as base64 data URLs in users.profile_photo into
+the media store (MEDIA_ROOT) and rewrites the column to the content hash.
+
+Users are read in id order, a batch at a time. Each batch is decoded, written
+to disk with its resized variants, then pointed at the new hashes with one
+set_profile_photos() call. Progress is checkpointed after every batch, so an
+interrupted run picks up where it stopped. The app keeps serving throughout:
+rows not yet migrated still render from their data URL.
+
+Usage: python migrate_photos.py [--batch-size 50] [--workers 4] [--restart]
+"""
+
+import argparse
+import base64
+import binascii
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+from image_pool import build_variants
+from media_store import MediaStore, sniff_image_type, SNIFF_BYTES
+
+DEFAULT_CHECKPOINT = '.photo_migration.json'
+
+def decode_data_url(value):
+    """Image bytes from a `data:image/...;base64,` URL, or None if it is not one"""
+    header, separator, payload = value.partition(',')
+    if not separator or not header.startswith('data:image') or not header.endswith(';base64'):
+        return None
+    try:
+        data = base64.b64decode(payload)
+    except (binascii.Error, ValueError):
+        return None
+    return data if sniff_image_type(data[:SNIFF_BYTES]) else None
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {'last_id': None, 'migrated': 0, 'skipped': [], 'bytes_moved': 0}
+    with open(path) as checkpoint_file:
+        return json.load(checkpoint_file)
+
+def save_checkpoint(path, checkpoint):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, indent=2)
+    os.replace(temp_path, path)
+
+def fetch_batch(db, last_id, batch_size):
+    query = db.table('users').select('id, profile_photo').ilike('profile_photo', 'data:image%')
+    if last_id:
+        query = query.gt('id', last_id)
+    return query.order('id').limit(batch_size).execute().data
+
+def migrate_batch(rows, media_store, executor):
+    """Store a batch of photos; returns ({user_id: hash}, [skipped user ids], bytes stored)"""
+    digests = {}
+    skipped = []
+    stored_bytes = 0
+    for row in rows:
+        data = decode_data_url(row['profile_photo'])
+        if data is None:
+            skipped.append(row['id'])
+            continue
+        digests[row['id']] = media_store.put(data)
+        stored_bytes += len(row['profile_photo'])
+
+    # Build variants in parallel; a photo that will not decode keeps its data URL
+    unique = sorted(set(digests.values()))
+    results = executor.map(_try_build_variants, [media_store.root] * len(unique), unique)
+    failed = {digest for digest, ok in zip(unique, results) if not ok}
+    for user_id, digest in list(digests.items()):
+        if digest in failed:
+            skipped.append(user_id)
+            del digests[user_id]
+    return digests, skipped, stored_bytes
+
+def _try_build_variants(media_root, digest):
+    try:
+        build_variants(media_root, digest)
+        return True
+    except Exception as e:
+        print(f'   ⚠️  could not decode {digest}: {e}')
+        return False
+
+def migrate(db, media_store, checkpoint_path, batch_size=50, workers=None):
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint['last_id']:
+        print(f"↩️  Resuming after user {checkpoint['last_id']} ({checkpoint['migrated']} already migrated)")
+
+    started = time.perf_counter()
+    run_rows = 0
+    run_bytes = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            rows = fetch_batch(db, checkpoint['last_id'], batch_size)
+            if not rows:
+                break
+
+            batch_started = time.perf_counter()
+            digests, skipped, stored_bytes = migrate_batch(rows, media_store, executor)
+            updated = 0
+            if digests:
+                updates = [{'id': user_id, 'profile_photo': digest} for user_id, digest in digests.items()]
+                updated = db.rpc('set_profile_photos', {'p_updates': updates}).execute().data or 0
+
+            checkpoint['last_id'] = rows[-1]['id']
+            checkpoint['migrated'] += updated
+            checkpoint['skipped'].extend(skipped)
+            checkpoint['bytes_moved'] += stored_bytes
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            run_rows += len(rows)
+            run_bytes += stored_bytes
+            elapsed = time.perf_counter() - batch_started
+            print(f'✅ {len(rows)} rows ({updated} updated, {len(skipped)} skipped) in {elapsed:.2f}s '
+                  f'- {len(rows) / elapsed:.1f} rows/s, {stored_bytes / elapsed / 1e6:.1f} MB/s')
+
+    elapsed = time.perf_counter() - started
+    print(f"\n🏁 Done: {checkpoint['migrated']} photos migrated, {len(checkpoint['skipped'])} skipped, "
+          f"{checkpoint['bytes_moved'] / 1e6:.1f} MB moved out of users.profile_photo")
+    if run_rows:
+        print(f'   This run: {run_rows} rows in {elapsed:.1f}s ({run_rows / elapsed:.1f} rows/s, {run_bytes / elapsed / 1e6:.1f} MB/s)')
+    if checkpoint['skipped']:
+        print(f"   Skipped user ids are listed in {checkpoint_path}")
+    return checkpoint
+
+def main():
+    parser = argparse.ArgumentParser(description='Move base64 profile photos into the media store')
+    parser.add_argument('--batch-size', type=int, default=50, help='users per batch')
+    parser.add_argument('--workers', type=int, default=None, help='processes building variants (default: CPU count)')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='progress file used to resume')
+    parser.add_argument('--restart', action='store_true', help='ignore any saved progress')
+    args = parser.parse_args()
+
+    load_dotenv()
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    if not supabase_url or not supabase_key:
+        print('❌ SUPABASE_URL and SUPABASE_KEY must be set')
+        return 1
+
+    from supabase import create_client
+    db = create_client(supabase_url, supabase_key)
+    media_root = os.getenv('MEDIA_ROOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media'))
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    print(f'🚚 Migrating profile photos into {media_root}')
+    migrate(db, MediaStore(media_root), args.checkpoint, batch_size=args.batch_size, workers=args.workers)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# Fall In - Direct PostgreSQL backend for hot-path queries
+# Runs the queries behind repository.PostgrestQueries on a pooled psycopg2
+# connection with server-side prepared statements, skipping the PostgREST
+# HTTP round trip and JSON encoding. Enable with DB_BACKEND=postgres and
+# DATABASE_URL (Supabase Dashboard > Settings > Database).
+#
+# The statements are prepared once per connection (session-level PREPARE),
+# so DATABASE_URL must be a direct connection or a session-mode pooler
+# (port 5432), not a transaction-mode pooler (pgbouncer, port 6543), where
+# consecutive transactions can land on different server connections.
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
+MESSAGE_COLUMNS = 'id, sender_id, receiver_id, content, sent_at, is_read'
+CONVERSATION_FILTER = '((sender_id = $1 AND receiver_id = $2) OR (sender_id = $2 AND receiver_id = $1))'
+
+# name: (parameter types, statement)
+PREPARED_STATEMENTS = {
+    'has_like': ('uuid, uuid', 'SELECT 1 FROM likes WHERE liker_id = $1 AND liked_id = $2 LIMIT 1'),
+    'can_chat': ('uuid, uuid', """
+        SELECT EXISTS (
+            SELECT 1 FROM matches
+            WHERE (user1_id = $1 AND user2_id = $2) OR (user1_id = $2 AND user2_id = $1)
+        ) OR EXISTS (
+            SELECT 1 FROM chat_requests
+            WHERE status = 'accepted'
+              AND ((requester_id = $1 AND receiver_id = $2) OR (requester_id = $2 AND receiver_id = $1))
+        ) AS can_chat"""),
+    'latest_messages': ('uuid, uuid, integer', f"""
+        SELECT {MESSAGE_COLUMNS} FROM messages
+        WHERE {CONVERSATION_FILTER}
+        ORDER BY sent_at DESC, id DESC LIMIT $3"""),
+    'messages_after': ('uuid, uuid, timestamptz, uuid, integer', f"""
+        SELECT {MESSAGE_COLUMNS} FROM messages
+        WHERE {CONVERSATION_FILTER} AND (sent_at, id) > ($3, $4)
+        ORDER BY sent_at, id LIMIT $5"""),
+    'messages_before': ('uuid, uuid, timestamptz, uuid, integer', f"""
+        SELECT {MESSAGE_COLUMNS} FROM messages
+        WHERE {CONVERSATION_FILTER} AND (sent_at, id) < ($3, $4)
+        ORDER BY sent_at DESC, id DESC LIMIT $5"""),
+    'unread_notification_count': ('uuid', 'SELECT COUNT(*) AS count FROM notifications WHERE user_id = $1 AND is_read = FALSE'),
+    'confessions_feed': ('text, bigint, bigint', """
+        SELECT * FROM confessions
+        WHERE is_approved = TRUE AND ($1::text IS NULL OR category = $1)
+        ORDER BY created_at DESC LIMIT $2 OFFSET $3"""),
+    'liked_confession_ids': ('uuid', 'SELECT confession_id FROM confession_likes WHERE user_id = $1'),
+}
+
+# Table each statement reads, for db_metrics labels
+STATEMENT_TABLES = {
+    'has_like': 'likes',
+    'can_chat': 'matches',
+    'latest_messages': 'messages',
+    'messages_after': 'messages',
+    'messages_before': 'messages',
+    'unread_notification_count': 'notifications',
+    'confessions_feed': 'confessions',
+    'liked_confession_ids': 'confession_likes',
+}
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """Connection that remembers whether the hot statements are prepared on it"""
+    statements_prepared = False
+
+def _to_json_value(value):
+    # Match PostgREST's JSON output so routes see the same row shapes
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _to_row(record):
+    return {key: _to_json_value(value) for key, value in record.items()}
+
+class PostgresQueries:
+    def __init__(self, dsn, min_connections=1, max_connections=10, metrics=None, acquire_timeout=10.0):
+        self.metrics = metrics
+        self.acquire_timeout = acquire_timeout
+        # ThreadedConnectionPool raises as soon as it is exhausted instead of
+        # waiting, so callers queue here for a free connection first
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self.pool = psycopg2.pool.ThreadedConnectionPool(
+            min_connections, max_connections, dsn,
+            connection_factory=PreparedConnection,
+            # Timestamps come back in UTC, as they do from PostgREST
+            options='-c timezone=UTC'
+        )
+
+    @contextmanager
+    def _cursor(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise psycopg2.pool.PoolError(f'No database connection free after {self.acquire_timeout}s')
+        try:
+            conn = self.pool.getconn()
+            try:
+                if not conn.statements_prepared:
+                    self._prepare(conn)
+                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                    yield cur
+                conn.commit()
+            except psycopg2.errors.InvalidSqlStatementName:
+                # The server session lost its prepared statements (e.g. a pooler
+                # reset it); prepare them again on the next use
+                conn.rollback()
+                conn.statements_prepared = False
+                raise
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.pool.putconn(conn, close=conn.closed != 0)
+        finally:
+            self._slots.release()
+
+    def _prepare(self, conn):
+        with conn.cursor() as cur:
+            # Start clean in case some of them survived on this session
+            cur.execute('DEALLOCATE ALL')
+            for name, (parameter_types, statement) in PREPARED_STATEMENTS.items():
+                cur.execute(f'PREPARE {name} ({parameter_types}) AS {statement}')
+        conn.commit()
+        conn.statements_prepared = True
+
+    def _execute(self, name, params):
+        placeholders = ', '.join(['%s'] * len(params))
+        started = time.perf_counter()
+        try:
+            rows = self._fetch(name, placeholders, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Once more, now that the connection will prepare them again
+            rows = self._fetch(name, placeholders, params)
+        if self.metrics:
+            self.metrics.record(STATEMENT_TABLES[name], 'execute', time.perf_counter() - started, len(rows))
+        return rows
+
+    def _fetch(self, name, placeholders, params):
+        with self._cursor() as cur:
+            cur.execute(f'EXECUTE {name} ({placeholders})', params)
+            return [_to_row(record) for record in cur.fetchall()]
+
+    def has_like(self, liker_id, liked_id):
+        return bool(self._execute('has_like', (liker_id, liked_id)))
+
+    def can_chat(self, user_a, user_b):
+        return bool(self._execute('can_chat', (user_a, user_b))[0]['can_chat'])
+
+    def latest_messages(self, user_a, user_b, limit):
+        return self._execute('latest_messages', (user_a, user_b, limit))
+
+    def messages_after(self, user_a, user_b, position, limit):
+        sent_at, message_id = position
+        return self._execute('messages_after', (user_a, user_b, sent_at, message_id, limit))
+
+    def messages_before(self, user_a, user_b, position, limit):
+        sent_at, message_id = position
+        return self._execute('messages_before', (user_a, user_b, sent_at, message_id, limit))
+
+    def unread_notification_count(self, user_id):
+        return self._execute('unread_notification_count', (user_id,))[0]['count']
+
+    def confessions_feed(self, category=None, limit=None, offset=0):
+        return self._execute('confessions_feed', (category, limit, offset))
+
+    def liked_confession_ids(self, user_id):
+        return {row['confession_id'] for row in self._execute('liked_confession_ids', (user_id,))}
+
+    def close(self):
+        self.pool.closeall()
@@ -0,0 +1,213 @@
+# Fall In - Compatibility ranking
+# Keeps every profile's ranking features in NumPy arrays indexed by dense
+# user id (user_index.DenseIds) and scores all of them against a viewer in
+# one vectorized pass. The discovery queue takes the top k it has not
+# already queued or seen.
+#
+# Features: what each person is looking for (scored with an affinity
+# matrix), department, year, age and how recently they were active. The
+# arrays are bulk loaded from users once, then updated in place when a
+# profile is saved or a user is active. When recommender.py has been run, the
+# predicted interest between the two people (a dot product of their learned
+# embeddings) is added to the score as well.
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+RANKING_COLUMNS = 'id, department, year, looking_for, age, created_at, last_active_at'
+LOAD_PAGE_SIZE = 1000
+
+LOOKING_FOR = ('dating', 'relationship', 'friendship', 'networking', 'study buddy')
+# Row: viewer's choice, column: candidate's choice
+LOOKING_FOR_AFFINITY = np.array([
+    [1.0, 0.8, 0.2, 0.0, 0.1],
+    [0.8, 1.0, 0.2, 0.0, 0.1],
+    [0.2, 0.2, 1.0, 0.5, 0.7],
+    [0.0, 0.0, 0.5, 1.0, 0.6],
+    [0.1, 0.1, 0.7, 0.6, 1.0],
+], dtype=np.float32)
+# Unknown choices (the last code) score as neutral
+LOOKING_FOR_AFFINITY = np.pad(LOOKING_FOR_AFFINITY, ((0, 1), (0, 1)), constant_values=0.5)
+UNKNOWN_LOOKING_FOR = len(LOOKING_FOR)
+
+YEAR_ORDER = {
+    'freshman': 1, '1st year': 1, 'sophomore': 2, '2nd year': 2, 'junior': 3, '3rd year': 3,
+    'senior': 4, '4th year': 4, 'graduate': 5, 'phd': 6,
+}
+
+WEIGHTS = {'looking_for': 3.0, 'department': 1.0, 'year': 1.0, 'age': 1.5, 'recency': 1.0, 'interest': 2.0}
+AGE_SCALE_YEARS = 4.0
+RECENCY_HALF_LIFE_DAYS = 14.0
+
+# Activity is written back to users.last_active_at at most this often per user
+ACTIVITY_WRITE_INTERVAL = 15 * 60
+
+def _timestamp(value):
+    if not value:
+        return np.nan
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+class CompatibilityRanker:
+    def __init__(self, dense_ids, capacity=1024):
+        self.dense_ids = dense_ids
+        self.ready = False
+        self._lock = threading.Lock()
+        self._departments = {}
+        # attribute: value for users without it
+        self._fill = {'has_profile': False, 'department': -1, 'year': np.nan, 'looking_for': UNKNOWN_LOOKING_FOR,
+                      'age': np.nan, 'active_at': np.nan}
+        self.has_profile = np.zeros(capacity, dtype=bool)
+        self.department = np.full(capacity, -1, dtype=np.int32)
+        self.year = np.full(capacity, np.nan, dtype=np.float32)
+        self.looking_for = np.full(capacity, UNKNOWN_LOOKING_FOR, dtype=np.int8)
+        self.age = np.full(capacity, np.nan, dtype=np.float32)
+        self.active_at = np.full(capacity, np.nan, dtype=np.float64)
+        # Learned embeddings (see recommender.py), one row per dense index; None until set_interest()
+        self.interest_viewer = None
+        self.interest_candidate = None
+
+    def _ensure_capacity(self, size):
+        # Caller holds self._lock
+        capacity = len(self.has_profile)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        for name, fill in self._fill.items():
+            old = getattr(self, name)
+            new = np.full((new_capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+
+    def load(self, db):
+        """Bulk load every completed profile, a page at a time"""
+        started = time.perf_counter()
+        loaded = 0
+        start = 0
+        while True:
+            rows = (db.table('users').select(RANKING_COLUMNS).not_.is_('name', 'null')
+                    .order('id').range(start, start + LOAD_PAGE_SIZE - 1).execute().data)
+            for row in rows:
+                self.update_user(row)
+            loaded += len(rows)
+            if len(rows) < LOAD_PAGE_SIZE:
+                break
+            start += LOAD_PAGE_SIZE
+        self.ready = True
+        print(f"📈 Ranking features loaded for {loaded} users in {time.perf_counter() - started:.2f}s")
+
+    def update_user(self, row):
+        """Set one user's features from a users row with (some of) RANKING_COLUMNS"""
+        index = self.dense_ids.index(row['id'])
+        department = (row.get('department') or '').strip().lower()
+        with self._lock:
+            self._ensure_capacity(index + 1)
+            if department:
+                department_code = self._departments.setdefault(department, len(self._departments))
+            else:
+                department_code = -1
+            self.has_profile[index] = True
+            self.department[index] = department_code
+            self.year[index] = YEAR_ORDER.get((row.get('year') or '').strip().lower(), np.nan)
+            looking_for = (row.get('looking_for') or '').strip().lower()
+            self.looking_for[index] = LOOKING_FOR.index(looking_for) if looking_for in LOOKING_FOR else UNKNOWN_LOOKING_FOR
+            self.age[index] = float(row['age']) if row.get('age') not in (None, '') else np.nan
+            active_at = _timestamp(row.get('last_active_at') or row.get('created_at'))
+            # Keep newer activity recorded by touch() since the row was read
+            self.active_at[index] = np.fmax(self.active_at[index], active_at)
+
+    def set_interest(self, user_ids, viewer_vectors, candidate_vectors):
+        """Use embeddings from recommender.py; users missing from them score no interest"""
+        indexes = np.fromiter((self.dense_ids.index(user_id) for user_id in user_ids), dtype=np.int64, count=len(user_ids))
+        with self._lock:
+            self._ensure_capacity(len(self.dense_ids))
+            capacity = len(self.has_profile)
+            viewer = np.zeros((capacity, viewer_vectors.shape[1]), dtype=np.float32)
+            candidate = np.zeros((capacity, candidate_vectors.shape[1]), dtype=np.float32)
+            viewer[indexes] = viewer_vectors
+            candidate[indexes] = candidate_vectors
+            self.interest_viewer, self.interest_candidate = viewer, candidate
+            self._fill.update(interest_viewer=0.0, interest_candidate=0.0)
+
+    def touch(self, user_id, now=None):
+        """Record activity; True when it should also be written to the database"""
+        now = time.time() if now is None else now
+        index = self.dense_ids.index(user_id)
+        with self._lock:
+            self._ensure_capacity(index + 1)
+            previous = self.active_at[index]
+            self.active_at[index] = now
+        return bool(np.isnan(previous) or now - previous >= ACTIVITY_WRITE_INTERVAL)
+
+    def scores(self, viewer_id, now=None):
+        """Compatibility of every dense index with the viewer (NaN-free float32 array)"""
+        now = time.time() if now is None else now
+        viewer = self.dense_ids.index(viewer_id)
+        with self._lock:
+            self._ensure_capacity(viewer + 1)
+            size = len(self.dense_ids)
+            self._ensure_capacity(size)
+            department = self.department[:size]
+            year = self.year[:size]
+            looking_for = self.looking_for[:size]
+            age = self.age[:size]
+            active_at = self.active_at[:size]
+            viewer_department = self.department[viewer]
+            viewer_year = self.year[viewer]
+            viewer_looking_for = self.looking_for[viewer]
+            viewer_age = self.age[viewer]
+            interest_candidate = None if self.interest_candidate is None else self.interest_candidate[:size]
+            interest_query = None if self.interest_viewer is None else self.interest_viewer[viewer]
+
+        score = WEIGHTS['looking_for'] * LOOKING_FOR_AFFINITY[viewer_looking_for][looking_for]
+        if viewer_department >= 0:
+            score += WEIGHTS['department'] * (department == viewer_department)
+        # Unknown years and ages score halfway
+        score += WEIGHTS['year'] * np.nan_to_num(1.0 - np.abs(year - viewer_year) / 5.0, nan=0.5)
+        score += WEIGHTS['age'] * np.nan_to_num(np.exp(-np.square((age - viewer_age) / AGE_SCALE_YEARS)), nan=0.5)
+        idle_days = np.maximum(now - active_at, 0.0) / 86400.0
+        score += WEIGHTS['recency'] * np.nan_to_num(np.exp2(-idle_days / RECENCY_HALF_LIFE_DAYS), nan=0.0)
+        if interest_candidate is not None:
+            interest = interest_candidate @ interest_query
+            # Scaled per viewer so the strongest predicted interest counts as 1
+            strongest = np.abs(interest).max()
+            if strongest > 0:
+                score += WEIGHTS['interest'] * (interest / strongest)
+        return score.astype(np.float32, copy=False)
+
+    def top_k(self, viewer_id, k, seen=None, exclude=()):
+        """Ids of the k best-scoring profiles, best first, skipping the viewer, `seen` and `exclude`"""
+        scores = self.scores(viewer_id)
+        eligible = self.has_profile[:len(scores)].copy()
+        return top_candidates(self.dense_ids, scores, eligible, viewer_id, k, seen, exclude)
+
+def top_candidates(dense_ids, scores, eligible, viewer_id, k, seen=None, exclude=()):
+    """Ids of the k highest `scores` among `eligible` dense indexes, best first.
+
+    The viewer, anyone in `seen` (a discovery.SeenSet) and ids in `exclude`
+    are left out; `eligible` is modified in place.
+    """
+    size = len(scores)
+    if seen is not None:
+        seen_bits = np.unpackbits(np.frombuffer(bytes(seen.bits), dtype=np.uint8), bitorder='little')[:size]
+        eligible[:len(seen_bits)] &= ~seen_bits.astype(bool)
+    viewer = dense_ids.get(viewer_id)
+    if viewer is not None and viewer < size:
+        eligible[viewer] = False
+    for user_id in exclude:
+        index = dense_ids.get(user_id)
+        if index is not None and index < size:
+            eligible[index] = False
+
+    candidates = np.flatnonzero(eligible)
+    if len(candidates) == 0 or k <= 0:
+        return []
+    candidate_scores = scores[candidates]
+    if len(candidates) > k:
+        best = np.argpartition(-candidate_scores, k - 1)[:k]
+    else:
+        best = np.arange(len(candidates))
+    best = best[np.argsort(-candidate_scores[best], kind='stable')]
+    return [dense_ids.user_id(index) for index in candidates[best]]
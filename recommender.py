@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Fall In Recommender Training
+Learns who is likely to be interested in whom from the likes table and writes
+per-user embeddings for the discovery ranker (ranking.py).
+
+The likes are a sparse user x user matrix R (R[a, b] = 1 when a liked b).
+After normalising by each user's like counts, a truncated SVD gives every user
+a "liker" vector P and a "liked" vector Q with R[a, b] ~ P[a] . Q[b]. What
+discovery wants is interest in both directions, P[a] . Q[b] + P[b] . Q[a],
+which is a single dot product once each user's vectors are stacked:
+[P[a], Q[a]] for them as the viewer and [Q[b], P[b]] for them as a candidate.
+Those two arrays and the user ids they belong to are saved to one .npz file.
+
+Run it offline (e.g. nightly); the app picks up a new file on its own.
+
+Usage: python recommender.py [--dims 32] [--output PATH]   (default: RECOMMENDER_PATH or ./recommender.npz)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recommender.npz')
+PAGE_SIZE = 1000
+
+def load_likes(db):
+    """All (liker_id, liked_id) pairs, a page at a time"""
+    likes = []
+    start = 0
+    while True:
+        rows = (db.table('likes').select('liker_id, liked_id')
+                .order('id').range(start, start + PAGE_SIZE - 1).execute().data)
+        likes.extend((row['liker_id'], row['liked_id']) for row in rows)
+        if len(rows) < PAGE_SIZE:
+            return likes
+        start += PAGE_SIZE
+
+def train(likes, dims=32, random_seed=0):
+    """Factorise the likes matrix; returns (user_ids, viewer vectors, candidate vectors)"""
+    user_ids = sorted({user_id for pair in likes for user_id in pair})
+    index = {user_id: position for position, user_id in enumerate(user_ids)}
+    likers = np.fromiter((index[liker] for liker, _ in likes), dtype=np.int32, count=len(likes))
+    liked = np.fromiter((index[liked_id] for _, liked_id in likes), dtype=np.int32, count=len(likes))
+
+    size = len(user_ids)
+    matrix = sparse.csr_matrix((np.ones(len(likes), dtype=np.float32), (likers, liked)), shape=(size, size))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+
+    # Scale by 1/sqrt(likes given) and 1/sqrt(likes received) so popular
+    # profiles and prolific likers do not take over every factor
+    given = np.asarray(matrix.sum(axis=1)).ravel()
+    received = np.asarray(matrix.sum(axis=0)).ravel()
+    normalised = sparse.diags(1.0 / np.sqrt(np.maximum(given, 1.0))) @ matrix @ sparse.diags(1.0 / np.sqrt(np.maximum(received, 1.0)))
+
+    dims = max(1, min(dims, size - 1))
+    left, strengths, right = svds(normalised.astype(np.float32), k=dims, random_state=random_seed)
+    scale = np.sqrt(strengths)
+    liker_vectors = (left * scale).astype(np.float32)
+    liked_vectors = (right.T * scale).astype(np.float32)
+    return (np.array(user_ids),
+            np.hstack([liker_vectors, liked_vectors]),
+            np.hstack([liked_vectors, liker_vectors]))
+
+def save_embeddings(path, user_ids, viewer_vectors, candidate_vectors):
+    # Write then rename, so the app never reads a half-written file
+    temp_path = f'{path}.tmp.npz'
+    np.savez(temp_path, user_ids=user_ids, viewer=viewer_vectors, candidate=candidate_vectors)
+    os.replace(temp_path, path)
+
+def load_embeddings(path):
+    """(user_ids, viewer vectors, candidate vectors) saved by save_embeddings()"""
+    with np.load(path, allow_pickle=False) as data:
+        return data['user_ids'], data['viewer'], data['candidate']
+
+def main():
+    parser = argparse.ArgumentParser(description='Train discovery embeddings from the likes table')
+    parser.add_argument('--dims', type=int, default=32, help='factors per direction')
+    parser.add_argument('--output', default=os.getenv('RECOMMENDER_PATH', DEFAULT_OUTPUT), help='where to write the embeddings')
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    if not supabase_url or not supabase_key:
+        print('❌ SUPABASE_URL and SUPABASE_KEY must be set')
+        return 1
+
+    from supabase import create_client
+    db = create_client(supabase_url, supabase_key)
+
+    started = time.perf_counter()
+    likes = load_likes(db)
+    print(f'📥 Loaded {len(likes)} likes in {time.perf_counter() - started:.1f}s')
+    if len(likes) < 2:
+        print('❌ Not enough likes to train on')
+        return 1
+
+    started = time.perf_counter()
+    user_ids, viewer_vectors, candidate_vectors = train(likes, dims=args.dims)
+    print(f'🧮 Trained {viewer_vectors.shape[1]}-dim embeddings for {len(user_ids)} users in {time.perf_counter() - started:.1f}s')
+
+    save_embeddings(args.output, user_ids, viewer_vectors, candidate_vectors)
+    print(f'✅ Wrote {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
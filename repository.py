@@ -0,0 +1,107 @@
+# Fall In - Batched data access
+# Multi-get helpers that load related rows with one `in_` query per table
+# instead of one query per row, so page cost stays flat as lists grow.
+
+# PostgREST puts `in_` lists in the URL, so very long id lists are split
+IN_QUERY_CHUNK_SIZE = 100
+
+# Column sets for users. Pages load only the columns they show; nothing
+# outside the auth routes reads otp_code or otp_expires.
+USER_NAME_COLUMNS = 'id, name'
+USER_AVATAR_COLUMNS = 'id, name, department, profile_photo'
+USER_CARD_COLUMNS = 'id, name, age, pronouns, department, year, looking_for, bio, profile_photo'
+USER_SELF_COLUMNS = f'{USER_CARD_COLUMNS}, email, is_verified, created_at'
+USER_AUTH_COLUMNS = 'id, is_verified'
+
+def _unique_ids(ids):
+    return list(dict.fromkeys(item_id for item_id in ids if item_id))
+
+def _chunks(items, size=IN_QUERY_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def get_users_by_ids(db, user_ids, columns=USER_AVATAR_COLUMNS):
+    """Return {user_id: user_row} for the given ids. `columns` must include id."""
+    users = {}
+    for chunk in _chunks(_unique_ids(user_ids)):
+        result = db.table('users').select(columns).in_('id', chunk).execute()
+        for user in result.data:
+            users[user['id']] = user
+    return users
+
+def get_prompts_by_user_ids(db, user_ids, columns='user_id, prompt_question, prompt_answer'):
+    """Return {user_id: [prompt_row, ...]} with an entry for every requested id"""
+    ids = _unique_ids(user_ids)
+    prompts = {user_id: [] for user_id in ids}
+    for chunk in _chunks(ids):
+        result = db.table('user_prompts').select(columns).in_('user_id', chunk).execute()
+        for prompt in result.data:
+            prompts[prompt['user_id']].append(prompt)
+    return prompts
+
+def match_partner_id(match, user_id):
+    """The id of the partner in a matches row"""
+    return match['user2_id'] if match['user1_id'] == user_id else match['user1_id']
+
+# Hot-path queries
+# The routes that run on every swipe, poll and page load go through one of
+# these objects so the storage backend can be chosen by configuration:
+# PostgrestQueries uses the Supabase client, pg_backend.PostgresQueries talks
+# to Postgres directly over a connection pool. Both return plain dict rows
+# shaped like PostgREST JSON (ids and timestamps as strings).
+
+MESSAGE_COLUMNS = 'id, sender_id, receiver_id, content, sent_at, is_read'
+
+class PostgrestQueries:
+    def __init__(self, db):
+        self.db = db
+
+    def has_like(self, liker_id, liked_id):
+        result = self.db.table('likes').select('id').eq('liker_id', liker_id).eq('liked_id', liked_id).limit(1).execute()
+        return bool(result.data)
+
+    def can_chat(self, user_a, user_b):
+        # Check if users are matched (stored in either order)
+        matches_result = self.db.table('matches').select('id').or_(f'and(user1_id.eq.{user_a},user2_id.eq.{user_b}),and(user1_id.eq.{user_b},user2_id.eq.{user_a})').limit(1).execute()
+        if matches_result.data:
+            return True
+        
+        # Check if there's an accepted chat request
+        chat_requests_result = self.db.table('chat_requests').select('id').or_(f'and(requester_id.eq.{user_a},receiver_id.eq.{user_b}),and(requester_id.eq.{user_b},receiver_id.eq.{user_a})').eq('status', 'accepted').limit(1).execute()
+        return bool(chat_requests_result.data)
+
+    def _conversation(self, user_a, user_b):
+        return self.db.table('messages').select(MESSAGE_COLUMNS).or_(f'sender_id.eq.{user_a},receiver_id.eq.{user_a}').or_(f'sender_id.eq.{user_b},receiver_id.eq.{user_b}')
+
+    def latest_messages(self, user_a, user_b, limit):
+        """Newest messages between two users, newest first"""
+        return self._conversation(user_a, user_b).order('sent_at', desc=True).order('id', desc=True).limit(limit).execute().data
+
+    def messages_after(self, user_a, user_b, position, limit):
+        """Messages strictly after a (sent_at, id) position, oldest first"""
+        sent_at, message_id = position
+        query = self._conversation(user_a, user_b).or_(f'sent_at.gt."{sent_at}",and(sent_at.eq."{sent_at}",id.gt.{message_id})')
+        return query.order('sent_at', desc=False).order('id', desc=False).limit(limit).execute().data
+
+    def messages_before(self, user_a, user_b, position, limit):
+        """Messages strictly before a (sent_at, id) position, newest first"""
+        sent_at, message_id = position
+        query = self._conversation(user_a, user_b).or_(f'sent_at.lt."{sent_at}",and(sent_at.eq."{sent_at}",id.lt.{message_id})')
+        return query.order('sent_at', desc=True).order('id', desc=True).limit(limit).execute().data
+
+    def unread_notification_count(self, user_id):
+        result = self.db.table('notifications').select('id', count='exact').eq('user_id', user_id).eq('is_read', False).limit(1).execute()
+        return result.count or 0
+
+    def confessions_feed(self, category=None, limit=None, offset=0):
+        """Approved confessions, newest first, optionally filtered and paged"""
+        query = self.db.table('confessions').select('*').eq('is_approved', True).order('created_at', desc=True)
+        if category:
+            query = query.eq('category', category)
+        if limit:
+            query = query.range(offset, offset + limit - 1)
+        return query.execute().data
+
+    def liked_confession_ids(self, user_id):
+        result = self.db.table('confession_likes').select('confession_id').eq('user_id', user_id).execute()
+        return {like['confession_id'] for like in result.data}
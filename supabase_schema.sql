@@ -19,9 +19,13 @@ CREATE TABLE IF NOT EXISTS users (
     is_verified BOOLEAN DEFAULT FALSE,
     otp_code TEXT,
     otp_expires TIMESTAMP WITH TIME ZONE,
+    last_active_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Databases created before last_active_at was added to users
+ALTER TABLE users ADD COLUMN IF NOT EXISTS last_active_at TIMESTAMP WITH TIME ZONE;
+
 -- User prompts table
 CREATE TABLE IF NOT EXISTS user_prompts (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
@@ -49,6 +53,15 @@ CREATE TABLE IF NOT EXISTS likes (
     UNIQUE(liker_id, liked_id)
 );
 
+-- Passes table: profiles a user skipped on the dashboard
+CREATE TABLE IF NOT EXISTS passes (
+    id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+    passer_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    passed_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    passed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(passer_id, passed_id)
+);
+
 -- Chat requests table
 CREATE TABLE IF NOT EXISTS chat_requests (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
@@ -102,6 +115,22 @@ CREATE TABLE IF NOT EXISTS confession_likes (
     UNIQUE(confession_id, user_id)
 );
 
+-- Conversation summaries for the chat list, one row per unordered user pair
+-- (user_low is always the smaller id). Kept up to date by the functions below.
+CREATE TABLE IF NOT EXISTS conversations (
+    user_low UUID REFERENCES users(id) ON DELETE CASCADE,
+    user_high UUID REFERENCES users(id) ON DELETE CASCADE,
+    is_match BOOLEAN DEFAULT FALSE,
+    last_message TEXT,
+    last_message_at TIMESTAMP WITH TIME ZONE,
+    last_sender_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    unread_low INTEGER DEFAULT 0, -- messages user_low has not read yet
+    unread_high INTEGER DEFAULT 0, -- messages user_high has not read yet
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_low, user_high),
+    CHECK (user_low < user_high)
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_verified ON users(is_verified);
@@ -110,10 +139,12 @@ CREATE INDEX IF NOT EXISTS idx_matches_user1 ON matches(user1_id);
 CREATE INDEX IF NOT EXISTS idx_matches_user2 ON matches(user2_id);
 CREATE INDEX IF NOT EXISTS idx_likes_liker ON likes(liker_id);
 CREATE INDEX IF NOT EXISTS idx_likes_liked ON likes(liked_id);
+CREATE INDEX IF NOT EXISTS idx_passes_passed ON passes(passed_id);
 CREATE INDEX IF NOT EXISTS idx_chat_requests_requester ON chat_requests(requester_id);
 CREATE INDEX IF NOT EXISTS idx_chat_requests_receiver ON chat_requests(receiver_id);
 CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender_id);
 CREATE INDEX IF NOT EXISTS idx_messages_receiver ON messages(receiver_id);
+CREATE INDEX IF NOT EXISTS idx_messages_pair_sent ON messages(sender_id, receiver_id, sent_at, id);
 CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications(user_id);
 CREATE INDEX IF NOT EXISTS idx_notifications_is_read ON notifications(is_read);
 CREATE INDEX IF NOT EXISTS idx_confessions_user_id ON confessions(user_id);
@@ -121,6 +152,121 @@ CREATE INDEX IF NOT EXISTS idx_confessions_category ON confessions(category);
 CREATE INDEX IF NOT EXISTS idx_confessions_created_at ON confessions(created_at);
 CREATE INDEX IF NOT EXISTS idx_confession_likes_confession_id ON confession_likes(confession_id);
 CREATE INDEX IF NOT EXISTS idx_confession_likes_user_id ON confession_likes(user_id);
+CREATE INDEX IF NOT EXISTS idx_conversations_user_low ON conversations(user_low, last_message_at DESC);
+CREATE INDEX IF NOT EXISTS idx_conversations_user_high ON conversations(user_high, last_message_at DESC);
+
+-- Conversation summary functions (called through supabase.rpc)
+
+-- Create the summary row when two users become able to chat
+CREATE OR REPLACE FUNCTION open_conversation(p_user_a UUID, p_user_b UUID, p_is_match BOOLEAN)
+RETURNS VOID AS $$
+    INSERT INTO conversations (user_low, user_high, is_match)
+    VALUES (LEAST(p_user_a, p_user_b), GREATEST(p_user_a, p_user_b), p_is_match)
+    ON CONFLICT (user_low, user_high)
+    DO UPDATE SET is_match = conversations.is_match OR EXCLUDED.is_match, updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- Record a sent message: new last message and one more unread for the receiver
+CREATE OR REPLACE FUNCTION record_conversation_message(p_sender UUID, p_receiver UUID, p_content TEXT, p_sent_at TIMESTAMP WITH TIME ZONE)
+RETURNS VOID AS $$
+    INSERT INTO conversations (user_low, user_high, last_message, last_message_at, last_sender_id, unread_low, unread_high)
+    VALUES (
+        LEAST(p_sender, p_receiver), GREATEST(p_sender, p_receiver), p_content, p_sent_at, p_sender,
+        CASE WHEN p_receiver < p_sender THEN 1 ELSE 0 END,
+        CASE WHEN p_receiver > p_sender THEN 1 ELSE 0 END
+    )
+    ON CONFLICT (user_low, user_high) DO UPDATE SET
+        last_message = EXCLUDED.last_message,
+        last_message_at = EXCLUDED.last_message_at,
+        last_sender_id = EXCLUDED.last_sender_id,
+        unread_low = conversations.unread_low + EXCLUDED.unread_low,
+        unread_high = conversations.unread_high + EXCLUDED.unread_high,
+        updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- Reset the reader's unread count after they have seen the conversation
+CREATE OR REPLACE FUNCTION mark_conversation_read(p_reader UUID, p_other UUID)
+RETURNS VOID AS $$
+    UPDATE conversations SET
+        unread_low = CASE WHEN p_reader < p_other THEN 0 ELSE unread_low END,
+        unread_high = CASE WHEN p_reader > p_other THEN 0 ELSE unread_high END,
+        updated_at = NOW()
+    WHERE user_low = LEAST(p_reader, p_other) AND user_high = GREATEST(p_reader, p_other);
+$$ LANGUAGE sql;
+
+-- One-time backfill of conversation summaries from existing matches, accepted chat requests and messages
+-- INSERT INTO conversations (user_low, user_high, is_match)
+-- SELECT LEAST(user1_id, user2_id), GREATEST(user1_id, user2_id), TRUE FROM matches
+-- UNION ALL
+-- SELECT LEAST(requester_id, receiver_id), GREATEST(requester_id, receiver_id), FALSE FROM chat_requests WHERE status = 'accepted'
+-- ON CONFLICT (user_low, user_high) DO UPDATE SET is_match = conversations.is_match OR EXCLUDED.is_match;
+-- UPDATE conversations c SET last_message = m.content, last_message_at = m.sent_at, last_sender_id = m.sender_id
+-- FROM (
+--     SELECT DISTINCT ON (LEAST(sender_id, receiver_id), GREATEST(sender_id, receiver_id))
+--         LEAST(sender_id, receiver_id) AS user_low, GREATEST(sender_id, receiver_id) AS user_high, content, sent_at, sender_id
+--     FROM messages
+--     ORDER BY LEAST(sender_id, receiver_id), GREATEST(sender_id, receiver_id), sent_at DESC, id DESC
+-- ) m
+-- WHERE m.user_low = c.user_low AND m.user_high = c.user_high;
+-- UPDATE conversations c SET
+--     unread_low = (SELECT COUNT(*) FROM messages u WHERE u.receiver_id = c.user_low AND u.sender_id = c.user_high AND NOT u.is_read),
+--     unread_high = (SELECT COUNT(*) FROM messages u WHERE u.receiver_id = c.user_high AND u.sender_id = c.user_low AND NOT u.is_read);
+
+-- Like a profile, all in one transaction: record the like and, if it is
+-- mutual, create the match, open the conversation and replace the pair's
+-- notifications with match notifications; otherwise notify the liked user.
+-- The pair is locked first so two people liking each other at the same time
+-- still produce exactly one match.
+-- Returns {"status": "liked" | "matched" | "already_liked", "name": the liked user's name}.
+CREATE OR REPLACE FUNCTION record_like(p_liker UUID, p_liked UUID)
+RETURNS JSONB AS $$
+DECLARE
+    liker_name TEXT;
+    liked_name TEXT;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(LEAST(p_liker, p_liked)::TEXT || GREATEST(p_liker, p_liked)::TEXT));
+
+    INSERT INTO likes (liker_id, liked_id) VALUES (p_liker, p_liked)
+    ON CONFLICT (liker_id, liked_id) DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'already_liked');
+    END IF;
+
+    SELECT COALESCE(name, 'Someone') INTO liker_name FROM users WHERE id = p_liker;
+    SELECT COALESCE(name, 'Someone') INTO liked_name FROM users WHERE id = p_liked;
+
+    IF EXISTS (SELECT 1 FROM likes WHERE liker_id = p_liked AND liked_id = p_liker) THEN
+        INSERT INTO matches (user1_id, user2_id) VALUES (LEAST(p_liker, p_liked), GREATEST(p_liker, p_liked))
+        ON CONFLICT (user1_id, user2_id) DO NOTHING;
+        PERFORM open_conversation(p_liker, p_liked, TRUE);
+
+        DELETE FROM notifications
+        WHERE (user_id = p_liker AND from_user_id = p_liked) OR (user_id = p_liked AND from_user_id = p_liker);
+        INSERT INTO notifications (user_id, from_user_id, type, message) VALUES
+            (p_liker, p_liked, 'match', 'It''s a match with ' || COALESCE(liked_name, 'Someone') || '! 💕'),
+            (p_liked, p_liker, 'match', 'It''s a match with ' || COALESCE(liker_name, 'Someone') || '! 💕');
+        RETURN jsonb_build_object('status', 'matched', 'name', COALESCE(liked_name, 'Someone'));
+    END IF;
+
+    DELETE FROM notifications WHERE user_id = p_liked AND from_user_id = p_liker AND type = 'like';
+    INSERT INTO notifications (user_id, from_user_id, type, message)
+    VALUES (p_liked, p_liker, 'like', COALESCE(liker_name, 'Someone') || ' liked your profile! 💖');
+    RETURN jsonb_build_object('status', 'liked', 'name', COALESCE(liked_name, 'Someone'));
+END;
+$$ LANGUAGE plpgsql;
+
+-- Point a batch of users at media-store hashes (used by migrate_photos.py).
+-- Photos replaced since the batch was read are left alone. Returns rows updated.
+CREATE OR REPLACE FUNCTION set_profile_photos(p_updates JSONB)
+RETURNS INTEGER AS $$
+    WITH updated AS (
+        UPDATE users u SET profile_photo = x.profile_photo
+        FROM jsonb_to_recordset(p_updates) AS x(id UUID, profile_photo TEXT)
+        WHERE u.id = x.id AND u.profile_photo LIKE 'data:image%'
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM updated;
+$$ LANGUAGE sql;
 
 -- For development: Disable Row Level Security to allow Flask sessions to work
 -- Comment out the RLS policies below if you want to enable them for production
@@ -130,11 +276,13 @@ CREATE INDEX IF NOT EXISTS idx_confession_likes_user_id ON confession_likes(user
 -- ALTER TABLE user_prompts ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE matches ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE likes ENABLE ROW LEVEL SECURITY;
+-- ALTER TABLE passes ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE chat_requests ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE messages ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE notifications ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE confessions ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE confession_likes ENABLE ROW LEVEL SECURITY;
+-- ALTER TABLE conversations ENABLE ROW LEVEL SECURITY;
 
 -- Create policies (basic - you can customize these) - DISABLED FOR DEVELOPMENT
 -- CREATE POLICY "Users can view all users" ON users FOR SELECT USING (true);
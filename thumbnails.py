@@ -0,0 +1,56 @@
+# Fall In - Profile photo variants
+# Each upload is resized once into the sizes the pages display, so avatar
+# circles and list rows never download the full original. Variants are stored
+# next to the original in the media store (see media_store.MediaStore).
+
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# name: (longest edge in pixels, crop to a square)
+PHOTO_VARIANTS = {
+    'avatar': (160, True),   # round avatars in lists, chat and notifications
+    'card': (800, False),    # dashboard cards and the profile page
+    'full': (1600, False),   # bounded-size stand-in for the original
+}
+JPEG_QUALITY = 82
+
+# Refuse decompression bombs before decoding them
+MAX_IMAGE_PIXELS = 40_000_000
+
+def _flatten(image):
+    """RGB copy of an image, with any transparency composited onto white"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+def _encode(image):
+    output = BytesIO()
+    image.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return output.getvalue()
+
+def render_variants(source):
+    """Decode an image (a path or binary file) and return {variant name: JPEG bytes}.
+
+    Raises ValueError (or a PIL error) for files that are not usable images.
+    """
+    largest = max(size for size, _ in PHOTO_VARIANTS.values())
+    with Image.open(source) as image:
+        if image.width * image.height > MAX_IMAGE_PIXELS:
+            raise ValueError(f'image is too large ({image.width}x{image.height})')
+        # Let the JPEG decoder scale down while decoding; a no-op for other formats
+        image.draft('RGB', (largest, largest))
+        image = _flatten(ImageOps.exif_transpose(image))
+
+    variants = {}
+    for name, (size, square) in PHOTO_VARIANTS.items():
+        if square:
+            resized = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variants[name] = _encode(resized)
+    return variants
@@ -0,0 +1,36 @@
+# Fall In - Dense user ids
+# Maps user UUIDs to small consecutive integers, so per-user structures can
+# be bitmaps and arrays indexed by position instead of sets of strings. The
+# numbering is process-local and is handed out in first-seen order; it is
+# never stored.
+
+import threading
+
+class DenseIds:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = {}
+        self._ids = []
+
+    def index(self, user_id):
+        """The dense index for a user, assigning the next free one if new"""
+        index = self._index.get(user_id)
+        if index is not None:
+            return index
+        with self._lock:
+            index = self._index.get(user_id)
+            if index is None:
+                index = len(self._ids)
+                self._ids.append(user_id)
+                self._index[user_id] = index
+            return index
+
+    def get(self, user_id):
+        """The dense index for a user, or None if it has never been assigned"""
+        return self._index.get(user_id)
+
+    def user_id(self, index):
+        return self._ids[index]
+
+    def __len__(self):
+        return len(self._ids)